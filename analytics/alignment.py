@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+from collections import deque
+from typing import List, Tuple
+from ingestion.decoder import Trade
+from config.settings import PAIR_ALIGNMENT, PAIR_ALIGNMENT_INTERVAL_MS, PAIR_MAX_STALENESS_MS, PAIR_REGRESSION_WINDOW
+
+ALIGNMENT_MODES = ('grid', 'union')
+
+# (timestamp, x price, y price)
+Sample = Tuple[int, float, float]
+
+# Incremental as-of join of two tick streams onto a common clock. Each sample
+# holds both symbols' last prices at or before its timestamp:
+#   grid:  one sample per interval_ms boundary
+#   union: one sample per distinct tick timestamp of either symbol
+# A sample time is final once a later tick arrives, so samples are emitted from
+# add_ticks as the stream passes them and the same-timestamp ticks of a batch
+# collapse into one sample. Samples where either price is older than
+# max_staleness_ms (0 disables the limit) are skipped, and a long gap costs
+# nothing beyond the samples that are still fresh. Ticks older than the open
+# sample time still update the last price, but emit nothing. Symbols can be
+# served by different connections, so a tick older than its own symbol's last
+# one can arrive late; it is counted and dropped rather than rolling the as-of
+# price (and the staleness clock) backwards.
+class AsOfAligner:
+    def __init__(self, symbol_x: str, symbol_y: str, mode: str = PAIR_ALIGNMENT,
+                 interval_ms: int = PAIR_ALIGNMENT_INTERVAL_MS, max_staleness_ms: int = PAIR_MAX_STALENESS_MS,
+                 capacity: int = PAIR_REGRESSION_WINDOW):
+        if mode not in ALIGNMENT_MODES:
+            raise ValueError(f"Invalid alignment mode: {mode}")
+        if mode == 'grid' and interval_ms <= 0:
+            raise ValueError("Grid alignment needs a positive interval_ms")
+        
+        self.symbol_x = symbol_x
+        self.symbol_y = symbol_y
+        self.mode = mode
+        self.interval = interval_ms
+        self.max_staleness = max_staleness_ms
+        self.history = deque(maxlen=capacity)
+        
+        self.last_price = [None, None]
+        self.last_time = [None, None]
+        # The earliest sample time not yet emitted
+        self.pending = None
+        
+        self.ticks = 0
+        self.samples = 0
+        self.stale = 0
+        self.late = 0
+    
+    def add_ticks(self, ticks: List[Trade]) -> List[Sample]:
+        samples = []
+        symbol_x, symbol_y = self.symbol_x, self.symbol_y
+        
+        for tick in ticks:
+            if tick.symbol == symbol_x:
+                side = 0
+            elif tick.symbol == symbol_y:
+                side = 1
+            else:
+                continue
+            
+            timestamp = tick.timestamp
+            if self.last_time[side] is not None and timestamp < self.last_time[side]:
+                self.late += 1
+                continue
+            
+            if self.pending is None:
+                self.pending = self._open(timestamp)
+            elif timestamp > self.pending:
+                self._emit_before(timestamp, samples)
+                self.pending = max(self.pending, self._open(timestamp))
+            
+            self.last_price[side] = tick.price
+            self.last_time[side] = timestamp
+            self.ticks += 1
+        
+        return samples
+    
+    def _open(self, timestamp: int) -> int:
+        # The sample time a tick at `timestamp` contributes to
+        if self.mode == 'union':
+            return timestamp
+        return -(-timestamp // self.interval) * self.interval
+    
+    def _emit_before(self, timestamp: int, samples: List[Sample]):
+        # Emits the open sample times before `timestamp`: all prices as of them are known
+        if self.last_price[0] is None or self.last_price[1] is None:
+            return
+        
+        step = self.interval if self.mode == 'grid' else 1
+        stop = timestamp if self.mode == 'grid' else self.pending + 1
+        times = range(self.pending, stop, step)
+        if self.max_staleness > 0:
+            # Prices stay fixed until `timestamp`, so the fresh sample times
+            # are the ones up to the older price's time plus the limit
+            fresh = range(self.pending, min(stop, min(self.last_time) + self.max_staleness + 1), step)
+            self.stale += len(times) - len(fresh)
+            times = fresh
+        
+        x, y = self.last_price
+        for sample_time in times:
+            sample = (sample_time, x, y)
+            samples.append(sample)
+            self.history.append(sample)
+        self.samples += len(times)
+    
+    def get_frame(self) -> pd.DataFrame:
+        # The last `capacity` samples, indexed by timestamp
+        if not self.history:
+            return pd.DataFrame(columns=['x', 'y'])
+        timestamps, xs, ys = zip(*self.history)
+        index = pd.DatetimeIndex(np.array(timestamps, dtype=np.int64).view('datetime64[ms]'), name='timestamp')
+        return pd.DataFrame({'x': xs, 'y': ys}, index=index)
+    
+    def get_stats(self) -> dict:
+        return {
+            'mode': self.mode,
+            'interval_ms': self.interval if self.mode == 'grid' else None,
+            'ticks': self.ticks,
+            'samples': self.samples,
+            'stale_skipped': self.stale,
+            'late_dropped': self.late
+        }
\ No newline at end of file
@@ -0,0 +1,221 @@
+import logging
+import time
+from typing import Dict, List, Optional
+from ingestion.decoder import Trade
+from config.settings import TIMEFRAMES, TIMEFRAME_MS, BAR_GRACE_MS
+
+logger = logging.getLogger(__name__)
+
+class Bar:
+    __slots__ = ('symbol', 'timeframe', 'start_time', 'duration', 'open', 'high', 'low', 'close', 'volume',
+                 'first_time', 'last_time')
+    
+    def __init__(self, symbol: str, timeframe: str, start_time: int, duration: int, timestamp: int,
+                 price: float, quantity: float):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.start_time = start_time
+        self.duration = duration
+        self.open = self.high = self.low = self.close = price
+        self.volume = quantity
+        self.first_time = self.last_time = timestamp
+    
+    @property
+    def end_time(self) -> int:
+        return self.start_time + self.duration
+    
+    def update(self, timestamp: int, price: float, quantity: float):
+        if price > self.high:
+            self.high = price
+        if price < self.low:
+            self.low = price
+        # Slightly out-of-order ticks inside the bar still land on the right open/close
+        if timestamp >= self.last_time:
+            self.close = price
+            self.last_time = timestamp
+        elif timestamp < self.first_time:
+            self.open = price
+            self.first_time = timestamp
+        self.volume += quantity
+    
+    def merge(self, bar: 'Bar'):
+        # bar is a closed sub-bar that starts after everything merged so far
+        if bar.high > self.high:
+            self.high = bar.high
+        if bar.low < self.low:
+            self.low = bar.low
+        self.close = bar.close
+        self.last_time = bar.last_time
+        self.volume += bar.volume
+    
+    def rollup(self, timeframe: str, duration: int) -> 'Bar':
+        # Only time bars sit on a grid; sampler bars (duration 0) cannot be re-bucketed
+        if self.duration <= 0 or duration <= 0:
+            raise ValueError(f"Cannot roll up {self.timeframe} bar into {timeframe}: not a time bar")
+        bar = Bar(self.symbol, timeframe, self.start_time - self.start_time % duration, duration,
+                  self.first_time, self.open, self.volume)
+        bar.high, bar.low, bar.close, bar.last_time = self.high, self.low, self.close, self.last_time
+        return bar
+    
+    def copy(self) -> 'Bar':
+        bar = Bar.__new__(Bar)
+        for name in Bar.__slots__:
+            setattr(bar, name, getattr(self, name))
+        return bar
+    
+    def as_row(self) -> tuple:
+        return (self.symbol, self.timeframe, self.start_time,
+                self.open, self.high, self.low, self.close, self.volume)
+    
+    def as_dict(self) -> dict:
+        return {
+            'symbol': self.symbol,
+            'timeframe': self.timeframe,
+            'start_time': self.start_time,
+            'open': self.open,
+            'high': self.high,
+            'low': self.low,
+            'close': self.close,
+            'volume': self.volume
+        }
+
+# Streaming OHLCV bars. Each tick updates the symbol's open base bar in O(1);
+# coarser timeframes are built from closed base bars, never from raw ticks.
+# A bar is emitted exactly once, when a tick arrives for a later bar or when
+# expire() finds it more than grace_ms past its end. Ticks older than the
+# symbol's open (or last closed) base bar are counted as late and dropped.
+class BarBuilder:
+    def __init__(self, timeframes: List[str] = TIMEFRAMES, grace_ms: int = BAR_GRACE_MS):
+        for timeframe in timeframes:
+            if timeframe not in TIMEFRAME_MS:
+                raise ValueError(f"Invalid timeframe: {timeframe}")
+        
+        ordered = sorted(set(timeframes), key=TIMEFRAME_MS.get)
+        self.base_timeframe = ordered[0]
+        self.base_ms = TIMEFRAME_MS[self.base_timeframe]
+        self.derived = [(timeframe, TIMEFRAME_MS[timeframe]) for timeframe in ordered[1:]]
+        for timeframe, duration in self.derived:
+            if duration % self.base_ms:
+                raise ValueError(f"Timeframe {timeframe} is not a multiple of {self.base_timeframe}")
+        
+        self.grace_ms = grace_ms
+        self.open_bars: Dict[str, Bar] = {}
+        self.derived_bars: Dict[str, Dict[str, Bar]] = {}
+        self.watermarks: Dict[str, int] = {}
+        self.closed: List[Bar] = []
+        
+        self.tick_count = 0
+        self.late_ticks = 0
+        self.bars_emitted = 0
+    
+    def add_tick(self, tick: Trade):
+        self.add_ticks((tick,))
+    
+    def add_ticks(self, ticks: List[Trade]):
+        open_bars = self.open_bars
+        base_ms = self.base_ms
+        
+        for tick in ticks:
+            bar = open_bars.get(tick.symbol)
+            timestamp = tick.timestamp
+            if bar is not None and bar.start_time <= timestamp < bar.start_time + base_ms:
+                bar.update(timestamp, tick.price, tick.quantity)
+            else:
+                self._roll(tick, bar)
+        
+        self.tick_count += len(ticks)
+    
+    def _roll(self, tick: Trade, bar: Optional[Bar]):
+        symbol = tick.symbol
+        timestamp = tick.timestamp
+        
+        if bar is not None:
+            if timestamp < bar.start_time:
+                self.late_ticks += 1
+                return
+            self._close_base(bar)
+        elif timestamp < self.watermarks.get(symbol, timestamp):
+            self.late_ticks += 1
+            return
+        
+        start = timestamp - timestamp % self.base_ms
+        self._close_derived(symbol, start)
+        self.open_bars[symbol] = Bar(symbol, self.base_timeframe, start, self.base_ms,
+                                     timestamp, tick.price, tick.quantity)
+    
+    def _close_base(self, bar: Bar):
+        del self.open_bars[bar.symbol]
+        self.watermarks[bar.symbol] = bar.end_time
+        self._emit(bar)
+        
+        derived = self.derived_bars.setdefault(bar.symbol, {})
+        for timeframe, duration in self.derived:
+            parent = derived.get(timeframe)
+            if parent is None:
+                derived[timeframe] = bar.rollup(timeframe, duration)
+            else:
+                parent.merge(bar)
+    
+    def _close_derived(self, symbol: str, until: int):
+        derived = self.derived_bars.get(symbol)
+        if not derived:
+            return
+        
+        for timeframe, bar in list(derived.items()):
+            if bar.end_time <= until:
+                del derived[timeframe]
+                self._emit(bar)
+    
+    def _emit(self, bar: Bar):
+        self.closed.append(bar)
+        self.bars_emitted += 1
+    
+    def expire(self, now_ms: Optional[int] = None):
+        # Close bars for symbols that stopped trading, once the grace period
+        # for delayed ticks has passed
+        cutoff = (now_ms if now_ms is not None else int(time.time() * 1000)) - self.grace_ms
+        
+        for bar in [bar for bar in self.open_bars.values() if bar.end_time <= cutoff]:
+            self._close_base(bar)
+        for symbol in self.derived_bars:
+            self._close_derived(symbol, cutoff)
+    
+    def drain(self) -> List[Bar]:
+        closed, self.closed = self.closed, []
+        return closed
+    
+    def get_open_bars(self, symbol: str, timeframe: Optional[str] = None) -> List[Bar]:
+        # Provisional snapshots of the still-open bars, including the open base
+        # bar's contribution to the coarser ones; they change until emitted
+        bars = []
+        base = self.open_bars.get(symbol)
+        if base is not None and timeframe in (None, self.base_timeframe):
+            bars.append(base.copy())
+        
+        derived = self.derived_bars.get(symbol, {})
+        for name, duration in self.derived:
+            if timeframe not in (None, name):
+                continue
+            # An open parent always spans the open base bar: opening a base bar
+            # in a later bucket closes it first
+            parent = derived.get(name)
+            if parent is not None:
+                bar = parent.copy()
+                if base is not None:
+                    bar.merge(base)
+            elif base is not None:
+                bar = base.rollup(name, duration)
+            else:
+                continue
+            bars.append(bar)
+        
+        return bars
+    
+    def get_stats(self) -> dict:
+        return {
+            'ticks': self.tick_count,
+            'late_ticks': self.late_ticks,
+            'bars_emitted': self.bars_emitted,
+            'pending_bars': len(self.closed),
+            'open_symbols': len(self.open_bars)
+        }
\ No newline at end of file
@@ -0,0 +1,163 @@
+import math
+import numpy as np
+from typing import Dict, List, Tuple
+from ingestion.decoder import Trade
+from analytics.bar_builder import Bar
+from analytics.resampler import BarColumns
+
+BAR_TYPES = ('tick', 'volume', 'dollar')
+
+def parse_bar_key(key: str) -> Tuple[str, float]:
+    # 'tick_100', 'volume_10', 'dollar_1000000'
+    kind, _, value = key.partition('_')
+    try:
+        threshold = float(value)
+    except ValueError:
+        threshold = 0.0
+    if kind not in BAR_TYPES or not threshold > 0:
+        raise ValueError(f"Invalid bar type: {key}")
+    return kind, threshold
+
+def is_bar_key(key: str) -> bool:
+    try:
+        parse_bar_key(key)
+        return True
+    except ValueError:
+        return False
+
+class _SamplerState:
+    __slots__ = ('bar', 'total', 'index', 'last_start')
+    
+    def __init__(self):
+        self.bar = None
+        self.total = 0.0
+        self.index = 0.0
+        self.last_start = None
+
+# Information-driven bars: a bar closes once the running tick count, volume or
+# dollar value crosses the next multiple of the threshold. Bar k holds the ticks
+# whose running total *before* the tick floors to k, so any excess carries into
+# the next bar and the live stream and a batch over the same ticks agree.
+# start_time is the first tick's timestamp, moved forward by 1ms when needed so
+# that bars of one symbol never share a start_time (the storage key).
+class BarSampler:
+    def __init__(self, key: str):
+        self.key = key
+        self.kind, self.threshold = parse_bar_key(key)
+        self.state: Dict[str, _SamplerState] = {}
+        self.closed: List[Bar] = []
+        self.bars_emitted = 0
+    
+    def add_tick(self, tick: Trade):
+        self.add_ticks((tick,))
+    
+    def add_ticks(self, ticks: List[Trade]):
+        kind = self.kind
+        threshold = self.threshold
+        
+        for tick in ticks:
+            state = self.state.get(tick.symbol)
+            if state is None:
+                state = self.state[tick.symbol] = _SamplerState()
+            
+            bar = state.bar
+            if bar is None:
+                start = tick.timestamp
+                if state.last_start is not None and start <= state.last_start:
+                    start = state.last_start + 1
+                bar = state.bar = Bar(tick.symbol, self.key, start, 0, tick.timestamp, tick.price, tick.quantity)
+                state.index = math.floor(state.total / threshold)
+            else:
+                bar.update(tick.timestamp, tick.price, tick.quantity)
+            
+            if kind == 'tick':
+                state.total += 1.0
+            elif kind == 'volume':
+                state.total += tick.quantity
+            else:
+                state.total += tick.price * tick.quantity
+            
+            if math.floor(state.total / threshold) != state.index:
+                state.last_start = bar.start_time
+                state.bar = None
+                self.closed.append(bar)
+                self.bars_emitted += 1
+    
+    def drain(self) -> List[Bar]:
+        closed, self.closed = self.closed, []
+        return closed
+    
+    def get_open_bars(self, symbol: str) -> List[Bar]:
+        state = self.state.get(symbol)
+        if state is None or state.bar is None:
+            return []
+        return [state.bar.copy()]
+    
+    def get_stats(self) -> dict:
+        return {
+            'bars_emitted': self.bars_emitted,
+            'pending_bars': len(self.closed),
+            'open_symbols': sum(1 for state in self.state.values() if state.bar is not None)
+        }
+    
+    @staticmethod
+    def sample_arrays(key: str, timestamps: np.ndarray, prices: np.ndarray, quantities: np.ndarray,
+                      include_partial: bool = False) -> BarColumns:
+        # Batch equivalent of add_ticks over ticks in timestamp order; the
+        # trailing bar is incomplete and only returned with include_partial
+        kind, threshold = parse_bar_key(key)
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        prices = np.asarray(prices, dtype=np.float64)
+        quantities = np.asarray(quantities, dtype=np.float64)
+        
+        if len(timestamps) == 0:
+            return BarColumns(np.empty(0, dtype=np.int64), *(np.empty(0) for _ in range(5)))
+        
+        if len(timestamps) > 1 and not np.all(timestamps[1:] >= timestamps[:-1]):
+            order = np.argsort(timestamps, kind='stable')
+            timestamps, prices, quantities = timestamps[order], prices[order], quantities[order]
+        
+        if kind == 'tick':
+            values = np.ones(len(timestamps))
+        elif kind == 'volume':
+            values = quantities
+        else:
+            values = prices * quantities
+        
+        after = np.cumsum(values)
+        before = np.concatenate(([0.0], after[:-1]))
+        index = np.floor(before / threshold)
+        
+        first = np.concatenate(([0], np.flatnonzero(np.diff(index)) + 1))
+        last = np.concatenate((first[1:], [len(index)])) - 1
+        if not include_partial and np.floor(after[-1] / threshold) == index[-1]:
+            first, last = first[:-1], last[:-1]
+            if len(first) == 0:
+                return BarColumns(np.empty(0, dtype=np.int64), *(np.empty(0) for _ in range(5)))
+        
+        end = last[-1] + 1
+        steps = np.arange(len(first))
+        return BarColumns(
+            np.maximum.accumulate(timestamps[first] - steps) + steps,
+            prices[first],
+            np.maximum.reduceat(prices[:end], first),
+            np.minimum.reduceat(prices[:end], first),
+            prices[last],
+            np.add.reduceat(quantities[:end], first)
+        )
+    
+    @staticmethod
+    def sample_ticks(key: str, ticks: List, include_partial: bool = False) -> List[tuple]:
+        # Rebuilds bars from stored Tick rows (or Trade tuples) of one symbol,
+        # as rows for ResampledRepository.upsert_bars
+        if not ticks:
+            return []
+        
+        bars = BarSampler.sample_arrays(
+            key,
+            [tick.timestamp for tick in ticks],
+            [tick.price for tick in ticks],
+            [tick.quantity for tick in ticks],
+            include_partial
+        )
+        return bars.to_rows(ticks[0].symbol, key)
\ No newline at end of file
@@ -0,0 +1,183 @@
+import math
+import time
+import numpy as np
+from collections import deque
+from typing import Dict, List, Optional
+from ingestion.decoder import Trade
+from analytics.alignment import AsOfAligner
+from analytics.stationarity import AdfLagCache
+from config.settings import DEFAULT_ROLLING_WINDOW, PAIR_REGRESSION_WINDOW, PAIR_ADF_INTERVAL
+
+class _WindowSums:
+    __slots__ = ('n', 'x', 'y', 'xx', 'yy', 'xy')
+    
+    def __init__(self):
+        self.clear()
+    
+    def clear(self):
+        self.n = 0
+        self.x = self.y = self.xx = self.yy = self.xy = 0.0
+    
+    def add(self, dx: float, dy: float, sign: int = 1):
+        self.n += sign
+        self.x += sign * dx
+        self.y += sign * dy
+        self.xx += sign * dx * dx
+        self.yy += sign * dy * dy
+        self.xy += sign * dx * dy
+    
+    def centered(self):
+        # (Sxx, Syy, Sxy) about the window means
+        n = self.n
+        return (self.xx - self.x * self.x / n, self.yy - self.y * self.y / n, self.xy - self.x * self.y / n)
+
+# Streaming analytics for one pair. Each aligned (x, y) sample updates running
+# sums over the regression window (hedge ratio) and over the last `window`
+# samples (spread mean/std, z-score, correlation), adding the new sample and
+# subtracting the evicted one, so an update is O(1) and snapshot() is current
+# after every sample. Sums are kept about an anchor point and rebuilt exactly
+# from the ring once per regression window, which bounds both cancellation
+# and drift. Samples come from an AsOfAligner, on a common clock.
+# ADF runs on the regression window's spread, at most every adf_interval,
+# with the AIC lag search cached across refreshes (see AdfLagCache).
+class PairState:
+    def __init__(self, symbol_x: str, symbol_y: str, window: int = DEFAULT_ROLLING_WINDOW,
+                 regression_window: int = PAIR_REGRESSION_WINDOW, adf_interval: float = PAIR_ADF_INTERVAL,
+                 aligner: Optional[AsOfAligner] = None):
+        self.symbol_x = symbol_x
+        self.symbol_y = symbol_y
+        self.window = window
+        self.regression_window = max(regression_window, window)
+        self.adf_interval = adf_interval
+        self.aligner = aligner or AsOfAligner(symbol_x, symbol_y)
+        
+        self.xs = deque(maxlen=self.regression_window)
+        self.ys = deque(maxlen=self.regression_window)
+        self.regression = _WindowSums()
+        self.recent = _WindowSums()
+        self.anchor_x = 0.0
+        self.anchor_y = 0.0
+        self.since_rebuild = 0
+        
+        self.timestamp = None
+        self.updates = 0
+        
+        self.adf = {}
+        self.adf_lags = AdfLagCache()
+        self.adf_at = None
+        self.adf_runs = 0
+    
+    @property
+    def ready(self) -> bool:
+        return len(self.xs) >= max(self.window, 10)
+    
+    def add_ticks(self, ticks: List[Trade]):
+        for timestamp, x, y in self.aligner.add_ticks(ticks):
+            self.update(timestamp, x, y)
+    
+    def update(self, timestamp: int, x: float, y: float):
+        xs, ys = self.xs, self.ys
+        window = self.window
+        
+        if len(xs) == xs.maxlen:
+            self.regression.add(xs[0] - self.anchor_x, ys[0] - self.anchor_y, -1)
+        if len(xs) >= window:
+            self.recent.add(xs[-window] - self.anchor_x, ys[-window] - self.anchor_y, -1)
+        
+        xs.append(x)
+        ys.append(y)
+        dx, dy = x - self.anchor_x, y - self.anchor_y
+        self.regression.add(dx, dy)
+        self.recent.add(dx, dy)
+        self.timestamp = timestamp
+        self.updates += 1
+        
+        self.since_rebuild += 1
+        if self.since_rebuild >= xs.maxlen or self.updates == 1:
+            self._rebuild()
+    
+    def _rebuild(self):
+        # Re-anchor on the newest sample and recompute both windows exactly
+        self.anchor_x, self.anchor_y = self.xs[-1], self.ys[-1]
+        self.regression.clear()
+        self.recent.clear()
+        start = len(self.xs) - min(self.window, len(self.xs))
+        for i, (x, y) in enumerate(zip(self.xs, self.ys)):
+            dx, dy = x - self.anchor_x, y - self.anchor_y
+            self.regression.add(dx, dy)
+            if i >= start:
+                self.recent.add(dx, dy)
+        self.since_rebuild = 0
+    
+    def hedge_ratio(self) -> Optional[float]:
+        if self.regression.n < 2:
+            return None
+        sxx, _, sxy = self.regression.centered()
+        return sxy / sxx if sxx > 0 else None
+    
+    def spread_series(self, hedge_ratio: Optional[float] = None) -> np.ndarray:
+        hedge_ratio = self.hedge_ratio() if hedge_ratio is None else hedge_ratio
+        if hedge_ratio is None:
+            return np.empty(0)
+        return np.fromiter(self.ys, dtype=np.float64, count=len(self.ys)) - \
+            hedge_ratio * np.fromiter(self.xs, dtype=np.float64, count=len(self.xs))
+    
+    def refresh_adf(self, now: Optional[float] = None, force: bool = False) -> bool:
+        now = now if now is not None else time.monotonic()
+        if not force and self.adf_at is not None and now - self.adf_at < self.adf_interval:
+            return False
+        
+        spread = self.spread_series()
+        if len(spread) == 0:
+            return False
+        self.adf = self.adf_lags.test(spread)
+        self.adf_at = now
+        self.adf_runs += 1
+        return True
+    
+    def snapshot(self) -> Dict:
+        # Same keys as SpreadAnalytics.calculate_pair_analytics
+        if not self.ready:
+            return {}
+        hedge_ratio = self.hedge_ratio()
+        if hedge_ratio is None:
+            return {}
+        
+        recent = self.recent
+        n = recent.n
+        sxx, syy, sxy = recent.centered()
+        mean_x = self.anchor_x + recent.x / n
+        mean_y = self.anchor_y + recent.y / n
+        
+        spread_mean = mean_y - hedge_ratio * mean_x
+        spread_var = (syy - 2 * hedge_ratio * sxy + hedge_ratio * hedge_ratio * sxx) / (n - 1)
+        spread_std = math.sqrt(spread_var) if spread_var > 0 else 0.0
+        spread_last = self.ys[-1] - hedge_ratio * self.xs[-1]
+        
+        z_score = (spread_last - spread_mean) / spread_std if spread_std > 0 else 0.0
+        correlation = sxy / math.sqrt(sxx * syy) if sxx > 0 and syy > 0 else 1.0
+        
+        return {
+            'hedge_ratio': hedge_ratio,
+            'spread_mean': spread_mean,
+            'spread_std': spread_std,
+            'spread_last': spread_last,
+            'z_score_last': z_score,
+            'z_score_mean': spread_mean,
+            'z_score_std': spread_std,
+            'correlation': max(-1.0, min(1.0, correlation)),
+            'adf_statistic': self.adf.get('adf_statistic'),
+            'adf_p_value': self.adf.get('p_value'),
+            'is_stationary': self.adf.get('is_stationary', False),
+            'timestamp': self.timestamp
+        }
+    
+    def get_stats(self) -> Dict:
+        return {
+            'symbol_x': self.symbol_x,
+            'symbol_y': self.symbol_y,
+            'samples': len(self.xs),
+            'updates': self.updates,
+            'adf_runs': self.adf_runs,
+            'alignment': self.aligner.get_stats()
+        }
\ No newline at end of file
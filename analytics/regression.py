@@ -3,6 +3,75 @@ import numpy as np
 from statsmodels.api import OLS, add_constant
 from typing import Dict, Tuple, Optional
 
+# Rows per block in rolling_regression; cumulative sums restart every block
+ROLLING_BLOCK = 65536
+
+ROLLING_FIELDS = ('count', 'slope', 'intercept', 'r_squared', 'std_err', 't_stat', 'correlation',
+                  'mean_x', 'mean_y', 'var_x', 'var_y', 'covariance')
+
+def _window_sums(values: np.ndarray, window: int) -> np.ndarray:
+    cumulative = np.concatenate(([0.0], np.cumsum(values)))
+    return cumulative[window:] - cumulative[:-window]
+
+def rolling_regression(y: np.ndarray, x: np.ndarray, window: int, block: int = ROLLING_BLOCK) -> Dict[str, np.ndarray]:
+    # OLS of y on x (with intercept) over every trailing window, one value per
+    # window end (len(y) - window + 1). Window sums of x, y, xy, x^2 and y^2
+    # come from cumulative sums, so each window costs O(1) regardless of its
+    # length. The sums restart every `block` rows and are taken around the
+    # block's first valid point, which keeps the rounding error of both the
+    # cumulative sums and the centered moments at the scale of local moves
+    # rather than of the price level or the series length. NaN pairs are
+    # skipped, as with dropna(); windows with fewer than 2 points are NaN, and
+    # the standard error and t-stat need 3. Window means and (ddof=1)
+    # variances and covariance are returned too.
+    y = np.asarray(y, dtype=np.float64)
+    x = np.asarray(x, dtype=np.float64)
+    size = max(len(y) - window + 1, 0) if window >= 1 else 0
+    results = {key: np.empty(size) for key in ROLLING_FIELDS}
+    
+    valid = ~(np.isnan(x) | np.isnan(y))
+    block = max(block, window)
+    for start in range(0, size, block):
+        stop = min(start + block, size)
+        span = slice(start, stop + window - 1)
+        mask = valid[span]
+        first = np.argmax(mask)
+        cx, cy = x[span][first], y[span][first]
+        dx = np.where(mask, x[span] - cx, 0.0)
+        dy = np.where(mask, y[span] - cy, 0.0)
+        
+        n = _window_sums(mask.astype(np.float64), window)
+        sum_x, sum_y = _window_sums(dx, window), _window_sums(dy, window)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean_x, mean_y = sum_x / n, sum_y / n
+            sxx = np.maximum(_window_sums(dx * dx, window) - sum_x * mean_x, 0.0)
+            syy = np.maximum(_window_sums(dy * dy, window) - sum_y * mean_y, 0.0)
+            sxy = _window_sums(dx * dy, window) - sum_x * mean_y
+            
+            slope = sxy / sxx
+            std_err = np.sqrt(np.maximum(syy - slope * sxy, 0.0) / (n - 2) / sxx)
+            block_results = {
+                'count': n,
+                'slope': slope,
+                'intercept': cy + mean_y - slope * (cx + mean_x),
+                'r_squared': np.clip(sxy * slope / syy, 0.0, 1.0),
+                'std_err': std_err,
+                't_stat': slope / std_err,
+                'correlation': np.clip(sxy / np.sqrt(sxx * syy), -1.0, 1.0),
+                'mean_x': cx + mean_x,
+                'mean_y': cy + mean_y,
+                'var_x': sxx / (n - 1),
+                'var_y': syy / (n - 1),
+                'covariance': sxy / (n - 1)
+            }
+        
+        for key, values in block_results.items():
+            if key != 'count':
+                values[n < (3 if key in ('std_err', 't_stat') else 2)] = np.nan
+            results[key][start:stop] = values
+    
+    return results
+
 class Regression:
     @staticmethod
     def ols_regression(y: pd.Series, x: pd.Series) -> Dict:
@@ -33,7 +102,7 @@ class Regression:
         return None
     
     @staticmethod
-    def calculate_spread(prices_y: pd.Series, prices_x: pd.Series, 
+    def calculate_spread(prices_y: pd.Series, prices_x: pd.Series,
                         hedge_ratio: Optional[float] = None) -> pd.Series:
         if hedge_ratio is None:
             hedge_ratio = Regression.calculate_hedge_ratio(prices_y, prices_x)
@@ -55,20 +124,14 @@ class Regression:
         if len(y) < window or len(x) < window:
             return pd.DataFrame()
         
-        results = []
-        
-        for i in range(window, len(y) + 1):
-            y_window = y.iloc[i-window:i]
-            x_window = x.iloc[i-window:i]
-            
-            result = Regression.ols_regression(y_window, x_window)
-            
-            if result:
-                results.append({
-                    'timestamp': y.index[i-1],
-                    'hedge_ratio': result['slope'],
-                    'intercept': result['intercept'],
-                    'r_squared': result['r_squared']
-                })
+        length = min(len(y), len(x))
+        result = rolling_regression(y.to_numpy()[:length], x.to_numpy()[:length], window)
         
-        return pd.DataFrame(results).set_index('timestamp')
\ No newline at end of file
+        frame = pd.DataFrame({
+            'hedge_ratio': result['slope'],
+            'intercept': result['intercept'],
+            'r_squared': result['r_squared'],
+            'std_err': result['std_err'],
+            't_stat': result['t_stat']
+        }, index=pd.Index(y.index[window - 1:length], name='timestamp'))
+        return frame[result['count'] >= 2]
\ No newline at end of file
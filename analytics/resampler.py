@@ -1,17 +1,102 @@
 import pandas as pd
 import numpy as np
-from typing import List, Dict
+from itertools import repeat
+from typing import Dict, List, NamedTuple, Sequence
+from config.settings import TIMEFRAME_MS
 import logging
 
 logger = logging.getLogger(__name__)
 
+class BarColumns(NamedTuple):
+    start_time: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    
+    def __len__(self) -> int:
+        return len(self.start_time)
+    
+    def to_rows(self, symbol: str, timeframe: str) -> List[tuple]:
+        # (symbol, timeframe, start_time, open, high, low, close, volume), the
+        # row layout ResampledRepository.upsert_bars takes
+        return list(zip(repeat(symbol), repeat(timeframe), *(column.tolist() for column in self)))
+
+def _aggregate(starts: np.ndarray, opens: np.ndarray, highs: np.ndarray, lows: np.ndarray,
+               closes: np.ndarray, volumes: np.ndarray, duration: int) -> BarColumns:
+    # One reduceat per field over runs of equal floored start time; inputs are
+    # sorted, so every run is contiguous
+    buckets = starts - starts % duration
+    first = np.flatnonzero(np.diff(buckets)) + 1
+    first = np.concatenate(([0], first))
+    last = np.concatenate((first[1:], [len(buckets)])) - 1
+    
+    return BarColumns(
+        buckets[first],
+        opens[first],
+        np.maximum.reduceat(highs, first),
+        np.minimum.reduceat(lows, first),
+        closes[last],
+        np.add.reduceat(volumes, first)
+    )
+
 class Resampler:
     TIMEFRAMES = {
         '1s': '1s',
         '1m': '1min',
-        '5m': '5min'
+        '5m': '5min',
+        '1h': '1h'
     }
     
+    @staticmethod
+    def resample_arrays(timestamps: np.ndarray, prices: np.ndarray, quantities: np.ndarray,
+                        timeframes: Sequence[str]) -> Dict[str, BarColumns]:
+        # Integer millisecond buckets, no datetime conversion. Only the finest
+        # timeframe reads the ticks; coarser ones are folded from its bars.
+        for timeframe in timeframes:
+            if timeframe not in Resampler.TIMEFRAMES:
+                raise ValueError(f"Invalid timeframe: {timeframe}")
+        
+        ordered = sorted(set(timeframes), key=TIMEFRAME_MS.get)
+        if len(timestamps) == 0:
+            empty = BarColumns(np.empty(0, dtype=np.int64), *(np.empty(0) for _ in range(5)))
+            return {timeframe: empty for timeframe in ordered}
+        
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        prices = np.asarray(prices, dtype=np.float64)
+        quantities = np.asarray(quantities, dtype=np.float64)
+        
+        if len(timestamps) > 1 and not np.all(timestamps[1:] >= timestamps[:-1]):
+            order = np.argsort(timestamps, kind='stable')
+            timestamps, prices, quantities = timestamps[order], prices[order], quantities[order]
+        
+        result = {}
+        bars = _aggregate(timestamps, prices, prices, prices, prices, quantities, TIMEFRAME_MS[ordered[0]])
+        result[ordered[0]] = bars
+        
+        for timeframe in ordered[1:]:
+            duration = TIMEFRAME_MS[timeframe]
+            if duration % TIMEFRAME_MS[ordered[0]]:
+                raise ValueError(f"Timeframe {timeframe} is not a multiple of {ordered[0]}")
+            result[timeframe] = _aggregate(*bars, duration)
+        
+        return result
+    
+    @staticmethod
+    def rollup_bars(bars: BarColumns, timeframe: str) -> BarColumns:
+        # Coarser bars from finer ones, e.g. stored 1m bars into 1h
+        if timeframe not in Resampler.TIMEFRAMES:
+            raise ValueError(f"Invalid timeframe: {timeframe}")
+        if len(bars) == 0:
+            return bars
+        return _aggregate(*bars, TIMEFRAME_MS[timeframe])
+    
+    @staticmethod
+    def _to_dicts(bars: BarColumns, symbol: str, timeframe: str) -> List[dict]:
+        keys = ('symbol', 'timeframe', 'start_time', 'open', 'high', 'low', 'close', 'volume')
+        return [dict(zip(keys, row)) for row in bars.to_rows(symbol, timeframe)]
+    
     @staticmethod
     def resample_ticks(ticks: List[dict], timeframe: str) -> List[dict]:
         if not ticks:
@@ -20,37 +105,17 @@ class Resampler:
         if timeframe not in Resampler.TIMEFRAMES:
             raise ValueError(f"Invalid timeframe: {timeframe}")
         
-        df = pd.DataFrame(ticks)
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        df = df.set_index('timestamp')
-        df = df.sort_index()
-        
-        resampled = df['price'].resample(Resampler.TIMEFRAMES[timeframe]).agg({
-            'open': 'first',
-            'high': 'max',
-            'low': 'min',
-            'close': 'last'
-        })
+        # Accepts tick dicts as well as Trade tuples
+        if isinstance(ticks[0], dict):
+            symbol = ticks[0]['symbol']
+            fields = [[tick[key] for tick in ticks] for key in ('timestamp', 'price', 'quantity')]
+        else:
+            symbol = ticks[0].symbol
+            fields = [[tick.timestamp for tick in ticks], [tick.price for tick in ticks],
+                      [tick.quantity for tick in ticks]]
         
-        volume = df['quantity'].resample(Resampler.TIMEFRAMES[timeframe]).sum()
-        
-        resampled['volume'] = volume
-        resampled = resampled.dropna()
-        
-        bars = []
-        for idx, row in resampled.iterrows():
-            bars.append({
-                'symbol': ticks[0]['symbol'],
-                'timeframe': timeframe,
-                'start_time': int(idx.timestamp() * 1000),
-                'open': float(row['open']),
-                'high': float(row['high']),
-                'low': float(row['low']),
-                'close': float(row['close']),
-                'volume': float(row['volume'])
-            })
-        
-        return bars
+        bars = Resampler.resample_arrays(*fields, [timeframe])[timeframe]
+        return Resampler._to_dicts(bars, symbol, timeframe)
     
     @staticmethod
     def resample_from_dataframe(df: pd.DataFrame, timeframe: str, symbol: str) -> List[dict]:
@@ -63,33 +128,11 @@ class Resampler:
         if 'timestamp' not in df.columns:
             return []
         
-        df_copy = df.copy()
-        df_copy['timestamp'] = pd.to_datetime(df_copy['timestamp'], unit='ms')
-        df_copy = df_copy.set_index('timestamp')
-        df_copy = df_copy.sort_index()
-        
-        resampled = df_copy['price'].resample(Resampler.TIMEFRAMES[timeframe]).agg({
-            'open': 'first',
-            'high': 'max',
-            'low': 'min',
-            'close': 'last'
-        })
-        
-        volume = df_copy['quantity'].resample(Resampler.TIMEFRAMES[timeframe]).sum()
-        resampled['volume'] = volume
-        resampled = resampled.dropna()
-        
-        bars = []
-        for idx, row in resampled.iterrows():
-            bars.append({
-                'symbol': symbol,
-                'timeframe': timeframe,
-                'start_time': int(idx.timestamp() * 1000),
-                'open': float(row['open']),
-                'high': float(row['high']),
-                'low': float(row['low']),
-                'close': float(row['close']),
-                'volume': float(row['volume'])
-            })
+        timestamps = df['timestamp'].to_numpy()
+        if np.issubdtype(timestamps.dtype, np.datetime64):
+            timestamps = timestamps.astype('datetime64[ms]').astype(np.int64)
         
-        return bars
\ No newline at end of file
+        bars = Resampler.resample_arrays(
+            timestamps, df['price'].to_numpy(), df['quantity'].to_numpy(), [timeframe]
+        )[timeframe]
+        return Resampler._to_dicts(bars, symbol, timeframe)
\ No newline at end of file
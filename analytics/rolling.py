@@ -1,49 +1,192 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, List
-from collections import deque
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from ingestion.decoder import Trade
 
+class TickColumns(NamedTuple):
+    timestamp: np.ndarray
+    price: np.ndarray
+    quantity: np.ndarray
+
+# Preallocated structure-of-arrays buffer for one symbol. Ticks are written
+# linearly into `capacity + slack` slots; when the end is reached the newest
+# `capacity` rows are moved to the front, so appends stay amortized O(1) and
+# any window of up to `capacity` rows is a contiguous slice. `appended` counts
+# every tick ever added, so it doubles as the sequence of the newest one.
+class TickRing:
+    def __init__(self, capacity: int, slack: Optional[int] = None):
+        self.capacity = capacity
+        self.slack = slack or max(capacity // 4, 1)
+        size = capacity + self.slack
+        self.timestamp = np.zeros(size, dtype=np.int64)
+        self.price = np.zeros(size, dtype=np.float64)
+        self.quantity = np.zeros(size, dtype=np.float64)
+        self.end = 0
+        self.size = 0
+        self.appended = 0
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    def _make_room(self, count: int):
+        if self.end + count <= len(self.timestamp):
+            return
+        
+        keep = min(self.size, self.capacity - count)
+        start = self.end - keep
+        for column in (self.timestamp, self.price, self.quantity):
+            column[:keep] = column[start:self.end]
+        self.end = keep
+        self.size = keep
+    
+    def append(self, timestamp: int, price: float, quantity: float):
+        self._make_room(1)
+        end = self.end
+        self.timestamp[end] = timestamp
+        self.price[end] = price
+        self.quantity[end] = quantity
+        self.end = end + 1
+        self.appended += 1
+        if self.size < self.capacity:
+            self.size += 1
+    
+    def extend(self, timestamps, prices, quantities):
+        count = len(timestamps)
+        self.appended += count
+        if count > self.capacity:
+            timestamps = timestamps[-self.capacity:]
+            prices = prices[-self.capacity:]
+            quantities = quantities[-self.capacity:]
+            count = self.capacity
+        
+        self._make_room(count)
+        end = self.end
+        self.timestamp[end:end + count] = timestamps
+        self.price[end:end + count] = prices
+        self.quantity[end:end + count] = quantities
+        self.end = end + count
+        self.size = min(self.size + count, self.capacity)
+    
+    def window(self, count: Optional[int] = None) -> TickColumns:
+        if count is None or count > self.size:
+            count = self.size
+        start = self.end - count
+        
+        columns = TickColumns(
+            self.timestamp[start:self.end],
+            self.price[start:self.end],
+            self.quantity[start:self.end]
+        )
+        for column in columns:
+            column.flags.writeable = False
+        return columns
+    
+    def clear(self):
+        self.end = 0
+        self.size = 0
+
+# The one in-memory copy of recent ticks, for analytics, the API and, without
+# the journal, the flush path (TickHandler), which tracks its position through
+# per-symbol sequence numbers. Arrays returned by get_arrays/get_since and the
+# values behind get_prices and get_dataframe are views into the ring: use them
+# before the next append.
 class RollingBuffer:
     def __init__(self, maxlen: int = 10000):
         self.maxlen = maxlen
-        self.buffers = {}
+        self.buffers: Dict[str, TickRing] = {}
+    
+    def _ring(self, symbol: str) -> TickRing:
+        ring = self.buffers.get(symbol)
+        if ring is None:
+            ring = self.buffers[symbol] = TickRing(self.maxlen)
+        return ring
     
-    def add_tick(self, symbol: str, tick: dict):
-        if symbol not in self.buffers:
-            self.buffers[symbol] = deque(maxlen=self.maxlen)
+    def add_tick(self, symbol: str, tick: Trade):
+        self._ring(symbol).append(tick.timestamp, tick.price, tick.quantity)
+    
+    def add_ticks(self, ticks: List[Trade]):
+        if len(ticks) < 8:
+            for tick in ticks:
+                self.add_tick(tick.symbol, tick)
+            return
+        
+        grouped = {}
+        for tick in ticks:
+            rows = grouped.get(tick.symbol)
+            if rows is None:
+                rows = grouped[tick.symbol] = ([], [], [])
+            rows[0].append(tick.timestamp)
+            rows[1].append(tick.price)
+            rows[2].append(tick.quantity)
         
-        self.buffers[symbol].append(tick)
+        for symbol, (timestamps, prices, quantities) in grouped.items():
+            self._ring(symbol).extend(timestamps, prices, quantities)
+    
+    def get_sequence(self, symbol: str) -> int:
+        ring = self.buffers.get(symbol)
+        return ring.appended if ring is not None else 0
     
-    def get_ticks(self, symbol: str, limit: int = None) -> List[dict]:
-        if symbol not in self.buffers:
-            return []
+    def get_since(self, symbol: str, sequence: int) -> Tuple[TickColumns, int]:
+        # The ticks after `sequence` still held, and the sequence of the newest
+        ring = self.buffers.get(symbol)
+        if ring is None:
+            return self.get_arrays(symbol), sequence
+        return ring.window(ring.appended - sequence), ring.appended
+    
+    def get_arrays(self, symbol: str, limit: int = None) -> TickColumns:
+        ring = self.buffers.get(symbol)
+        if ring is None:
+            return TickColumns(*(np.empty(0, dtype=dtype) for dtype in (np.int64, np.float64, np.float64)))
         
-        if limit is None:
-            return list(self.buffers[symbol])
+        return ring.window(limit)
+    
+    def get_ticks(self, symbol: str, limit: int = None) -> List[Trade]:
+        timestamps, prices, quantities = self.get_arrays(symbol, limit)
         
-        return list(self.buffers[symbol])[-limit:]
+        return [Trade(t, symbol, p, q)
+                for t, p, q in zip(timestamps.tolist(), prices.tolist(), quantities.tolist())]
+    
+    def get_sizes(self) -> Dict[str, int]:
+        return {symbol: len(ring) for symbol, ring in self.buffers.items()}
+    
+    def _clean_window(self, symbol: str, limit: int = None) -> TickColumns:
+        timestamps, prices, quantities = self.get_arrays(symbol, limit)
+        
+        if len(timestamps) > 1 and not np.all(timestamps[1:] >= timestamps[:-1]):
+            order = np.argsort(timestamps, kind='stable')
+            timestamps, prices, quantities = timestamps[order], prices[order], quantities[order]
+        
+        # Keep the last tick for each timestamp, like index.duplicated(keep='last')
+        if len(timestamps) > 1:
+            keep = np.empty(len(timestamps), dtype=bool)
+            np.not_equal(timestamps[1:], timestamps[:-1], out=keep[:-1])
+            keep[-1] = True
+            if not keep.all():
+                timestamps, prices, quantities = timestamps[keep], prices[keep], quantities[keep]
+        
+        return TickColumns(timestamps, prices, quantities)
     
     def get_dataframe(self, symbol: str, limit: int = None) -> pd.DataFrame:
-        ticks = self.get_ticks(symbol, limit)
+        timestamps, prices, quantities = self._clean_window(symbol, limit)
         
-        if not ticks:
+        if len(timestamps) == 0:
             return pd.DataFrame()
         
-        df = pd.DataFrame(ticks)
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        df = df.set_index('timestamp')
-        df = df[~df.index.duplicated(keep='last')]
-        df = df.sort_index()
-        
-        return df
+        index = pd.DatetimeIndex(timestamps.view('datetime64[ms]'), name='timestamp')
+        return pd.DataFrame({
+            'symbol': symbol,
+            'price': pd.Series(prices, index=index, copy=False),
+            'quantity': pd.Series(quantities, index=index, copy=False)
+        }, copy=False)
     
     def get_prices(self, symbol: str, limit: int = None) -> pd.Series:
-        df = self.get_dataframe(symbol, limit)
+        timestamps, prices, _ = self._clean_window(symbol, limit)
         
-        if df.empty:
+        if len(timestamps) == 0:
             return pd.Series()
         
-        return df['price']
+        index = pd.DatetimeIndex(timestamps.view('datetime64[ms]'), name='timestamp')
+        return pd.Series(prices, index=index, name='price', copy=False)
     
     def clear(self, symbol: str = None):
         if symbol:
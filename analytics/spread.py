@@ -1,13 +1,14 @@
 import pandas as pd
 import numpy as np
-from analytics.regression import Regression
+from concurrent.futures import ProcessPoolExecutor
+from analytics.regression import Regression, rolling_regression
 from analytics.statistics import Statistics
-from analytics.stationarity import Stationarity
+from analytics.stationarity import Stationarity, AdfLagCache
 from typing import Dict, Optional
 
 class SpreadAnalytics:
     @staticmethod
-    def calculate_pair_analytics(prices_x: pd.Series, prices_y: pd.Series, 
+    def calculate_pair_analytics(prices_x: pd.Series, prices_y: pd.Series,
                                  window: int = 20) -> Dict:
         if len(prices_x) < 5 or len(prices_y) < 5:
             return {}
@@ -69,23 +70,79 @@ class SpreadAnalytics:
         return analytics
     
     @staticmethod
-    def calculate_rolling_analytics(prices_x: pd.Series, prices_y: pd.Series, 
-                                    window: int = 20) -> pd.DataFrame:
+    def calculate_rolling_analytics(prices_x: pd.Series, prices_y: pd.Series, window: int = 20,
+                                    adf_stride: Optional[int] = 1, adf_workers: int = 1,
+                                    adf_lag_refresh: int = 1) -> pd.DataFrame:
+        # calculate_pair_analytics for every trailing window at once: hedge
+        # ratio, spread moments and correlation come from rolling_regression's
+        # window sums, with the spread of window i taken at its own hedge ratio
+        # (var(y - b x) = var(y) - 2b cov(x, y) + b^2 var(x)). ADF is the only
+        # per-window fit: every adf_stride-th window (None skips it, the rest
+        # are NaN), optionally spread over adf_workers processes. With
+        # adf_lag_refresh > 1 the AIC lag search is cached across that many
+        # windows (see AdfLagCache); 1 matches calculate_pair_analytics.
         if len(prices_x) < window or len(prices_y) < window:
             return pd.DataFrame()
         
-        results = []
-        
-        for i in range(window, len(prices_x) + 1):
-            x_window = prices_x.iloc[i-window:i]
-            y_window = prices_y.iloc[i-window:i]
-            
-            analytics = SpreadAnalytics.calculate_pair_analytics(x_window, y_window, window)
-            
-            if analytics:
-                analytics['timestamp'] = prices_x.index[i-1]
-                results.append(analytics)
-        
-        if results:
-            return pd.DataFrame(results).set_index('timestamp')
-        return pd.DataFrame()
\ No newline at end of file
+        length = min(len(prices_x), len(prices_y))
+        x = prices_x.to_numpy(dtype=np.float64)[:length]
+        y = prices_y.to_numpy(dtype=np.float64)[:length]
+        stats = rolling_regression(y, x, window)
+        
+        hedge_ratio = stats['slope']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            spread_mean = stats['mean_y'] - hedge_ratio * stats['mean_x']
+            spread_var = stats['var_y'] - 2 * hedge_ratio * stats['covariance'] + hedge_ratio ** 2 * stats['var_x']
+            spread_std = np.sqrt(np.maximum(spread_var, 0.0))
+            spread_last = y[window - 1:] - hedge_ratio * x[window - 1:]
+            z_score = np.where(spread_std > 0, (spread_last - spread_mean) / spread_std, 0.0)
+        
+        keep = (stats['count'] >= 5) & ~np.isnan(hedge_ratio)
+        adf_statistic = np.full(len(hedge_ratio), np.nan)
+        adf_p_value = np.full(len(hedge_ratio), np.nan)
+        if adf_stride:
+            starts = np.flatnonzero(keep)[::adf_stride]
+            adf_statistic[starts], adf_p_value[starts] = _rolling_adf(y, x, hedge_ratio, window, starts,
+                                                                         adf_workers, adf_lag_refresh)
+        
+        results = pd.DataFrame({
+            'hedge_ratio': hedge_ratio,
+            'spread_mean': spread_mean,
+            'spread_std': spread_std,
+            'spread_last': spread_last,
+            'z_score_last': np.nan_to_num(z_score, nan=0.0, posinf=0.0, neginf=0.0),
+            'z_score_mean': spread_mean,
+            'z_score_std': spread_std,
+            'correlation': np.nan_to_num(stats['correlation'], nan=1.0),
+            'adf_statistic': adf_statistic,
+            'adf_p_value': adf_p_value,
+            'is_stationary': adf_p_value < 0.05
+        }, index=pd.Index(prices_x.index[window - 1:length], name='timestamp'))
+        results = results[keep]
+        
+        return results if len(results) else pd.DataFrame()
+
+def _adf_windows(y: np.ndarray, x: np.ndarray, hedge_ratio: np.ndarray, window: int, starts: np.ndarray,
+                 lag_refresh: int) -> tuple:
+    cache = AdfLagCache(lag_refresh)
+    statistics = np.full(len(starts), np.nan)
+    p_values = np.full(len(starts), np.nan)
+    for i, start in enumerate(starts):
+        result = cache.test(y[start:start + window] - hedge_ratio[start] * x[start:start + window])
+        statistics[i] = result.get('adf_statistic', np.nan)
+        p_values[i] = result.get('p_value', np.nan)
+    return statistics, p_values
+
+def _rolling_adf(y: np.ndarray, x: np.ndarray, hedge_ratio: np.ndarray, window: int, starts: np.ndarray,
+                 workers: int = 1, lag_refresh: int = 1) -> tuple:
+    # ADF of each window's spread; `starts` index windows by their first row
+    if workers <= 1 or len(starts) < 2 * workers:
+        return _adf_windows(y, x, hedge_ratio, window, starts, lag_refresh)
+    
+    chunks = np.array_split(starts, workers)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_adf_windows, y[chunk[0]:chunk[-1] + window], x[chunk[0]:chunk[-1] + window],
+                                   hedge_ratio[chunk[0]:chunk[-1] + 1], window, chunk - chunk[0], lag_refresh)
+                   for chunk in chunks]
+        parts = [future.result() for future in futures]
+    return np.concatenate([part[0] for part in parts]), np.concatenate([part[1] for part in parts])
\ No newline at end of file
@@ -1,33 +1,116 @@
+import math
 import pandas as pd
 import numpy as np
-from statsmodels.tsa.stattools import adfuller
 from typing import Dict, Optional
+from config.settings import ADF_LAG_REFRESH
+
+# MacKinnon (1994) p-value surface and MacKinnon (2010) critical values for the
+# ADF regression with a constant and one I(1) series, as tabulated in
+# statsmodels.tsa.adfvalues
+TAU_MAX = 2.74
+TAU_MIN = -18.83
+TAU_STAR = -1.61
+TAU_SMALLP = (2.1659, 1.4412, 0.038269)
+TAU_LARGEP = (1.7339, 0.93202, -0.12745, -0.010368)
+TAU_CRITICAL = {
+    '1%': (-3.43035, -6.5393, -16.786, -79.433),
+    '5%': (-2.86154, -2.8903, -4.234, -40.04),
+    '10%': (-2.56677, -1.5384, -2.809, 0.0)
+}
+
+def mackinnon_p_value(stat: float) -> float:
+    if stat > TAU_MAX:
+        return 1.0
+    if stat < TAU_MIN:
+        return 0.0
+    coefficients = TAU_SMALLP if stat <= TAU_STAR else TAU_LARGEP
+    z = sum(c * stat ** i for i, c in enumerate(coefficients))
+    return 0.5 * math.erfc(-z / math.sqrt(2))
+
+def mackinnon_critical_values(nobs: int) -> Dict[str, float]:
+    return {level: sum(c / nobs ** i for i, c in enumerate(coefficients))
+            for level, coefficients in TAU_CRITICAL.items()}
+
+def _adf_design(x: np.ndarray, lag: int):
+    # Rows for dx_t regressed on [1, x_{t-1}, dx_{t-1}, ..., dx_{t-lag}]
+    dx = np.diff(x)
+    nobs = len(dx) - lag
+    design = np.empty((nobs, lag + 2))
+    design[:, 0] = 1.0
+    design[:, 1] = x[lag:-1]
+    for i in range(1, lag + 1):
+        design[:, i + 1] = dx[lag - i:len(dx) - i]
+    return design, dx[lag:]
+
+def _select_lag(x: np.ndarray, maxlag: int) -> int:
+    # AIC search over 0..maxlag on the common maxlag sample, as adfuller's
+    # autolag='AIC'. One QR of [X | y] gives the residual sum of squares of
+    # every nested regression: for the first k columns it is the sum of the
+    # squared entries of R's last column from row k down.
+    design, target = _adf_design(x, maxlag)
+    nobs = len(target)
+    r = np.linalg.qr(np.column_stack((design, target)), mode='r')
+    tail = np.cumsum(r[::-1, -1] ** 2)[::-1]
+    
+    best = None
+    for lag in range(maxlag + 1):
+        ssr = tail[lag + 2]
+        aic = nobs * (math.log(2 * math.pi) + math.log(ssr / nobs) + 1) + 2 * (lag + 2)
+        if best is None or aic < best[0]:
+            best = (aic, lag)
+    return best[1]
+
+def adf(x: np.ndarray, maxlag: Optional[int] = None, lag: Optional[int] = None) -> tuple:
+    # (statistic, p-value, used lag, nobs, critical values) of the ADF test with
+    # a constant; with `lag` the regression uses that many lagged differences,
+    # otherwise the lag is chosen by AIC up to maxlag (adfuller's default)
+    x = np.asarray(x, dtype=np.float64)
+    if x.max() == x.min():
+        raise ValueError("Invalid input, x is constant")
+    
+    limit = len(x) // 2 - 2
+    if lag is None:
+        if maxlag is None:
+            maxlag = min(int(math.ceil(12.0 * (len(x) / 100.0) ** 0.25)), limit)
+        if maxlag < 0 or maxlag > limit:
+            raise ValueError(f"maxlag must be between 0 and {limit}")
+        lag = _select_lag(x, maxlag)
+    elif lag < 0 or lag > limit:
+        raise ValueError(f"lag must be between 0 and {limit}")
+    
+    design, target = _adf_design(x, lag)
+    nobs = len(target)
+    q, r = np.linalg.qr(design)
+    coefficients = np.linalg.solve(r, q.T @ target)
+    residual = target - design @ coefficients
+    sigma2 = residual @ residual / (nobs - design.shape[1])
+    r_inv = np.linalg.inv(r)
+    stat = float(coefficients[1] / math.sqrt(sigma2 * (r_inv[1] @ r_inv[1])))
+    
+    return stat, mackinnon_p_value(stat), lag, nobs, mackinnon_critical_values(nobs)
 
 class Stationarity:
     @staticmethod
-    def adf_test(series: pd.Series, maxlag: Optional[int] = None) -> Dict:
+    def adf_test(series: pd.Series, maxlag: Optional[int] = None, lag: Optional[int] = None) -> Dict:
         if len(series) < 10:
             return {}
         
-        series_clean = series.replace([np.inf, -np.inf], np.nan).dropna()
+        values = np.asarray(series, dtype=np.float64)
+        values = values[np.isfinite(values)]
         
-        if len(series_clean) < 10:
+        if len(values) < 10:
             return {}
         
         try:
-            result = adfuller(series_clean, maxlag=maxlag, autolag='AIC')
+            stat, p_value, used_lag, nobs, critical_values = adf(values, maxlag, lag)
             
             return {
-                'adf_statistic': float(result[0]),
-                'p_value': float(result[1]),
-                'used_lag': int(result[2]),
-                'n_obs': int(result[3]),
-                'critical_values': {
-                    '1%': float(result[4]['1%']),
-                    '5%': float(result[4]['5%']),
-                    '10%': float(result[4]['10%'])
-                },
-                'is_stationary': result[1] < 0.05
+                'adf_statistic': stat,
+                'p_value': p_value,
+                'used_lag': used_lag,
+                'n_obs': nobs,
+                'critical_values': critical_values,
+                'is_stationary': p_value < 0.05
             }
         except Exception as e:
             return {'error': str(e)}
@@ -37,4 +120,30 @@ class Stationarity:
         result = Stationarity.adf_test(series)
         if 'p_value' in result:
             return result['p_value'] < significance_level
-        return False
\ No newline at end of file
+        return False
+
+# Lag selection is most of the cost of an ADF test. For repeated tests on a
+# moving window the lag chosen by AIC changes rarely, so the search is re-run
+# every `refresh` calls and the regressions in between reuse the cached lag.
+class AdfLagCache:
+    def __init__(self, refresh: int = ADF_LAG_REFRESH, maxlag: Optional[int] = None):
+        self.refresh = max(refresh, 1)
+        self.maxlag = maxlag
+        self.lag = None
+        self.calls = 0
+        self.searches = 0
+    
+    def test(self, series) -> Dict:
+        cached = self.lag is not None and self.calls % self.refresh != 0
+        self.calls += 1
+        
+        if cached:
+            result = Stationarity.adf_test(series, lag=self.lag)
+            if 'error' not in result:
+                return result
+        
+        result = Stationarity.adf_test(series, maxlag=self.maxlag)
+        self.searches += 1
+        if 'used_lag' in result:
+            self.lag = result['used_lag']
+        return result
\ No newline at end of file
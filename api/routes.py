@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from storage.database import get_db
-from storage.repository import TickRepository, ResampledRepository, AnalyticsRepository, AlertRepository
+from fastapi import APIRouter, Depends, HTTPException, Response
+from storage.database import get_async_read_db, ReadSessionLocal, db_slots
+from storage.repository import AlertRepository
+from storage.async_repository import (
+    AsyncTickRepository, AsyncResampledRepository, AsyncAnalyticsRepository, AsyncAlertRepository
+)
 from api.schemas import (
-    TickResponse, ResampledBarResponse, AnalyticsResponse, 
+    TickResponse, ResampledBarResponse, AnalyticsResponse,
     AlertCreate, AlertResponse, AnalyticsRequest
 )
 from typing import List
+import pandas as pd
+import asyncio
 import time
 
 router = APIRouter()
@@ -18,8 +22,13 @@ def set_analytics_app(app):
     global _analytics_app
     _analytics_app = app
 
+def _records(frame: pd.DataFrame) -> Response:
+    # Serialized straight from the columns; returning a Response skips the
+    # per-row response_model validation (NaN becomes null)
+    return Response(content=frame.to_json(orient='records'), media_type='application/json')
+
 @router.get("/", response_model=dict)
-def root_status():
+async def root_status():
     """Root status endpoint for dashboard connection check"""
     if not _analytics_app:
         return {"status": "initializing", "websocket_stats": {}, "buffer_status": {}}
@@ -28,31 +37,61 @@ def root_status():
         "status": "running",
         "symbols": _analytics_app.symbols,
         "websocket_stats": _analytics_app.ws_client.get_stats() if _analytics_app.ws_client else {},
-        "buffer_status": {symbol: len(_analytics_app.rolling_buffer.get_ticks(symbol)) 
-                         for symbol in _analytics_app.symbols}
+        "buffer_status": _analytics_app.rolling_buffer.get_sizes(),
+        "flush_status": _analytics_app.tick_handler.get_stats() if not _analytics_app.journal else {},
+        "storage_writer": _analytics_app.storage_writer.get_stats(),
+        "bar_builder": _analytics_app.bar_builder.get_stats(),
+        "bar_samplers": {key: sampler.get_stats() for key, sampler in _analytics_app.bar_samplers.items()},
+        "pair_state": _analytics_app.pair_state.get_stats() if _analytics_app.pair_state else None,
+        "simulator_stats": _analytics_app.simulator.get_stats() if _analytics_app.simulator else None
     }
 
 @router.get("/ticks/{symbol}", response_model=List[TickResponse])
-def get_ticks(symbol: str, limit: int = 1000, db: Session = Depends(get_db)):
-    ticks = TickRepository.get_recent_ticks(db, symbol, limit)
-    return ticks
+async def get_ticks(symbol: str, limit: int = 1000, db=Depends(get_async_read_db)):
+    return _records(await AsyncTickRepository.get_recent_ticks_frame(db, symbol, limit))
+
+@router.get("/bars/{symbol}", response_model=List[ResampledBarResponse])
+async def get_bars_at_resolution(symbol: str, start_time: int, end_time: int, resolution_ms: int = 1000,
+                                 db=Depends(get_async_read_db)):
+    """Bars from the coarsest stored tier at least as fine as resolution_ms"""
+    archive = _analytics_app.archive if _analytics_app else None
+    _, bars = await AsyncResampledRepository.get_bars_at_resolution(db, symbol.upper(), start_time, end_time,
+                                                                    resolution_ms, archive)
+    return _records(bars)
 
 @router.get("/bars/{symbol}/{timeframe}", response_model=List[ResampledBarResponse])
-def get_bars(symbol: str, timeframe: str, limit: int = 500, db: Session = Depends(get_db)):
-    bars = ResampledRepository.get_recent_bars(db, symbol, timeframe, limit)
-    return bars
+async def get_bars(symbol: str, timeframe: str, limit: int = 500, db=Depends(get_async_read_db)):
+    return _records(await AsyncResampledRepository.get_recent_bars_frame(db, symbol, timeframe, limit))
+
+@router.get("/bars/{symbol}/{timeframe}/open", response_model=List[ResampledBarResponse])
+async def get_open_bar(symbol: str, timeframe: str):
+    """Provisional still-open bar, updated with every tick until it closes"""
+    if not _analytics_app:
+        return []
+    sampler = _analytics_app.bar_samplers.get(timeframe)
+    if sampler is not None:
+        return sampler.get_open_bars(symbol.upper())
+    return _analytics_app.bar_builder.get_open_bars(symbol.upper(), timeframe)
+
+@router.get("/analytics/{symbol_x}/{symbol_y}", response_model=List[AnalyticsResponse])
+async def get_analytics_at_resolution(symbol_x: str, symbol_y: str, start_time: int, end_time: int,
+                                      resolution_ms: int = 1000, db=Depends(get_async_read_db)):
+    """Analytics snapshots from the coarsest stored tier at least as fine as resolution_ms"""
+    _, analytics = await AsyncAnalyticsRepository.get_analytics_at_resolution(db, symbol_x, symbol_y, start_time,
+                                                                              end_time, resolution_ms)
+    return _records(analytics)
 
 @router.get("/analytics/{symbol_x}/{symbol_y}/{timeframe}", response_model=List[AnalyticsResponse])
-def get_analytics(symbol_x: str, symbol_y: str, timeframe: str, 
-                 limit: int = 100, db: Session = Depends(get_db)):
-    analytics = AnalyticsRepository.get_recent_analytics(db, symbol_x, symbol_y, timeframe, limit)
-    return analytics
+async def get_analytics(symbol_x: str, symbol_y: str, timeframe: str,
+                        limit: int = 100, db=Depends(get_async_read_db)):
+    analytics = await AsyncAnalyticsRepository.get_recent_analytics_frame(db, symbol_x, symbol_y, timeframe, limit)
+    return _records(analytics)
 
 @router.get("/analytics-debug/{symbol_x}/{symbol_y}")
-def get_analytics_debug(symbol_x: str, symbol_y: str, db: Session = Depends(get_db)):
+async def get_analytics_debug(symbol_x: str, symbol_y: str, db=Depends(get_async_read_db)):
     """Debug endpoint to check what analytics are stored"""
     try:
-        analytics_tick = AnalyticsRepository.get_recent_analytics(db, symbol_x, symbol_y, 'tick', limit=5)
+        analytics_tick = await AsyncAnalyticsRepository.get_recent_analytics(db, symbol_x, symbol_y, 'tick', limit=5)
         return {
             "status": "success",
             "symbol_x": symbol_x,
@@ -66,27 +105,89 @@ def get_analytics_debug(symbol_x: str, symbol_y: str, db: Session = Depends(get_
             "error": str(e)
         }
 
+def _query_engine():
+    if not _analytics_app or not _analytics_app.query_engine:
+        raise HTTPException(status_code=503, detail="Query engine is not available")
+    return _analytics_app.query_engine
+
+def _run_query(load, load_args: tuple, aggregate, aggregate_args: tuple) -> pd.DataFrame:
+    # Load and aggregation both run on the worker thread, over a sync
+    # read-only session: the row fetch, frame building and archive reads
+    # would otherwise stall the event loop for large ranges
+    db = ReadSessionLocal.session_factory()
+    try:
+        frame = load(db, *load_args)
+    finally:
+        db.close()
+    return aggregate(frame, *aggregate_args)
+
+async def _query(load, load_args: tuple, aggregate, *aggregate_args) -> Response:
+    try:
+        async with db_slots:
+            result = await asyncio.to_thread(_run_query, load, load_args, aggregate, aggregate_args)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _records(result)
+
+@router.get("/query/ohlcv/{symbol}")
+async def query_ohlcv(symbol: str, start_time: int, end_time: int, bucket_ms: int = 60000):
+    """OHLCV, VWAP and trade count per bucket, aggregated from raw ticks"""
+    engine = _query_engine()
+    return await _query(engine.load_ticks, (symbol.upper(), start_time, end_time), engine.ohlcv, bucket_ms)
+
+@router.get("/query/volume-profile/{symbol}")
+async def query_volume_profile(symbol: str, start_time: int, end_time: int, price_step: float = 1.0):
+    """Traded volume per price level of width price_step"""
+    engine = _query_engine()
+    return await _query(engine.load_ticks, (symbol.upper(), start_time, end_time), engine.volume_profile,
+                        price_step)
+
+@router.get("/query/volatility/{symbol}/{timeframe}")
+async def query_volatility(symbol: str, timeframe: str, start_time: int, end_time: int, bucket_ms: int = 3600000):
+    """Realized volatility of bar log returns per bucket"""
+    engine = _query_engine()
+    return await _query(engine.load_bars, (symbol.upper(), timeframe, start_time, end_time), engine.volatility,
+                        bucket_ms)
+
+@router.get("/query/zscore/{symbol_x}/{symbol_y}")
+async def query_zscore_distribution(symbol_x: str, symbol_y: str, start_time: int, end_time: int,
+                                    timeframe: str = 'tick', bucket_ms: int = 3600000, threshold: float = 2.0):
+    """Z-score distribution per bucket: moments, quantiles and share beyond threshold"""
+    engine = _query_engine()
+    return await _query(engine.load_analytics, (symbol_x, symbol_y, timeframe, start_time, end_time),
+                        engine.zscore_distribution, bucket_ms, threshold)
+
+async def _write(method, *args):
+    # Writes run on the storage writer thread, the only writer connection
+    if not _analytics_app or not _analytics_app.storage_writer.running:
+        raise HTTPException(status_code=503, detail="Storage writer is not available")
+    return await asyncio.wrap_future(_analytics_app.storage_writer.submit_call(method, *args))
+
 @router.post("/alerts", response_model=AlertResponse)
-def create_alert(alert: AlertCreate, db: Session = Depends(get_db)):
-    new_alert = AlertRepository.create_alert(db, alert.metric, alert.condition, alert.threshold)
+async def create_alert(alert: AlertCreate):
+    new_alert = await _write(AlertRepository.create_alert, alert.metric, alert.condition, alert.threshold)
     return new_alert
 
 @router.get("/alerts", response_model=List[AlertResponse])
-def get_alerts(db: Session = Depends(get_db)):
-    alerts = AlertRepository.get_active_alerts(db)
+async def get_alerts(db=Depends(get_async_read_db)):
+    alerts = await AsyncAlertRepository.get_active_alerts(db)
     return alerts
 
 @router.delete("/alerts/{alert_id}")
-def delete_alert(alert_id: int, db: Session = Depends(get_db)):
-    AlertRepository.delete_alert(db, alert_id)
+async def delete_alert(alert_id: int):
+    await _write(AlertRepository.delete_alert, alert_id)
     return {"status": "deleted"}
 
 @router.get("/health")
-def health_check():
-    return {"status": "healthy", "timestamp": int(time.time() * 1000)}
+async def health_check():
+    health = {"status": "healthy", "timestamp": int(time.time() * 1000)}
+    if _analytics_app:
+        # Commits that failed and batches the storage writer gave up on
+        health["storage_writer"] = _analytics_app.storage_writer.get_errors()
+    return health
 
 @router.get("/status")
-def system_status():
+async def system_status():
     return {
         "status": "operational",
         "timestamp": int(time.time() * 1000),
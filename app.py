@@ -3,20 +3,33 @@ import logging
 import time
 import subprocess
 import os
+from typing import List
 from fastapi import FastAPI
 import uvicorn
-from storage.database import init_db, SessionLocal
-from storage.repository import TickRepository, ResampledRepository, AnalyticsRepository, AlertRepository
-from ingestion.binance_ws import BinanceWebSocket
+from storage.database import init_db, SessionLocal, ReadSessionLocal
+from storage.repository import TickRepository, AlertRepository
+from storage.writer import StorageWriter
+from storage.journal import TickJournal
+from storage.archive import TickArchive
+from storage.rollups import run_rollups
+from storage.query_engine import QueryEngine
+from ingestion.connection_manager import ConnectionManager
+from ingestion.decoder import Trade
 from ingestion.tick_handler import TickHandler
-from analytics.resampler import Resampler
+from ingestion.simulator import BinanceSimulator, make_symbols
+from analytics.bar_builder import BarBuilder
+from analytics.bar_sampler import BarSampler
 from analytics.rolling import RollingBuffer
-from analytics.spread import SpreadAnalytics
+from analytics.pair_state import PairState
 from alerts.engine import AlertEngine
 from api.routes import router, set_analytics_app
 from config.settings import (
-    DEFAULT_SYMBOLS, TIMEFRAMES, DEFAULT_ROLLING_WINDOW,
-    API_HOST, API_PORT, ANALYTICS_INTERVAL, DASHBOARD_PORT
+    DEFAULT_SYMBOLS, TIMEFRAMES, BAR_SAMPLERS,
+    API_HOST, API_PORT, ANALYTICS_INTERVAL, RESAMPLER_INTERVAL, DASHBOARD_PORT,
+    BINANCE_WS_URL, WS_RECORD_PATH, SIMULATOR_ENABLED, SIMULATOR_HOST, SIMULATOR_PORT,
+    SIMULATOR_RATE, SIMULATOR_NUM_SYMBOLS, SIMULATOR_REPLAY_PATH, SIMULATOR_REPLAY_SPEED,
+    TICK_RETENTION_DAYS, RETENTION_INTERVAL, ARCHIVE_ENABLED, ARCHIVE_INTERVAL, ROLLUP_INTERVAL, JOURNAL_ENABLED,
+    QUERY_ENGINE_ENABLED
 )
 
 logging.basicConfig(
@@ -31,14 +44,40 @@ app.include_router(router, prefix="/api/v1")
 dashboard_process = None
 
 class QuantAnalyticsApp:
-    def __init__(self, symbols=None):
+    def __init__(self, symbols=None, use_simulator: bool = SIMULATOR_ENABLED):
         self.symbols = symbols or DEFAULT_SYMBOLS
-        self.tick_handler = TickHandler()
+        self.use_simulator = use_simulator
+        if use_simulator and SIMULATOR_NUM_SYMBOLS:
+            self.symbols = make_symbols(SIMULATOR_NUM_SYMBOLS, self.symbols)
         self.rolling_buffer = RollingBuffer()
+        self.bar_builder = BarBuilder(TIMEFRAMES)
+        self.bar_samplers = {key: BarSampler(key) for key in BAR_SAMPLERS}
+        self.pair_state = PairState(self.symbols[0], self.symbols[1]) if len(self.symbols) >= 2 else None
+        # With the journal, ticks are durable once journaled (per JOURNAL_FSYNC)
+        # and the storage writer follows the journal; otherwise TickHandler
+        # hands them to the writer from the rolling buffer
+        self.journal = TickJournal() if JOURNAL_ENABLED else None
+        self.storage_writer = StorageWriter(journal=self.journal)
+        self.tick_handler = TickHandler(self.rolling_buffer, self.storage_writer)
         self.alert_engine = AlertEngine()
         self.ws_client = None
+        self.simulator = None
+        self.archive = None
+        self.query_engine = None
         self.running = False
         
+        if ARCHIVE_ENABLED:
+            try:
+                self.archive = TickArchive()
+            except ValueError as e:
+                logger.error(f"Archive disabled: {e}")
+        
+        if QUERY_ENGINE_ENABLED:
+            try:
+                self.query_engine = QueryEngine(self.archive)
+            except ValueError as e:
+                logger.error(f"Query engine disabled: {e}")
+        
         init_db()
         logger.info("Database initialized")
         
@@ -49,120 +88,168 @@ class QuantAnalyticsApp:
     
     async def start(self):
         self.running = True
+        ws_url = BINANCE_WS_URL
+        
+        if self.use_simulator:
+            self.simulator = BinanceSimulator(
+                symbols=self.symbols,
+                host=SIMULATOR_HOST,
+                port=SIMULATOR_PORT,
+                rate=SIMULATOR_RATE,
+                replay_path=SIMULATOR_REPLAY_PATH,
+                replay_speed=SIMULATOR_REPLAY_SPEED
+            )
+            await self.simulator.start()
+            ws_url = self.simulator.url
         
-        self.ws_client = BinanceWebSocket(
+        self.ws_client = ConnectionManager(
             symbols=self.symbols,
-            callback=self.on_tick
+            callback=self.on_tick,
+            batch_callback=self.on_ticks,
+            base_url=ws_url,
+            record_path=WS_RECORD_PATH
         )
         
-        await self.tick_handler.start()
+        self.storage_writer.start()
+        if not self.journal:
+            await self.tick_handler.start()
         
         asyncio.create_task(self.ws_client.connect())
         asyncio.create_task(self.resampling_loop())
         asyncio.create_task(self.analytics_loop())
+        asyncio.create_task(self.rollup_loop())
+        if TICK_RETENTION_DAYS > 0:
+            asyncio.create_task(self.retention_loop())
+        if self.archive:
+            asyncio.create_task(self.archive_loop())
         
         logger.info(f"Application started for symbols: {self.symbols}")
     
-    async def on_tick(self, tick: dict):
-        await self.tick_handler.handle_tick(tick)
-        self.rolling_buffer.add_tick(tick['symbol'], tick)
+    async def on_tick(self, tick: Trade):
+        await self.on_ticks([tick])
+    
+    async def on_ticks(self, ticks: List[Trade]):
+        if self.journal:
+            appended = self.journal.append(ticks)
+            if self.journal.fsync == 'always':
+                # The fsync runs on the journal's sync thread
+                await self.journal.synced_to(appended)
+            self.rolling_buffer.add_ticks(ticks)
+        else:
+            # Stores the ticks in the rolling buffer and flushes from there
+            await self.tick_handler.handle_ticks(ticks)
+        self.bar_builder.add_ticks(ticks)
+        for sampler in self.bar_samplers.values():
+            sampler.add_ticks(ticks)
+        if self.pair_state:
+            self.pair_state.add_ticks(ticks)
     
     async def resampling_loop(self):
-        logger.info("Resampling loop starting in 10 seconds...")
-        await asyncio.sleep(10)
-        
+        # Bars are built incrementally in on_ticks; this only hands the ones
+        # that have closed since the last pass to the storage writer
         while self.running:
             try:
-                await asyncio.sleep(5)
+                await asyncio.sleep(RESAMPLER_INTERVAL)
                 
-                for symbol in self.symbols:
-                    ticks = self.rolling_buffer.get_ticks(symbol, limit=5000)
-                    
-                    if len(ticks) < 10:
-                        logger.debug(f"Not enough ticks for {symbol}: {len(ticks)}")
-                        continue
-                    
-                    db = SessionLocal()
-                    
-                    for timeframe in TIMEFRAMES:
-                        try:
-                            bars = Resampler.resample_ticks(ticks, timeframe)
-                            
-                            if bars and len(bars) > 0:
-                                ResampledRepository.bulk_insert_bars(db, bars)
-                                logger.info(f"✓ Resampled {len(bars)} bars for {symbol} {timeframe}")
-                        except Exception as e:
-                            logger.error(f"Resampling error for {symbol} {timeframe}: {e}")
-                    
-                    db.close()
+                self.bar_builder.expire()
+                closed = self.bar_builder.drain()
+                for sampler in self.bar_samplers.values():
+                    closed.extend(sampler.drain())
+                if closed:
+                    self.storage_writer.submit_bars([bar.as_row() for bar in closed])
+                    logger.debug(f"✓ Queued {len(closed)} closed bars")
             
             except Exception as e:
                 logger.error(f"Error in resampling loop: {e}")
     
+    async def rollup_loop(self):
+        while self.running:
+            await asyncio.sleep(ROLLUP_INTERVAL)
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self.run_rollups)
+            except Exception as e:
+                logger.error(f"Error in rollup loop: {e}")
+    
+    def run_rollups(self):
+        db = SessionLocal()
+        read_db = ReadSessionLocal()
+        try:
+            run_rollups(db, read_db)
+        finally:
+            read_db.close()
+            db.close()
+    
+    async def retention_loop(self):
+        while self.running:
+            try:
+                # Dropping a large table frees its pages synchronously, so keep it off the event loop
+                await asyncio.get_running_loop().run_in_executor(None, self.drop_expired_partitions)
+            except Exception as e:
+                logger.error(f"Error in retention loop: {e}")
+            
+            await asyncio.sleep(RETENTION_INTERVAL)
+    
+    def drop_expired_partitions(self):
+        db = SessionLocal()
+        try:
+            TickRepository.drop_expired_partitions(db, TICK_RETENTION_DAYS)
+        finally:
+            db.close()
+    
+    async def archive_loop(self):
+        while self.running:
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self.seal_archive)
+            except Exception as e:
+                logger.error(f"Error in archive loop: {e}")
+            
+            await asyncio.sleep(ARCHIVE_INTERVAL)
+    
+    def seal_archive(self):
+        db = SessionLocal()
+        read_db = ReadSessionLocal()
+        try:
+            self.archive.seal(db, read_db=read_db)
+        finally:
+            read_db.close()
+            db.close()
+    
     async def analytics_loop(self):
         logger.info("Analytics loop starting in 5 seconds...")
         await asyncio.sleep(5)
         
         while self.running:
             try:
-                await asyncio.sleep(1.0)  # Run every 1 second instead of 500ms
-                
-                if len(self.symbols) < 2:
-                    continue
-                
-                symbol_x = self.symbols[0]
-                symbol_y = self.symbols[1]
-                
-                prices_x = self.rolling_buffer.get_prices(symbol_x, limit=1000)
-                prices_y = self.rolling_buffer.get_prices(symbol_y, limit=1000)
+                await asyncio.sleep(ANALYTICS_INTERVAL)
                 
-                if len(prices_x) < 10 or len(prices_y) < 10:
+                if not self.pair_state or not self.pair_state.ready:
                     continue
                 
-                # Remove duplicates
-                prices_x = prices_x[~prices_x.index.duplicated(keep='last')]
-                prices_y = prices_y[~prices_y.index.duplicated(keep='last')]
+                symbol_x = self.pair_state.symbol_x
+                symbol_y = self.pair_state.symbol_y
                 
-                # Use recent data for calculation
-                prices_x = prices_x.iloc[-200:]
-                prices_y = prices_y.iloc[-200:]
-                
-                # Calculate with adaptive window size
-                window = min(DEFAULT_ROLLING_WINDOW, len(prices_x) // 2)
-                if window < 5:
-                    continue
-                
-                analytics = SpreadAnalytics.calculate_pair_analytics(
-                    prices_x, prices_y, window
-                )
+                # Hedge ratio, z-score and correlation are kept current per
+                # tick; only the ADF refresh has a cost here, every PAIR_ADF_INTERVAL
+                self.pair_state.refresh_adf()
+                analytics = self.pair_state.snapshot()
                 
                 if analytics and (analytics.get('z_score_last') is not None or analytics.get('correlation') is not None):
-                    try:
-                        db = SessionLocal()
-                        
-                        AnalyticsRepository.insert_analytics(
-                            db=db,
-                            symbol_x=symbol_x,
-                            symbol_y=symbol_y,
-                            timeframe='tick',
-                            hedge_ratio=analytics.get('hedge_ratio'),
-                            spread=analytics.get('spread_last'),
-                            z_score=analytics.get('z_score_last'),
-                            rolling_corr=analytics.get('correlation'),
-                            adf_stat=analytics.get('adf_statistic'),
-                            p_value=analytics.get('adf_p_value'),
-                            computed_at=int(time.time() * 1000)
-                        )
-                        
-                        db.close()
-                        self.alert_engine.check_alerts(analytics)
-                        logger.debug(f"✓ Analytics saved: Z={analytics.get('z_score_last'):.2f}, Corr={analytics.get('correlation'):.2f}")
-                    except Exception as db_error:
-                        logger.error(f"Database error saving analytics: {db_error}")
-                        try:
-                            db.close()
-                        except:
-                            pass
+                    # Written by the storage writer thread, in ANALYTICS_COLUMNS order
+                    self.storage_writer.submit_analytics([(
+                        symbol_x,
+                        symbol_y,
+                        'tick',
+                        analytics.get('hedge_ratio'),
+                        analytics.get('spread_last'),
+                        analytics.get('z_score_last'),
+                        analytics.get('correlation'),
+                        analytics.get('adf_statistic'),
+                        analytics.get('adf_p_value'),
+                        int(time.time() * 1000)
+                    )])
+                    
+                    self.alert_engine.check_alerts(analytics)
+                    logger.debug(f"✓ Analytics queued: Z={analytics.get('z_score_last'):.2f}, Corr={analytics.get('correlation'):.2f}")
             
             except Exception as e:
                 logger.error(f"Error in analytics loop: {e}")
@@ -173,7 +260,19 @@ class QuantAnalyticsApp:
         if self.ws_client:
             await self.ws_client.stop()
         
-        await self.tick_handler.stop()
+        if self.simulator:
+            await self.simulator.stop()
+        
+        loop = asyncio.get_running_loop()
+        if self.journal:
+            await loop.run_in_executor(None, self.journal.sync)
+        else:
+            await self.tick_handler.stop()
+        await loop.run_in_executor(None, self.storage_writer.stop)
+        if self.journal:
+            await loop.run_in_executor(None, self.journal.close)
+        if self.query_engine:
+            self.query_engine.close()
         
         logger.info("Application stopped")
 
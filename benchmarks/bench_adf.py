@@ -0,0 +1,44 @@
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from statsmodels.tsa.stattools import adfuller
+
+from analytics.stationarity import AdfLagCache, adf
+
+SIZES = (200, 1000, 5000)
+TRIALS = 50
+
+def per_call(fn, trials=TRIALS):
+    start = time.perf_counter()
+    for _ in range(trials):
+        fn()
+    return (time.perf_counter() - start) / trials * 1000
+
+def main():
+    warnings.simplefilter('ignore', FutureWarning)
+    rng = np.random.default_rng(0)
+    print("ADF with a constant, per-call milliseconds")
+    print(f"{'points':>8}{'statsmodels':>14}{'numpy AIC':>12}{'fixed lag':>12}{'lag cache':>12}{'max |dstat|':>14}")
+    
+    for n in SIZES:
+        x = 100 + np.cumsum(rng.standard_normal(n))
+        cache = AdfLagCache()
+        series = pd.Series(x)
+        
+        expected = adfuller(x, autolag='AIC')
+        result = adf(x)
+        error = abs(expected[0] - result[0])
+        
+        print(f"{n:>8}{per_call(lambda: adfuller(x, autolag='AIC'), 10):>14.2f}{per_call(lambda: adf(x)):>12.3f}"
+              f"{per_call(lambda: adf(x, lag=result[2])):>12.3f}{per_call(lambda: cache.test(series)):>12.3f}"
+              f"{error:>14.1e}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,120 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SYMBOL = 'BTCUSDT'
+TICKS = 200_000
+BARS = 20_000
+DURATION = float(os.getenv("BENCH_SECONDS", "8"))
+CLIENTS = [int(n) for n in os.getenv("BENCH_CLIENTS", "50,200,500").split(",")]
+PATHS = (f"/api/v1/bars/{SYMBOL}/1s?limit=100", f"/api/v1/ticks/{SYMBOL}?limit=100")
+
+def seed(database_url):
+    os.environ["DATABASE_URL"] = database_url
+    from storage.database import init_db, SessionLocal
+    from storage.repository import TickRepository, ResampledRepository
+    init_db()
+    db = SessionLocal()
+    now = int(time.time() * 1000)
+    rng = np.random.default_rng(0)
+    prices = (65000 + np.cumsum(rng.standard_normal(TICKS))).tolist()
+    TickRepository.insert_tick_rows(db, [(now - TICKS + i, SYMBOL, p, 0.01) for i, p in enumerate(prices)])
+    ResampledRepository.upsert_bars(db, [(SYMBOL, '1s', (now // 1000 - BARS + i) * 1000, p, p, p, p, 1.0)
+                                         for i, p in enumerate(prices[:BARS])])
+    db.close()
+
+def serve(mode, port):
+    # sync: the previous def handlers on FastAPI's threadpool; async: api.routes
+    import uvicorn
+    from fastapi import Depends, FastAPI
+    from storage.database import SessionLocal, get_read_db
+    from storage.repository import TickRepository, ResampledRepository
+    from api.routes import router, _records
+    
+    app = FastAPI()
+    if mode == 'sync':
+        @app.get("/api/v1/bars/{symbol}/{timeframe}")
+        def get_bars(symbol: str, timeframe: str, limit: int = 500, db=Depends(get_read_db)):
+            return _records(ResampledRepository.get_recent_bars_frame(db, symbol, timeframe, limit))
+        
+        @app.get("/api/v1/ticks/{symbol}")
+        def get_ticks(symbol: str, limit: int = 1000, db=Depends(get_read_db)):
+            return _records(TickRepository.get_recent_ticks_frame(db, symbol, limit))
+    else:
+        app.include_router(router, prefix="/api/v1")
+    
+    def ingest():
+        # Background tick writes, as from the storage writer
+        db = SessionLocal()
+        while True:
+            now = int(time.time() * 1000)
+            TickRepository.insert_tick_rows(db, [(now, SYMBOL, 65000.0, 0.01)] * 500)
+            time.sleep(0.02)
+    
+    threading.Thread(target=ingest, daemon=True).start()
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+async def load(port, clients):
+    import httpx
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + DURATION
+    
+    async def client(index, http):
+        nonlocal errors
+        path = PATHS[index % len(PATHS)]
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await http.get(path)
+                if response.status_code != 200:
+                    errors += 1
+                    continue
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+    
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as http:
+        await asyncio.gather(*(client(i, http) for i in range(clients)))
+    
+    latencies = np.array(latencies) * 1000
+    return len(latencies) / DURATION, np.percentile(latencies, 50), np.percentile(latencies, 99), errors
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--serve':
+        serve(sys.argv[2], int(sys.argv[3]))
+        return
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        seed(database_url)
+        print(f"{TICKS:,} ticks and {BARS:,} bars, ingest writes running; {DURATION:.0f}s per run")
+        print(f"{'handlers':<22}{'clients':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        
+        runs = (('sync', 'sync', '1'), ('async (aiosqlite)', 'async', '1'), ('async (thread)', 'async', '0'))
+        for port, (label, mode, async_enabled) in enumerate(runs, start=18100):
+            env = {**os.environ, "DATABASE_URL": database_url, "DB_ASYNC_ENABLED": async_enabled,
+                   "JOURNAL_PATH": os.path.join(tmp, 'journal')}
+            server = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve', mode, str(port)],
+                                      env=env, cwd=tmp)
+            try:
+                time.sleep(3)
+                for clients in CLIENTS:
+                    rate, p50, p99, errors = asyncio.run(load(port, clients))
+                    print(f"{label:<22}{clients:>8}{rate:>10,.0f}{p50:>10.1f}{p99:>10.1f}{errors:>8}")
+            finally:
+                server.terminate()
+                server.wait()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
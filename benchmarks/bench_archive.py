@@ -0,0 +1,68 @@
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.orm import sessionmaker
+
+from storage.archive import TickArchive, load_ticks
+from storage.database import create_engines
+from storage.models import Base
+from storage.repository import TickRepository
+
+DAYS = 5
+TICKS_PER_DAY = 400_000
+DAY_MS = 86_400_000
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, _ = create_engines(f"sqlite:///{os.path.join(tmp, 'bench.db')}", separate_reader=False)
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        
+        first_day = int(time.time() * 1000) // DAY_MS - DAYS - 2
+        rng = np.random.default_rng(0)
+        for day in range(first_day, first_day + DAYS):
+            timestamps = np.sort(rng.integers(day * DAY_MS, (day + 1) * DAY_MS, TICKS_PER_DAY))
+            TickRepository.insert_tick_rows(db, list(zip(timestamps.tolist(), ['BTCUSDT'] * TICKS_PER_DAY,
+                                                         (65000 + rng.standard_normal(TICKS_PER_DAY)).tolist(),
+                                                         rng.random(TICKS_PER_DAY).tolist())))
+        
+        start, end = first_day * DAY_MS, (first_day + DAYS) * DAY_MS - 1
+        n = DAYS * TICKS_PER_DAY
+        print(f"{n:,} ticks over {DAYS} days, one symbol")
+        print(f"{'read path':<28}{'seconds':>10}{'rows/s':>14}")
+        
+        elapsed, rows = timed(lambda: TickRepository.get_ticks(db, 'BTCUSDT', start, end))
+        print(f"{'sqlite get_ticks (rows)':<28}{elapsed:>10.2f}{len(rows) / elapsed:>14,.0f}")
+        
+        for compression in ('zstd', 'none'):
+            archive = TickArchive(os.path.join(tmp, f"archive-{compression}"), compression)
+            if compression == 'zstd':
+                elapsed, sealed = timed(lambda: archive.seal_ticks(db, hot_days=1))
+                print(f"{'seal to archive':<28}{elapsed:>10.2f}{sealed / elapsed:>14,.0f}")
+            else:
+                # Re-seal the same days uncompressed from the zstd copy
+                for day in range(first_day, first_day + DAYS):
+                    columns = TickArchive(os.path.join(tmp, 'archive-zstd')).read_ticks('BTCUSDT', day * DAY_MS,
+                                                                                      (day + 1) * DAY_MS - 1)
+                    archive._write(archive.tick_path('BTCUSDT', day), columns, [])
+            
+            elapsed, columns = timed(lambda: archive.read_ticks('BTCUSDT', start, end))
+            print(f"{'archive read (' + compression + ')':<28}{elapsed:>10.2f}{len(columns['timestamp']) / elapsed:>14,.0f}")
+        
+        elapsed, frame = timed(lambda: load_ticks(db, 'BTCUSDT', start, end, archive))
+        print(f"{'load_ticks hot+cold frame':<28}{elapsed:>10.2f}{len(frame) / elapsed:>14,.0f}")
+        db.close()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
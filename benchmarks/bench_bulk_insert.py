@@ -0,0 +1,54 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from storage.models import Base, ResampledData
+from storage.repository import TickRepository, ResampledRepository
+
+N_ROWS = 200_000
+
+def make_session(path):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+def orm_insert_bars(db, bars):
+    # The per-object path the Core upsert replaced
+    db.bulk_save_objects([ResampledData(**bar) for bar in bars])
+    db.commit()
+
+def rate(tmp, name, fn, rows):
+    # A fresh database per run: bar keys are unique, so runs cannot share one
+    db = make_session(os.path.join(tmp, f"{name}.db"))
+    start = time.perf_counter()
+    fn(db, rows)
+    elapsed = time.perf_counter() - start
+    db.close()
+    return len(rows) / elapsed
+
+def main():
+    base_ts = 1_700_000_000_000
+    tick_rows = [(base_ts + i, 'BTCUSDT', 65000.0 + (i % 97) * 0.5, 0.001 * (i % 13 + 1)) for i in range(N_ROWS)]
+    tick_dicts = [dict(zip(('timestamp', 'symbol', 'price', 'quantity'), row)) for row in tick_rows]
+    bar_rows = [('BTCUSDT', '1s', base_ts + i * 1000, 1.0, 2.0, 0.5, 1.5, 10.0) for i in range(N_ROWS)]
+    bar_dicts = [dict(zip(('symbol', 'timeframe', 'start_time', 'open', 'high', 'low', 'close', 'volume'), row))
+                 for row in bar_rows]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{N_ROWS:,} rows per run, one commit per run")
+        print(f"{'':<10}{'ORM (rows/s)':>16}{'Core (rows/s)':>16}")
+        print(f"{'ticks':<10}"
+              f"{rate(tmp, 'ticks_orm', TickRepository.bulk_insert_ticks, tick_dicts):>16,.0f}"
+              f"{rate(tmp, 'ticks_core', TickRepository.insert_tick_rows, tick_rows):>16,.0f}")
+        print(f"{'bars':<10}"
+              f"{rate(tmp, 'bars_orm', orm_insert_bars, bar_dicts):>16,.0f}"
+              f"{rate(tmp, 'bars_core', ResampledRepository.upsert_bars, bar_rows):>16,.0f}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,73 @@
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.orm import sessionmaker
+
+from storage.database import create_engines
+from storage.models import Base, Analytics
+from storage.repository import TickRepository, ResampledRepository, AnalyticsRepository, insert_rows, ANALYTICS_COLUMNS
+
+ROWS = 1_000_000
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+def report(label, elapsed, n):
+    print(f"{label:<34}{elapsed:>10.2f}{n / elapsed:>14,.0f}")
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, _ = create_engines(f"sqlite:///{os.path.join(tmp, 'bench.db')}", separate_reader=False)
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        
+        # 1M ticks over ~12 days of 1s steps, 1M 1s bars and 1M analytics rows
+        start = int(time.time() * 1000) // 1000 * 1000 - ROWS * 1000
+        rng = np.random.default_rng(0)
+        timestamps = start + np.arange(ROWS, dtype=np.int64) * 1000
+        prices = (65000 + np.cumsum(rng.standard_normal(ROWS))).tolist()
+        TickRepository.insert_tick_rows(db, list(zip(timestamps.tolist(), ['BTCUSDT'] * ROWS, prices,
+                                                     rng.random(ROWS).tolist())))
+        ResampledRepository.upsert_bars(db, [('BTCUSDT', '1s', t, p, p + 1, p - 1, p, 1.0)
+                                        for t, p in zip(timestamps.tolist(), prices)])
+        insert_rows(db, Analytics.__table__, ANALYTICS_COLUMNS, [
+            ('BTCUSDT', 'ETHUSDT', 'tick', 1.0, p, 0.5, 0.9, None, None, t)
+            for t, p in zip(timestamps.tolist(), prices)
+        ])
+        db.commit()
+        
+        end = start + ROWS * 1000
+        print(f"{ROWS:,} rows per table, one symbol")
+        print(f"{'read path':<34}{'seconds':>10}{'rows/s':>14}")
+        
+        elapsed, rows = timed(lambda: TickRepository.get_ticks(db, 'BTCUSDT', start, end))
+        report('get_ticks (Row objects)', elapsed, len(rows))
+        elapsed, frame = timed(lambda: TickRepository.get_ticks_frame(db, 'BTCUSDT', start, end))
+        report('get_ticks_frame', elapsed, len(frame))
+        
+        db.expunge_all()
+        elapsed, bars = timed(lambda: ResampledRepository.get_bars(db, 'BTCUSDT', '1s', start, end))
+        report('get_bars (ORM)', elapsed, len(bars))
+        db.expunge_all()
+        elapsed, frame = timed(lambda: ResampledRepository.get_bars_frame(db, 'BTCUSDT', '1s', start, end))
+        report('get_bars_frame', elapsed, len(frame))
+        
+        elapsed, analytics = timed(lambda: AnalyticsRepository.get_analytics(db, 'BTCUSDT', 'ETHUSDT', 'tick',
+                                                                             start, end))
+        report('get_analytics (ORM)', elapsed, len(analytics))
+        db.expunge_all()
+        elapsed, frame = timed(lambda: AnalyticsRepository.get_analytics_frame(db, 'BTCUSDT', 'ETHUSDT', 'tick',
+                                                                               start, end))
+        report('get_analytics_frame', elapsed, len(frame))
+        db.close()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,71 @@
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingestion.decoder import TradeDecoder, msgspec, orjson
+from ingestion.simulator import BinanceSimulator, make_symbols
+
+N_MESSAGES = 200_000
+BATCH_SIZE = 64
+
+def make_frames(n: int):
+    symbols = make_symbols(20, ['BTCUSDT', 'ETHUSDT'])
+    simulator = BinanceSimulator(symbols, seed=42)
+    base_ts = int(time.time() * 1000)
+    return [simulator.synthetic_frame(simulator.random.choice(symbols), base_ts + i) for i in range(n)]
+
+async def legacy_path(frames):
+    # Mirrors the original per-message BinanceWebSocket.process_message
+    buffers = {}
+    async def callback(tick):
+        pass
+    
+    for message in frames:
+        data = json.loads(message)
+        trade_data = data['data']
+        symbol = trade_data['s']
+        tick = {
+            'timestamp': trade_data['T'],
+            'symbol': symbol,
+            'price': float(trade_data['p']),
+            'quantity': float(trade_data['q'])
+        }
+        buffers.setdefault(symbol, deque(maxlen=10000)).append(tick)
+        await callback(tick)
+
+async def batched_path(frames, backend: str):
+    decoder = TradeDecoder(backend)
+    buffers = {}
+    async def batch_callback(trades):
+        pass
+    
+    for i in range(0, len(frames), BATCH_SIZE):
+        trades = decoder.decode_batch(frames[i:i + BATCH_SIZE])
+        for trade in trades:
+            buffers.setdefault(trade.symbol, deque(maxlen=10000)).append(trade)
+        await batch_callback(trades)
+
+def run(name, coro_factory, frames):
+    start = time.perf_counter()
+    asyncio.run(coro_factory(frames))
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28} {len(frames) / elapsed:>12,.0f} msgs/sec/core")
+
+def main():
+    frames = make_frames(N_MESSAGES)
+    print(f"{N_MESSAGES:,} trade frames, batch size {BATCH_SIZE}")
+    
+    run("legacy json + dict", legacy_path, frames)
+    run("batched json", lambda f: batched_path(f, 'json'), frames)
+    if orjson is not None:
+        run("batched orjson", lambda f: batched_path(f, 'orjson'), frames)
+    if msgspec is not None:
+        run("batched msgspec", lambda f: batched_path(f, 'msgspec'), frames)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
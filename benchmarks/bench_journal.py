@@ -0,0 +1,71 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.orm import sessionmaker
+
+from ingestion.decoder import Trade
+from storage.database import create_engines
+from storage.journal import TickJournal
+from storage.models import Base
+from storage.repository import TickRepository
+
+BATCHES = 2000
+BATCH_SIZE = 50
+
+def report(label, samples):
+    samples = np.array(samples) * 1e6
+    print(f"{label:<30}{np.percentile(samples, 50):>10.0f}{np.percentile(samples, 99):>10.0f}{samples.max():>12.0f}")
+
+def main():
+    now = int(time.time() * 1000)
+    batches = [[Trade(now + i, 'BTCUSDT', 65000.0 + j, 0.01) for j in range(BATCH_SIZE)] for i in range(BATCHES)]
+    print(f"{BATCHES:,} batches of {BATCH_SIZE} ticks, per-batch latency in microseconds")
+    print(f"{'path':<30}{'p50':>10}{'p99':>10}{'max':>12}")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ('none', 'interval', 'always'):
+            journal = TickJournal(os.path.join(tmp, f"journal-{mode}"), fsync=mode, fsync_interval=0.1)
+            samples = []
+            for batch in batches:
+                started = time.perf_counter()
+                journal.append(batch)
+                samples.append(time.perf_counter() - started)
+            journal.close()
+            report(f"journal append ({mode})", samples)
+        
+        # What an 'always' caller waits for: the append plus the sync thread's
+        # fsync, off the event loop
+        journal = TickJournal(os.path.join(tmp, "journal-durable"), fsync='always')
+        samples = []
+        
+        async def durable():
+            for batch in batches:
+                started = time.perf_counter()
+                await journal.synced_to(journal.append(batch))
+                samples.append(time.perf_counter() - started)
+        
+        asyncio.run(durable())
+        journal.close()
+        report("journal append + fsync wait", samples)
+        
+        engine, _ = create_engines(f"sqlite:///{os.path.join(tmp, 'bench.db')}", separate_reader=False)
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        samples = []
+        for batch in batches:
+            rows = [(tick.timestamp, tick.symbol, tick.price, tick.quantity) for tick in batch]
+            started = time.perf_counter()
+            TickRepository.insert_tick_rows(db, rows)
+            samples.append(time.perf_counter() - started)
+        db.close()
+        report('sqlite insert + commit', samples)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque, defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics.rolling import RollingBuffer
+from ingestion.decoder import Trade
+
+TICKS_PER_SYMBOL = 10000
+SYMBOLS = ['BTCUSDT', 'ETHUSDT', 'BNBUSDT', 'SOLUSDT']
+
+def make_ticks():
+    base_ts = int(time.time() * 1000)
+    return [(base_ts + i, SYMBOLS[i % len(SYMBOLS)], 100.0 + i * 1e-3, 0.01 + i * 1e-6)
+            for i in range(TICKS_PER_SYMBOL * len(SYMBOLS))]
+
+def measure(name, build, rows):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    holder = build(rows)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    
+    total = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    print(f"{name:<36} {total / len(SYMBOLS) / 1024:>10,.1f} KiB/symbol "
+          f"({total / len(rows):,.0f} bytes/tick)")
+    return holder
+
+def three_buffers(rows):
+    # Original layout: BinanceWebSocket.buffer, RollingBuffer.buffers and
+    # TickHandler.buffer (up to one batch) each holding every tick dict
+    ws_buffer = {symbol: deque(maxlen=10000) for symbol in SYMBOLS}
+    rolling = {symbol: deque(maxlen=10000) for symbol in SYMBOLS}
+    pending = defaultdict(list)
+    for timestamp, symbol, price, quantity in rows:
+        tick = {'timestamp': timestamp, 'symbol': symbol, 'price': price, 'quantity': quantity}
+        ws_buffer[symbol].append(tick)
+        rolling[symbol].append(tick)
+        pending[symbol].append(tick)
+        if len(pending[symbol]) >= 100:
+            pending[symbol].clear()
+    return ws_buffer, rolling, pending
+
+def shared_store(rows):
+    store = RollingBuffer()
+    store.add_ticks([Trade(*row) for row in rows])
+    return store
+
+def store_and_flush_lists(rows):
+    # RollingBuffer plus a per-symbol list of Trade tuples waiting for the
+    # writer, as a separate flush buffer holds them while the writer is behind
+    store = RollingBuffer()
+    pending = defaultdict(list)
+    ticks = [Trade(*row) for row in rows]
+    store.add_ticks(ticks)
+    for tick in ticks:
+        pending[tick.symbol].append(tick)
+    return store, pending
+
+def main():
+    rows = make_ticks()
+    print(f"{TICKS_PER_SYMBOL:,} ticks x {len(SYMBOLS)} symbols")
+    measure("three buffers of tick dicts", three_buffers, rows)
+    measure("RollingBuffer + flush lists", store_and_flush_lists, rows)
+    measure("shared RollingBuffer store", shared_store, rows)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
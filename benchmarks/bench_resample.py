@@ -0,0 +1,85 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics.resampler import Resampler
+
+TIMEFRAMES = ['1s', '1m', '5m']
+SIZES = [1_000_000, 10_000_000, 100_000_000]
+# Inputs above this are resampled in chunks that end on a 5m boundary, the
+# way a multi-day reprocess would run day by day; no bar spans two chunks
+CHUNK_TICKS = 10_000_000
+TICKS_PER_SECOND = 200
+LEGACY_MAX_TICKS = 10_000_000
+
+def make_ticks(n: int, start_ms: int, seed: int):
+    rng = np.random.default_rng(seed)
+    timestamps = start_ms + np.sort(rng.integers(0, n * 1000 // TICKS_PER_SECOND, n))
+    prices = 65000.0 + rng.standard_normal(n).cumsum()
+    quantities = rng.random(n)
+    return timestamps, prices, quantities
+
+def legacy_resample(timestamps, prices, quantities, timeframe):
+    # Mirrors the original Resampler.resample_ticks after DataFrame construction
+    df = pd.DataFrame({'timestamp': pd.to_datetime(timestamps, unit='ms'), 'price': prices, 'quantity': quantities})
+    df = df.set_index('timestamp').sort_index()
+    resampled = df['price'].resample(Resampler.TIMEFRAMES[timeframe]).agg({
+        'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last'
+    })
+    resampled['volume'] = df['quantity'].resample(Resampler.TIMEFRAMES[timeframe]).sum()
+    resampled = resampled.dropna()
+    
+    rows = []
+    for idx, row in resampled.iterrows():
+        rows.append(('BTCUSDT', timeframe, int(idx.timestamp() * 1000), float(row['open']), float(row['high']),
+                     float(row['low']), float(row['close']), float(row['volume'])))
+    return rows
+
+def run_vectorized(n: int):
+    chunk_span = CHUNK_TICKS * 1000 // TICKS_PER_SECOND
+    chunk_span -= chunk_span % 300_000
+    elapsed = 0.0
+    bars = 0
+    done = 0
+    start_ms = 1_700_000_100_000 - 1_700_000_100_000 % 300_000
+    
+    for i in range((n + CHUNK_TICKS - 1) // CHUNK_TICKS):
+        count = min(CHUNK_TICKS, n - done)
+        timestamps, prices, quantities = make_ticks(count, start_ms + i * chunk_span, seed=i)
+        timestamps = np.minimum(timestamps, start_ms + (i + 1) * chunk_span - 1)
+        
+        started = time.perf_counter()
+        result = Resampler.resample_arrays(timestamps, prices, quantities, TIMEFRAMES)
+        rows = [bars.to_rows('BTCUSDT', timeframe) for timeframe, bars in result.items()]
+        elapsed += time.perf_counter() - started
+        
+        bars += sum(len(r) for r in rows)
+        done += count
+        del timestamps, prices, quantities, result, rows
+    
+    return elapsed, bars
+
+def run_legacy(n: int):
+    timestamps, prices, quantities = make_ticks(n, 1_700_000_100_000, seed=0)
+    started = time.perf_counter()
+    bars = sum(len(legacy_resample(timestamps, prices, quantities, timeframe)) for timeframe in TIMEFRAMES)
+    return time.perf_counter() - started, bars
+
+def main():
+    sizes = [int(float(arg)) for arg in sys.argv[1:]] or SIZES
+    print(f"{', '.join(TIMEFRAMES)} bars to insert-ready rows, {TICKS_PER_SECOND} ticks/s of market time")
+    print(f"{'ticks':>12}{'bars':>12}{'legacy s':>12}{'vector s':>12}{'Mticks/s':>12}{'speedup':>10}")
+    
+    for n in sizes:
+        elapsed, bars = run_vectorized(n)
+        legacy = run_legacy(n)[0] if n <= LEGACY_MAX_TICKS else None
+        print(f"{n:>12,}{bars:>12,}{legacy if legacy is not None else float('nan'):>12.2f}{elapsed:>12.2f}"
+              f"{n / elapsed / 1e6:>12.1f}{(legacy / elapsed) if legacy else float('nan'):>10.1f}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics.spread import SpreadAnalytics
+
+WINDOW = 100
+LOOP_POINTS = 1_000
+SIZES = (10_000, 100_000, 1_000_000)
+
+def prices(n, rng):
+    index = pd.date_range('2024-01-01', periods=n, freq='s')
+    x = 65000 + np.cumsum(rng.standard_normal(n))
+    y = 3400 + 0.05 * x + 0.3 * np.cumsum(rng.standard_normal(n))
+    return pd.Series(x, index=index), pd.Series(y, index=index)
+
+def loop_analytics(prices_x, prices_y, window):
+    # The previous calculate_rolling_analytics: the full pair analytics per window
+    results = []
+    for i in range(window, len(prices_x) + 1):
+        analytics = SpreadAnalytics.calculate_pair_analytics(prices_x.iloc[i-window:i], prices_y.iloc[i-window:i], window)
+        if analytics:
+            analytics['timestamp'] = prices_x.index[i-1]
+            results.append(analytics)
+    return pd.DataFrame(results).set_index('timestamp')
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+def report(label, n, elapsed, windows):
+    print(f"{label:<30}{n:>12,}{elapsed:>10.2f}{windows / elapsed:>14,.0f}")
+
+def main():
+    warnings.simplefilter('ignore', FutureWarning)
+    rng = np.random.default_rng(0)
+    print(f"rolling pair analytics, window {WINDOW}")
+    print(f"{'method':<30}{'points':>12}{'seconds':>10}{'windows/s':>14}")
+    
+    prices_x, prices_y = prices(LOOP_POINTS, rng)
+    elapsed, expected = timed(lambda: loop_analytics(prices_x, prices_y, WINDOW))
+    report('per-window loop', LOOP_POINTS, elapsed, len(expected))
+    elapsed, result = timed(lambda: SpreadAnalytics.calculate_rolling_analytics(prices_x, prices_y, WINDOW))
+    report('vectorized, ADF every window', LOOP_POINTS, elapsed, len(result))
+    error = np.max(np.abs(result['z_score_last'] - expected['z_score_last']))
+    print(f"  max |z-score difference| {error:.1e}")
+    
+    for n in SIZES:
+        prices_x, prices_y = prices(n, rng)
+        if n <= 100_000:
+            elapsed, result = timed(lambda: SpreadAnalytics.calculate_rolling_analytics(
+                prices_x, prices_y, WINDOW, adf_stride=WINDOW))
+            report(f'vectorized, ADF every {WINDOW}th', n, elapsed, len(result))
+        elapsed, result = timed(lambda: SpreadAnalytics.calculate_rolling_analytics(
+            prices_x, prices_y, WINDOW, adf_stride=None))
+        report('vectorized, no ADF', n, elapsed, len(result))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
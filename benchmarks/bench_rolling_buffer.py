@@ -0,0 +1,82 @@
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics.rolling import RollingBuffer
+from ingestion.decoder import Trade
+
+N_TICKS = 10000
+REPEAT = 200
+
+class DequeBuffer:
+    # The original dict-per-tick RollingBuffer, kept here as the baseline
+    def __init__(self, maxlen: int = 10000):
+        self.buffers = {}
+        self.maxlen = maxlen
+    
+    def add_tick(self, symbol, tick):
+        self.buffers.setdefault(symbol, deque(maxlen=self.maxlen)).append(tick)
+    
+    def get_prices(self, symbol, limit=None):
+        ticks = list(self.buffers[symbol])[-limit:]
+        df = pd.DataFrame(ticks)
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        df = df.set_index('timestamp')
+        df = df[~df.index.duplicated(keep='last')]
+        return df.sort_index()['price']
+
+def make_ticks():
+    base_ts = int(time.time() * 1000)
+    return [Trade(base_ts + i, 'BTCUSDT', 65000.0 + (i % 97) * 0.5, 0.001 * (i % 13 + 1)) for i in range(N_TICKS)]
+
+def timed(fn, repeat=REPEAT):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+def memory(build):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    holder = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    return sum(stat.size_diff for stat in after.compare_to(before, 'filename')), holder
+
+def main():
+    ticks = make_ticks()
+    
+    def build_legacy():
+        buffer = DequeBuffer()
+        for tick in ticks:
+            buffer.add_tick(tick.symbol, {'timestamp': tick.timestamp, 'symbol': tick.symbol,
+                                          'price': tick.price, 'quantity': tick.quantity})
+        return buffer
+    
+    def build_ring():
+        buffer = RollingBuffer()
+        for tick in ticks:
+            buffer.add_tick(tick.symbol, tick)
+        return buffer
+    
+    legacy_bytes, legacy = memory(build_legacy)
+    ring_bytes, ring = memory(build_ring)
+    
+    print(f"{N_TICKS:,} ticks for one symbol")
+    print(f"{'':<28}{'deque of dicts':>16}{'numpy ring':>16}")
+    print(f"{'memory (KiB/symbol)':<28}{legacy_bytes / 1024:>16,.0f}{ring_bytes / 1024:>16,.0f}")
+    print(f"{'append (us/tick)':<28}{timed(build_legacy, 5) / N_TICKS:>16.2f}{timed(build_ring, 5) / N_TICKS:>16.2f}")
+    for limit in (1000, 5000):
+        print(f"{f'get_prices({limit}) (us)':<28}"
+              f"{timed(lambda: legacy.get_prices('BTCUSDT', limit)):>16,.0f}"
+              f"{timed(lambda: ring.get_prices('BTCUSDT', limit)):>16,.0f}")
+    print(f"{'get_arrays(1000) (us)':<28}{'':>16}{timed(lambda: ring.get_arrays('BTCUSDT', 1000), 10000):>16.2f}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
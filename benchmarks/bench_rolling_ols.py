@@ -0,0 +1,59 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics.regression import Regression, rolling_regression
+
+WINDOW = 200
+LOOP_POINTS = 2_000
+SIZES = (100_000, 1_000_000, 10_000_000)
+
+def prices(n, rng):
+    x = 65000 + np.cumsum(rng.standard_normal(n))
+    y = 3400 + 0.05 * x + 0.3 * np.cumsum(rng.standard_normal(n))
+    return y, x
+
+def loop_ols(y: pd.Series, x: pd.Series, window: int) -> pd.DataFrame:
+    # The previous rolling_ols: one statsmodels fit per window
+    results = []
+    for i in range(window, len(y) + 1):
+        result = Regression.ols_regression(y.iloc[i-window:i], x.iloc[i-window:i])
+        if result:
+            results.append({'timestamp': y.index[i-1], 'hedge_ratio': result['slope'],
+                            'intercept': result['intercept'], 'r_squared': result['r_squared']})
+    return pd.DataFrame(results).set_index('timestamp')
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"rolling OLS, window {WINDOW}")
+    print(f"{'method':<28}{'points':>12}{'seconds':>10}{'windows/s':>14}")
+    
+    y, x = prices(LOOP_POINTS, rng)
+    y, x = pd.Series(y), pd.Series(x)
+    start = time.perf_counter()
+    expected = loop_ols(y, x, WINDOW)
+    elapsed = time.perf_counter() - start
+    print(f"{'statsmodels per window':<28}{LOOP_POINTS:>12,}{elapsed:>10.2f}{len(expected) / elapsed:>14,.0f}")
+    
+    start = time.perf_counter()
+    result = Regression.rolling_ols(y, x, WINDOW)
+    elapsed = time.perf_counter() - start
+    print(f"{'running sums (rolling_ols)':<28}{LOOP_POINTS:>12,}{elapsed:>10.2f}{len(result) / elapsed:>14,.0f}")
+    for column in ('hedge_ratio', 'intercept', 'r_squared'):
+        error = np.max(np.abs(result[column] - expected[column]) / np.abs(expected[column]))
+        print(f"  max relative error {column:<12}{error:.1e}")
+    
+    for n in SIZES:
+        y, x = prices(n, rng)
+        start = time.perf_counter()
+        rolling_regression(y, x, WINDOW)
+        elapsed = time.perf_counter() - start
+        print(f"{'running sums':<28}{n:>12,}{elapsed:>10.2f}{(n - WINDOW + 1) / elapsed:>14,.0f}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
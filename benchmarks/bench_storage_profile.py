@@ -0,0 +1,97 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.orm import sessionmaker
+
+from storage.database import create_engines
+from storage.models import Base
+from storage.repository import TickRepository
+
+DURATION = 5.0
+BATCH_ROWS = 2000
+N_READERS = 4
+SYMBOLS = ['BTCUSDT', 'ETHUSDT', 'SOLUSDT', 'BNBUSDT']
+
+PROFILES = {
+    # SQLite's own defaults: rollback journal, full sync, readers and writer on one pool
+    'default': dict(pragmas={}, separate_reader=False),
+    'tuned': dict(pragmas=None, separate_reader=True)
+}
+
+def writer_loop(Session, stop, result):
+    db = Session()
+    ts = 1_700_000_000_000
+    rows = 0
+    while not stop.is_set():
+        batch = [(ts + i, SYMBOLS[i % len(SYMBOLS)], 65000.0 + (i % 97) * 0.5, 0.01) for i in range(BATCH_ROWS)]
+        try:
+            TickRepository.insert_tick_rows(db, batch)
+            rows += len(batch)
+            ts += BATCH_ROWS
+        except Exception:
+            db.rollback()
+            result['write_errors'] += 1
+    db.close()
+    result['rows'] = rows
+
+def reader_loop(Session, stop, latencies, result):
+    i = 0
+    while not stop.is_set():
+        db = Session()
+        start = time.perf_counter()
+        try:
+            TickRepository.get_recent_ticks(db, SYMBOLS[i % len(SYMBOLS)], limit=100)
+            latencies.append(time.perf_counter() - start)
+        except Exception:
+            result['read_errors'] += 1
+        finally:
+            db.close()
+        i += 1
+
+def run(name, pragmas, separate_reader):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, read_engine = create_engines(f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                                             pragmas=pragmas, separate_reader=separate_reader)
+        Base.metadata.create_all(bind=engine)
+        WriteSession = sessionmaker(bind=engine)
+        ReadSession = sessionmaker(bind=read_engine)
+        
+        stop = threading.Event()
+        result = {'rows': 0, 'write_errors': 0, 'read_errors': 0}
+        latencies = [[] for _ in range(N_READERS)]
+        threads = [threading.Thread(target=writer_loop, args=(WriteSession, stop, result))]
+        threads += [threading.Thread(target=reader_loop, args=(ReadSession, stop, latencies[i], result))
+                    for i in range(N_READERS)]
+        
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(DURATION)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        
+        engine.dispose()
+        read_engine.dispose()
+    
+    reads = np.array([x for chunk in latencies for x in chunk]) * 1000
+    p50, p99 = np.percentile(reads, [50, 99]) if len(reads) else (float('nan'), float('nan'))
+    print(f"{name:<10}{result['rows'] / elapsed:>14,.0f}{len(reads) / elapsed:>12,.0f}"
+          f"{p50:>10.2f}{p99:>10.2f}{result['write_errors'] + result['read_errors']:>9}")
+
+def main():
+    print(f"1 writer ({BATCH_ROWS} rows/commit) + {N_READERS} readers (last 100 ticks), {DURATION:.0f}s each")
+    print(f"{'profile':<10}{'write rows/s':>14}{'reads/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'errors':>9}")
+    for name, profile in PROFILES.items():
+        run(name, **profile)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -2,22 +2,136 @@ import os
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///data/market_data.db")
 
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "8"))
+
+# Async API routes: aiosqlite connections per read pool, and requests allowed
+# to hold a database session at once (the rest wait without taking a thread)
+DB_ASYNC_ENABLED = os.getenv("DB_ASYNC_ENABLED", "1") == "1"
+DB_ASYNC_READ_POOL_SIZE = int(os.getenv("DB_ASYNC_READ_POOL_SIZE", "8"))
+API_DB_CONCURRENCY = int(os.getenv("API_DB_CONCURRENCY", "64"))
+
 DEFAULT_SYMBOLS = ["BTCUSDT", "ETHUSDT"]
 
+BINANCE_WS_URL = os.getenv("BINANCE_WS_URL", "wss://stream.binance.com:9443")
+
+WS_RECORD_PATH = os.getenv("WS_RECORD_PATH")
+
+WS_DECODER = os.getenv("WS_DECODER", "auto")
+
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "50000"))
+INGEST_QUEUE_POLICY = os.getenv("INGEST_QUEUE_POLICY", "block")
+INGEST_BATCH_MAX = int(os.getenv("INGEST_BATCH_MAX", "5000"))
+
+WS_MAX_STREAMS_PER_CONNECTION = int(os.getenv("WS_MAX_STREAMS_PER_CONNECTION", "200"))
+WS_NUM_CONNECTIONS = int(os.getenv("WS_NUM_CONNECTIONS", "0"))
+
+SIMULATOR_ENABLED = os.getenv("SIMULATOR_ENABLED", "0") == "1"
+SIMULATOR_HOST = os.getenv("SIMULATOR_HOST", "127.0.0.1")
+SIMULATOR_PORT = int(os.getenv("SIMULATOR_PORT", "8765"))
+SIMULATOR_RATE = float(os.getenv("SIMULATOR_RATE", "1000"))
+SIMULATOR_NUM_SYMBOLS = int(os.getenv("SIMULATOR_NUM_SYMBOLS", "0"))
+SIMULATOR_REPLAY_PATH = os.getenv("SIMULATOR_REPLAY_PATH")
+SIMULATOR_REPLAY_SPEED = float(os.getenv("SIMULATOR_REPLAY_SPEED", "1.0"))
+
 TICK_BUFFER_SIZE = 10000
 
 BATCH_SIZE = 100
 
 FLUSH_INTERVAL = 1.0
 
-RESAMPLER_INTERVAL = 5.0
+WRITER_MAX_PENDING_ROWS = int(os.getenv("WRITER_MAX_PENDING_ROWS", "200000"))
+WRITER_MAX_GROUP_ROWS = int(os.getenv("WRITER_MAX_GROUP_ROWS", "50000"))
+# A batch that still fails after this many retries (with doubling delays) is
+# written to the dead-letter file as JSON lines and skipped
+WRITER_MAX_RETRIES = int(os.getenv("WRITER_MAX_RETRIES", "5"))
+WRITER_RETRY_MAX_DELAY = float(os.getenv("WRITER_RETRY_MAX_DELAY", "30"))
+WRITER_DEAD_LETTER_PATH = os.getenv("WRITER_DEAD_LETTER_PATH", "data/dead_letter.jsonl")
+
+# Binary tick journal the storage writer tails into SQLite; fsync 'always', 'interval' or 'none'
+JOURNAL_ENABLED = os.getenv("JOURNAL_ENABLED", "1") == "1"
+JOURNAL_PATH = os.getenv("JOURNAL_PATH", "data/journal")
+JOURNAL_SEGMENT_BYTES = int(os.getenv("JOURNAL_SEGMENT_BYTES", str(64 * 1024 * 1024)))
+JOURNAL_FSYNC = os.getenv("JOURNAL_FSYNC", "interval")
+JOURNAL_FSYNC_INTERVAL = float(os.getenv("JOURNAL_FSYNC_INTERVAL", "1.0"))
+
+# Tick tables: 'day' (ticks_YYYYMMDD), 'day_symbol' (ticks_YYYYMMDD_btcusdt) or 'none'
+TICK_PARTITIONING = os.getenv("TICK_PARTITIONING", "day")
+TICK_RETENTION_DAYS = int(os.getenv("TICK_RETENTION_DAYS", "0"))
+RETENTION_INTERVAL = float(os.getenv("RETENTION_INTERVAL", "3600"))
+
+# Cold tier: ticks and bars older than ARCHIVE_HOT_DAYS move to Arrow IPC files (needs pyarrow)
+ARCHIVE_ENABLED = os.getenv("ARCHIVE_ENABLED", "0") == "1"
+ARCHIVE_PATH = os.getenv("ARCHIVE_PATH", "data/archive")
+ARCHIVE_COMPRESSION = os.getenv("ARCHIVE_COMPRESSION", "zstd")
+ARCHIVE_HOT_DAYS = int(os.getenv("ARCHIVE_HOT_DAYS", "2"))
+ARCHIVE_INTERVAL = float(os.getenv("ARCHIVE_INTERVAL", "3600"))
+
+# Embedded DuckDB engine behind /api/v1/query/... (needs duckdb)
+QUERY_ENGINE_ENABLED = os.getenv("QUERY_ENGINE_ENABLED", "1") == "1"
+QUERY_ENGINE_THREADS = int(os.getenv("QUERY_ENGINE_THREADS", "2"))
+QUERY_ENGINE_MEMORY_LIMIT = os.getenv("QUERY_ENGINE_MEMORY_LIMIT", "1GB")
+QUERY_MAX_RANGE_DAYS = float(os.getenv("QUERY_MAX_RANGE_DAYS", "31"))
+
+RESAMPLER_INTERVAL = 1.0
+
+BAR_GRACE_MS = int(os.getenv("BAR_GRACE_MS", "2000"))
 
 ANALYTICS_INTERVAL = 1.0
 
 TIMEFRAMES = ['1s', '1m', '5m']
 
+TIMEFRAME_MS = {
+    '1s': 1000,
+    '1m': 60 * 1000,
+    '5m': 5 * 60 * 1000,
+    '1h': 60 * 60 * 1000
+}
+
+# Scheduled rollups (source tier -> coarser tier). Targets are tiers the live
+# BarBuilder does not build (TIMEFRAMES), so every tier has one writer
+BAR_ROLLUPS = [('1m', '1h')]
+ANALYTICS_ROLLUPS = [('tick', '1m'), ('1m', '1h')]
+ROLLUP_INTERVAL = float(os.getenv("ROLLUP_INTERVAL", "60"))
+ROLLUP_DELAY_MS = int(os.getenv("ROLLUP_DELAY_MS", "10000"))
+
+# Retention per tier in days, 0 keeps the tier forever
+BAR_TTL_DAYS = {
+    '1s': float(os.getenv("BAR_TTL_1S_DAYS", "2")),
+    '1m': float(os.getenv("BAR_TTL_1M_DAYS", "30")),
+    '5m': float(os.getenv("BAR_TTL_5M_DAYS", "30")),
+    '1h': float(os.getenv("BAR_TTL_1H_DAYS", "0"))
+}
+BAR_SAMPLER_TTL_DAYS = float(os.getenv("BAR_SAMPLER_TTL_DAYS", "7"))
+ANALYTICS_TTL_DAYS = {
+    'tick': float(os.getenv("ANALYTICS_TTL_TICK_DAYS", "2")),
+    '1m': float(os.getenv("ANALYTICS_TTL_1M_DAYS", "30")),
+    '1h': float(os.getenv("ANALYTICS_TTL_1H_DAYS", "0"))
+}
+
+# Information-driven bars: tick_<count>, volume_<base qty>, dollar_<quote value>
+BAR_SAMPLERS = [key for key in os.getenv("BAR_SAMPLERS", "tick_100,volume_10,dollar_1000000").split(",") if key]
+
 DEFAULT_ROLLING_WINDOW = 20
 
+# Streaming pair analytics: samples in the hedge-ratio regression, and ADF refresh period in seconds
+PAIR_REGRESSION_WINDOW = int(os.getenv("PAIR_REGRESSION_WINDOW", "200"))
+PAIR_ADF_INTERVAL = float(os.getenv("PAIR_ADF_INTERVAL", "10"))
+
+# Pair samples: 'grid' (last prices every PAIR_ALIGNMENT_INTERVAL_MS) or 'union' (every tick time);
+# samples with a price older than PAIR_MAX_STALENESS_MS are skipped (0 keeps them)
+PAIR_ALIGNMENT = os.getenv("PAIR_ALIGNMENT", "grid")
+PAIR_ALIGNMENT_INTERVAL_MS = int(os.getenv("PAIR_ALIGNMENT_INTERVAL_MS", "100"))
+PAIR_MAX_STALENESS_MS = int(os.getenv("PAIR_MAX_STALENESS_MS", "5000"))
+
+# ADF tests on a moving window re-run the AIC lag search every ADF_LAG_REFRESH tests
+ADF_LAG_REFRESH = int(os.getenv("ADF_LAG_REFRESH", "20"))
+
 API_HOST = "0.0.0.0"
 API_PORT = 8000
 
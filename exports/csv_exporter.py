@@ -1,65 +1,45 @@
 import pandas as pd
 import os
-from typing import List
+from typing import List, Sequence, Union
 from storage.models import Tick, ResampledData, Analytics
 
+def _to_frame(records: Union[pd.DataFrame, List], columns: Sequence[str]) -> pd.DataFrame:
+    # Frames from the repositories' *_frame methods are written as they are;
+    # lists of ORM rows are still accepted
+    if isinstance(records, pd.DataFrame):
+        return records
+    return pd.DataFrame({column: [getattr(record, column) for record in records] for column in columns})
+
 class CSVExporter:
     @staticmethod
-    def export_ticks(ticks: List[Tick], filename: str) -> str:
+    def export_ticks(ticks: Union[pd.DataFrame, List[Tick]], filename: str) -> str:
         os.makedirs('exports', exist_ok=True)
         
-        data = [{
-            'timestamp': tick.timestamp,
-            'symbol': tick.symbol,
-            'price': tick.price,
-            'quantity': tick.quantity
-        } for tick in ticks]
-        
-        df = pd.DataFrame(data)
+        columns = ['timestamp', 'symbol', 'price', 'quantity']
+        df = _to_frame(ticks, columns)[columns]
         filepath = os.path.join('exports', filename)
         df.to_csv(filepath, index=False)
         
         return filepath
     
     @staticmethod
-    def export_resampled(bars: List[ResampledData], filename: str) -> str:
+    def export_resampled(bars: Union[pd.DataFrame, List[ResampledData]], filename: str) -> str:
         os.makedirs('exports', exist_ok=True)
         
-        data = [{
-            'timestamp': bar.start_time,
-            'symbol': bar.symbol,
-            'timeframe': bar.timeframe,
-            'open': bar.open,
-            'high': bar.high,
-            'low': bar.low,
-            'close': bar.close,
-            'volume': bar.volume
-        } for bar in bars]
-        
-        df = pd.DataFrame(data)
+        columns = ['start_time', 'symbol', 'timeframe', 'open', 'high', 'low', 'close', 'volume']
+        df = _to_frame(bars, columns)[columns].rename(columns={'start_time': 'timestamp'})
         filepath = os.path.join('exports', filename)
         df.to_csv(filepath, index=False)
         
         return filepath
     
     @staticmethod
-    def export_analytics(analytics: List[Analytics], filename: str) -> str:
+    def export_analytics(analytics: Union[pd.DataFrame, List[Analytics]], filename: str) -> str:
         os.makedirs('exports', exist_ok=True)
         
-        data = [{
-            'timestamp': a.computed_at,
-            'symbol_x': a.symbol_x,
-            'symbol_y': a.symbol_y,
-            'timeframe': a.timeframe,
-            'hedge_ratio': a.hedge_ratio,
-            'spread': a.spread,
-            'z_score': a.z_score,
-            'rolling_corr': a.rolling_corr,
-            'adf_stat': a.adf_stat,
-            'p_value': a.p_value
-        } for a in analytics]
-        
-        df = pd.DataFrame(data)
+        columns = ['computed_at', 'symbol_x', 'symbol_y', 'timeframe', 'hedge_ratio', 'spread', 'z_score',
+                   'rolling_corr', 'adf_stat', 'p_value']
+        df = _to_frame(analytics, columns)[columns].rename(columns={'computed_at': 'timestamp'})
         filepath = os.path.join('exports', filename)
         df.to_csv(filepath, index=False)
         
@@ -112,7 +112,8 @@ with col2:
     symbol_y = st.selectbox("Symbol Y", ["ETHUSDT", "BTCUSDT", "BNBUSDT"], key="symbol_y")
 
 with col3:
-    timeframe = st.selectbox("Timeframe", ["1s", "1m", "5m"], index=1, key="timeframe")
+    timeframe = st.selectbox("Timeframe", ["1s", "1m", "5m"] + list(api_status.get('bar_samplers', {})),
+                             index=1, key="timeframe")
 
 col4, col5 = st.columns(2)
 
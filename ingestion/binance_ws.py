@@ -1,109 +1,144 @@
 import asyncio
 import websockets
-import json
 import logging
-from typing import Callable, List
-from collections import deque
+import random
+import time
+from typing import Callable, List, Optional
+from ingestion.decoder import TradeDecoder
+from ingestion.ingest_queue import IngestQueue
+from config.settings import (
+    BINANCE_WS_URL, WS_DECODER, INGEST_QUEUE_SIZE, INGEST_QUEUE_POLICY, INGEST_BATCH_MAX
+)
 
 logger = logging.getLogger(__name__)
 
 class BinanceWebSocket:
-    def __init__(self, symbols: List[str], callback: Callable):
+    def __init__(self, symbols: List[str], callback: Callable, base_url: str = BINANCE_WS_URL,
+                 record_path: Optional[str] = None, decoder: Optional[str] = WS_DECODER,
+                 batch_callback: Optional[Callable] = None, name: str = "ws",
+                 queue_size: int = INGEST_QUEUE_SIZE, queue_policy: str = INGEST_QUEUE_POLICY,
+                 max_batch: int = INGEST_BATCH_MAX):
         self.symbols = [s.lower() for s in symbols]
+        self.name = name
         self.callback = callback
+        self.batch_callback = batch_callback
+        self.base_url = base_url.rstrip('/')
+        self.record_path = record_path
+        self.record_file = None
+        self.decoder = TradeDecoder(decoder)
         self.ws = None
         self.running = False
-        self.buffer = {symbol.upper(): deque(maxlen=10000) for symbol in symbols}
+        self.queue = IngestQueue(maxsize=queue_size, policy=queue_policy)
+        self.max_batch = max_batch
         self.message_count = 0
-        
+        self.batch_count = 0
+        self.connected = False
+        self.connect_count = 0
+        self.reconnect_count = 0
+        self.last_message_at = None
+    
     def get_stream_url(self) -> str:
         streams = [f"{symbol}@trade" for symbol in self.symbols]
         stream_names = "/".join(streams)
-        return f"wss://stream.binance.com:9443/stream?streams={stream_names}"
+        return f"{self.base_url}/stream?streams={stream_names}"
     
     async def connect(self):
         self.running = True
+        if self.record_path:
+            self.record_file = open(self.record_path, 'a')
+            logger.info(f"[{self.name}] Recording raw frames to {self.record_path}")
+        
         url = self.get_stream_url()
-        logger.info(f"Connecting to Binance WebSocket: {url}")
+        logger.info(f"[{self.name}] Connecting to Binance WebSocket: {len(self.symbols)} streams "
+                    f"(decoder={self.decoder.backend})")
         
+        dispatcher = asyncio.create_task(self.dispatch_loop())
         reconnect_delay = 1
         
         while self.running:
             try:
                 async with websockets.connect(url, ping_interval=20, ping_timeout=10) as ws:
                     self.ws = ws
-                    logger.info(f"✓ Connected to Binance WebSocket for {self.symbols}")
+                    self.connected = True
+                    self.connect_count += 1
+                    logger.info(f"[{self.name}] ✓ Connected to Binance WebSocket for {len(self.symbols)} symbols")
                     reconnect_delay = 1
                     
+                    # Dead connections are detected by the keepalive pings, so the
+                    # reader only hands raw frames to the queue; only the 'block'
+                    # policy ever makes it wait on the consumer
                     while self.running:
                         try:
-                            message = await asyncio.wait_for(ws.recv(), timeout=30.0)
-                            data = json.loads(message)
-                            await self.process_message(data)
-                            self.message_count += 1
-                            
-                            if self.message_count % 100 == 0:
-                                logger.info(f"Processed {self.message_count} messages")
-                                
-                        except asyncio.TimeoutError:
-                            logger.warning("WebSocket receive timeout, sending ping...")
-                            try:
-                                await ws.ping()
-                            except Exception as e:
-                                logger.error(f"Ping failed: {e}")
-                                break
+                            message = await ws.recv()
+                            if self.record_file:
+                                self.record_file.write(message + '\n')
+                            await self.queue.put(message)
+                            self.last_message_at = time.time()
                         except websockets.exceptions.ConnectionClosed:
-                            logger.warning("WebSocket connection closed")
+                            logger.warning(f"[{self.name}] WebSocket connection closed")
                             break
                         except Exception as e:
-                            logger.error(f"Error receiving message: {e}")
+                            logger.error(f"[{self.name}] Error receiving message: {e}")
                             break
-                            
+            
             except Exception as e:
-                logger.error(f"WebSocket connection error: {e}")
-                if self.running:
-                    logger.info(f"Reconnecting in {reconnect_delay} seconds...")
-                    await asyncio.sleep(reconnect_delay)
-                    reconnect_delay = min(reconnect_delay * 2, 30)
+                logger.error(f"[{self.name}] WebSocket connection error: {e}")
+            
+            self.connected = False
+            if self.running:
+                # Jitter keeps shards that dropped together from reconnecting in lockstep
+                delay = reconnect_delay * random.uniform(1.0, 1.25)
+                self.reconnect_count += 1
+                logger.info(f"[{self.name}] Reconnecting in {delay:.1f} seconds...")
+                await asyncio.sleep(delay)
+                reconnect_delay = min(reconnect_delay * 2, 30)
+        
+        await dispatcher
+    
+    async def dispatch_loop(self):
+        while self.running or len(self.queue):
+            frames = await self.queue.get_batch(self.max_batch)
+            if frames:
+                await self.process_frames(frames)
     
-    async def process_message(self, data: dict):
+    async def process_frames(self, frames: List):
+        trades = self.decoder.decode_batch(frames)
+        
+        previous_count = self.message_count
+        self.message_count += len(frames)
+        self.batch_count += 1
+        if self.message_count // 10000 > previous_count // 10000:
+            logger.info(f"[{self.name}] Processed {self.message_count} messages")
+        
         try:
-            if 'data' not in data:
-                logger.debug(f"Received non-data message: {data}")
-                return
-                
-            trade_data = data['data']
-            symbol = trade_data['s']
-            
-            tick = {
-                'timestamp': trade_data['T'],
-                'symbol': symbol,
-                'price': float(trade_data['p']),
-                'quantity': float(trade_data['q'])
-            }
-            
-            self.buffer[symbol].append(tick)
-            await self.callback(tick)
-            
-        except KeyError as e:
-            logger.error(f"Missing key in trade data: {e}, data: {data}")
+            if self.batch_callback:
+                await self.batch_callback(trades)
+            else:
+                for trade in trades:
+                    await self.callback(trade)
         except Exception as e:
-            logger.error(f"Error processing message: {e}, data: {data}")
+            logger.error(f"[{self.name}] Error processing trades: {e}")
     
     async def stop(self):
-        logger.info("Stopping WebSocket client...")
+        logger.info(f"[{self.name}] Stopping WebSocket client...")
         self.running = False
+        self.queue.close()
         if self.ws:
             await self.ws.close()
-    
-    def get_buffer(self, symbol: str, limit: int = 1000) -> List[dict]:
-        if symbol in self.buffer:
-            return list(self.buffer[symbol])[-limit:]
-        return []
+        if self.record_file and self.record_path:
+            self.record_file.close()
+            self.record_file = None
     
     def get_stats(self) -> dict:
         return {
+            'name': self.name,
+            'streams': len(self.symbols),
+            'connected': self.connected,
+            'reconnects': self.reconnect_count,
+            'last_message_at': self.last_message_at,
             'total_messages': self.message_count,
-            'buffer_sizes': {symbol: len(buffer) for symbol, buffer in self.buffer.items()},
+            'batches': self.batch_count,
+            'decode_errors': self.decoder.error_count,
+            'queue': self.queue.get_stats(),
             'is_running': self.running
         }
\ No newline at end of file
@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import math
+from typing import Callable, List, Optional
+from ingestion.binance_ws import BinanceWebSocket
+from config.settings import BINANCE_WS_URL, WS_DECODER, WS_MAX_STREAMS_PER_CONNECTION, WS_NUM_CONNECTIONS
+
+logger = logging.getLogger(__name__)
+
+class ConnectionManager:
+    def __init__(self, symbols: List[str], callback: Callable, batch_callback: Optional[Callable] = None,
+                 base_url: str = BINANCE_WS_URL, record_path: Optional[str] = None,
+                 decoder: Optional[str] = WS_DECODER,
+                 max_streams_per_connection: int = WS_MAX_STREAMS_PER_CONNECTION,
+                 num_connections: int = WS_NUM_CONNECTIONS):
+        self.symbols = [s.upper() for s in symbols]
+        self.record_path = record_path
+        self.record_file = None
+        self.running = False
+        self.shards = self.shard_symbols(self.symbols, max_streams_per_connection, num_connections)
+        
+        # Every symbol lives on exactly one connection and each connection
+        # dispatches its batches in order, so per-symbol ordering is preserved
+        self.clients = [
+            BinanceWebSocket(
+                symbols=shard,
+                callback=callback,
+                base_url=base_url,
+                decoder=decoder,
+                batch_callback=batch_callback,
+                name=f"ws-{i}"
+            )
+            for i, shard in enumerate(self.shards)
+        ]
+    
+    @staticmethod
+    def shard_symbols(symbols: List[str], max_streams_per_connection: int,
+                      num_connections: int = 0) -> List[List[str]]:
+        if not max_streams_per_connection or max_streams_per_connection < 1:
+            raise ValueError(f"max_streams_per_connection must be at least 1, got {max_streams_per_connection}")
+        if not symbols:
+            return []
+        
+        count = max(num_connections or 0, math.ceil(len(symbols) / max_streams_per_connection), 1)
+        count = min(count, len(symbols))
+        
+        shards = [[] for _ in range(count)]
+        for i, symbol in enumerate(symbols):
+            shards[i % count].append(symbol)
+        
+        return shards
+    
+    async def connect(self):
+        self.running = True
+        if self.record_path:
+            # One shared handle: shards run on the same loop, so whole-line writes never interleave
+            self.record_file = open(self.record_path, 'a')
+            for client in self.clients:
+                client.record_file = self.record_file
+        
+        logger.info(f"Starting {len(self.clients)} WebSocket connections for {len(self.symbols)} symbols")
+        await asyncio.gather(*(client.connect() for client in self.clients))
+    
+    async def stop(self):
+        self.running = False
+        await asyncio.gather(*(client.stop() for client in self.clients))
+        
+        if self.record_file:
+            self.record_file.close()
+            self.record_file = None
+    
+    def get_stats(self) -> dict:
+        connections = [client.get_stats() for client in self.clients]
+        
+        return {
+            'total_messages': sum(stats['total_messages'] for stats in connections),
+            'decode_errors': sum(stats['decode_errors'] for stats in connections),
+            'reconnects': sum(stats['reconnects'] for stats in connections),
+            'connected': sum(1 for stats in connections if stats['connected']),
+            'queue_depth': sum(stats['queue']['depth'] for stats in connections),
+            'queue_dropped': sum(stats['queue']['dropped'] for stats in connections),
+            'queue_coalesced': sum(stats['queue']['coalesced'] for stats in connections),
+            'is_running': self.running,
+            'connections': connections
+        }
\ No newline at end of file
@@ -0,0 +1,97 @@
+import json
+import logging
+from typing import List, NamedTuple, Optional, Union
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+class Trade(NamedTuple):
+    timestamp: int
+    symbol: str
+    price: float
+    quantity: float
+
+if msgspec is not None:
+    # Only the fields we keep are declared; msgspec skips the rest without
+    # materialising them and (strict=False) parses the quoted decimals directly.
+    class _TradeData(msgspec.Struct):
+        s: str
+        p: float
+        q: float
+        T: int
+
+    class _TradeFrame(msgspec.Struct):
+        data: Optional[_TradeData] = None
+
+DECODER_BACKENDS = ('msgspec', 'orjson', 'json')
+
+def default_backend() -> str:
+    if msgspec is not None:
+        return 'msgspec'
+    if orjson is not None:
+        return 'orjson'
+    return 'json'
+
+class TradeDecoder:
+    def __init__(self, backend: Optional[str] = None):
+        if backend in (None, 'auto'):
+            backend = default_backend()
+        if backend not in DECODER_BACKENDS:
+            raise ValueError(f"Invalid decoder backend: {backend}")
+        if backend == 'msgspec' and msgspec is None:
+            raise ValueError("msgspec decoder requested but msgspec is not installed")
+        if backend == 'orjson' and orjson is None:
+            raise ValueError("orjson decoder requested but orjson is not installed")
+
+        self.backend = backend
+        self.error_count = 0
+
+        if backend == 'msgspec':
+            self._frame_decoder = msgspec.json.Decoder(_TradeFrame, strict=False)
+            self._batch_decoder = msgspec.json.Decoder(List[_TradeFrame], strict=False)
+            self._loads = None
+        else:
+            self._loads = orjson.loads if backend == 'orjson' else json.loads
+
+    def decode(self, raw: Union[str, bytes]) -> Optional[Trade]:
+        try:
+            if self._loads is None:
+                data = self._frame_decoder.decode(raw).data
+                if data is None:
+                    return None
+                return Trade(data.T, data.s, data.p, data.q)
+
+            data = self._loads(raw).get('data')
+            if data is None:
+                return None
+            return Trade(data['T'], data['s'], float(data['p']), float(data['q']))
+        except Exception as e:
+            self.error_count += 1
+            logger.error(f"Error decoding trade frame: {e}, data: {raw!r:.200}")
+            return None
+
+    def decode_batch(self, frames: List[Union[str, bytes]]) -> List[Trade]:
+        if self._loads is None and len(frames) > 1:
+            try:
+                # One decoder call for the whole batch instead of one per frame
+                payload = '[' + ','.join(f if isinstance(f, str) else f.decode() for f in frames) + ']'
+                return [Trade(f.data.T, f.data.s, f.data.p, f.data.q)
+                        for f in self._batch_decoder.decode(payload) if f.data is not None]
+            except (msgspec.DecodeError, msgspec.ValidationError):
+                pass
+
+        trades = []
+        for raw in frames:
+            trade = self.decode(raw)
+            if trade is not None:
+                trades.append(trade)
+        return trades
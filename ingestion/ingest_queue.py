@@ -0,0 +1,131 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+STREAM_PREFIX = '{"stream":"'
+
+def stream_key(raw) -> Optional[str]:
+    # Combined-stream frames start with the stream name, which identifies the
+    # symbol without decoding the whole payload
+    if isinstance(raw, bytes):
+        raw = raw[:64].decode(errors='ignore')
+    if not raw.startswith(STREAM_PREFIX):
+        return None
+    end = raw.find('"', len(STREAM_PREFIX))
+    if end < 0:
+        return None
+    return raw[len(STREAM_PREFIX):end]
+
+class IngestQueue:
+    POLICIES = ('block', 'drop_oldest', 'coalesce')
+
+    def __init__(self, maxsize: int = 50000, policy: str = 'block', key: Callable[[Any], Any] = stream_key):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Invalid ingest queue policy: {policy}")
+        if maxsize < 1:
+            raise ValueError("Ingest queue maxsize must be positive")
+
+        self.maxsize = maxsize
+        self.policy = policy
+        self.key = key
+        self.items = deque()
+        self.latest: Dict[Any, list] = {}
+        self.not_empty = asyncio.Event()
+        self.not_full = asyncio.Event()
+        self.not_full.set()
+        self.closed = False
+
+        self.put_count = 0
+        self.dropped_count = 0
+        self.coalesced_count = 0
+        self.high_watermark = 0
+        self.blocked_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    async def put(self, item):
+        if self.policy == 'block' and len(self.items) >= self.maxsize:
+            started = time.perf_counter()
+            while len(self.items) >= self.maxsize and not self.closed:
+                self.not_full.clear()
+                await self.not_full.wait()
+            self.blocked_seconds += time.perf_counter() - started
+
+        self.put_nowait(item)
+
+    def put_nowait(self, item):
+        self.put_count += 1
+
+        if self.policy == 'coalesce':
+            key = self.key(item)
+            if len(self.items) >= self.maxsize:
+                slot = self.latest.get(key) if key is not None else None
+                if slot is not None:
+                    # Latest value wins; the slot keeps its position, so the
+                    # symbol's ordering relative to its earlier frames holds
+                    slot[0] = item
+                    self.coalesced_count += 1
+                    return
+                self._drop_oldest()
+
+            slot = [item, key]
+            self.items.append(slot)
+            if key is not None:
+                self.latest[key] = slot
+        else:
+            if len(self.items) >= self.maxsize:
+                self._drop_oldest()
+            self.items.append(item)
+
+        if len(self.items) > self.high_watermark:
+            self.high_watermark = len(self.items)
+        self.not_empty.set()
+
+    def _drop_oldest(self):
+        slot = self.items.popleft()
+        self.dropped_count += 1
+        if self.policy == 'coalesce' and self.latest.get(slot[1]) is slot:
+            del self.latest[slot[1]]
+
+    async def get_batch(self, max_items: Optional[int] = None) -> List:
+        while not self.items:
+            if self.closed:
+                return []
+            self.not_empty.clear()
+            await self.not_empty.wait()
+
+        count = len(self.items) if max_items is None else min(max_items, len(self.items))
+        popleft = self.items.popleft
+
+        if self.policy == 'coalesce':
+            batch = []
+            latest = self.latest
+            for _ in range(count):
+                slot = popleft()
+                if latest.get(slot[1]) is slot:
+                    del latest[slot[1]]
+                batch.append(slot[0])
+        else:
+            batch = [popleft() for _ in range(count)]
+
+        self.not_full.set()
+        return batch
+
+    def close(self):
+        self.closed = True
+        self.not_empty.set()
+        self.not_full.set()
+
+    def get_stats(self) -> dict:
+        return {
+            'policy': self.policy,
+            'depth': len(self.items),
+            'maxsize': self.maxsize,
+            'high_watermark': self.high_watermark,
+            'put': self.put_count,
+            'dropped': self.dropped_count,
+            'coalesced': self.coalesced_count,
+            'blocked_seconds': round(self.blocked_seconds, 3)
+        }
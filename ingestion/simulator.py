@@ -0,0 +1,236 @@
+import asyncio
+import argparse
+import json
+import logging
+import random
+import time
+from typing import Dict, List, Optional, Set
+from urllib.parse import urlparse, parse_qs
+import websockets
+
+logger = logging.getLogger(__name__)
+
+BASE_PRICES = {
+    'BTCUSDT': 65000.0,
+    'ETHUSDT': 3200.0,
+    'BNBUSDT': 580.0
+}
+
+def make_symbols(count: int, base: Optional[List[str]] = None) -> List[str]:
+    symbols = [s.upper() for s in (base or [])][:count]
+    i = 1
+    while len(symbols) < count:
+        symbol = f"SIM{i:03d}USDT"
+        if symbol not in symbols:
+            symbols.append(symbol)
+        i += 1
+    return symbols
+
+# Speaks the combined-stream protocol on ws://host:port/stream?streams=...
+# Frames are either synthetic (rate trades/sec) or replayed from a session
+# recorded with BinanceWebSocket(record_path=...), one raw frame per line.
+class BinanceSimulator:
+    def __init__(self, symbols: List[str], host: str = '127.0.0.1', port: int = 8765,
+                 rate: float = 1000.0, replay_path: Optional[str] = None,
+                 replay_speed: float = 1.0, loop_replay: bool = True, seed: Optional[int] = None):
+        self.symbols = [s.upper() for s in symbols]
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.replay_path = replay_path
+        self.replay_speed = replay_speed
+        self.loop_replay = loop_replay
+        self.random = random.Random(seed)
+        self.prices = {s: BASE_PRICES.get(s, self.random.uniform(1.0, 500.0)) for s in self.symbols}
+        self.subscribers: Dict[str, Set] = {}
+        self.client_connected = asyncio.Event()
+        self.server = None
+        self.producer = None
+        self.running = False
+        self.trade_id = 0
+        self.sent_count = 0
+        self.published_count = 0
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    async def start(self):
+        self.running = True
+        self.server = await websockets.serve(self.handle_client, self.host, self.port)
+
+        if self.replay_path:
+            self.producer = asyncio.create_task(self.replay_loop())
+            logger.info(f"Simulator replaying {self.replay_path} on {self.url} (speed={self.replay_speed})")
+        else:
+            self.producer = asyncio.create_task(self.synthetic_loop())
+            logger.info(f"Simulator generating {self.rate:.0f} trades/sec for "
+                        f"{len(self.symbols)} symbols on {self.url}")
+
+    async def stop(self):
+        self.running = False
+        if self.producer:
+            self.producer.cancel()
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        logger.info(f"Simulator stopped after {self.published_count} trades")
+
+    async def handle_client(self, ws):
+        request = getattr(ws, 'request', None)
+        path = request.path if request is not None else getattr(ws, 'path', '')
+        query = parse_qs(urlparse(path).query)
+        streams = [s for s in query.get('streams', [''])[0].split('/') if s]
+
+        for stream in streams:
+            self.subscribers.setdefault(stream, set()).add(ws)
+        self.client_connected.set()
+        logger.info(f"Simulator client connected: {len(streams)} streams")
+
+        try:
+            await ws.wait_closed()
+        finally:
+            for stream in streams:
+                self.subscribers.get(stream, set()).discard(ws)
+
+    async def publish(self, stream: str, message: str):
+        self.published_count += 1
+        for ws in list(self.subscribers.get(stream, ())):
+            try:
+                await ws.send(message)
+                self.sent_count += 1
+            except websockets.exceptions.ConnectionClosed:
+                self.subscribers[stream].discard(ws)
+
+    def synthetic_frame(self, symbol: str, timestamp: int) -> str:
+        price = self.prices[symbol] * (1.0 + self.random.gauss(0.0, 0.0002))
+        self.prices[symbol] = price
+        self.trade_id += 1
+
+        return json.dumps({
+            'stream': f"{symbol.lower()}@trade",
+            'data': {
+                'e': 'trade',
+                'E': timestamp,
+                's': symbol,
+                't': self.trade_id,
+                'p': f"{price:.8f}",
+                'q': f"{self.random.expovariate(10.0):.8f}",
+                'T': timestamp,
+                'm': self.random.random() < 0.5,
+                'M': True
+            }
+        }, separators=(',', ':'))
+
+    async def synthetic_loop(self):
+        await self.client_connected.wait()
+        loop = asyncio.get_running_loop()
+        last = loop.time()
+        carry = 0.0
+
+        while self.running:
+            await asyncio.sleep(0.005)
+            now = loop.time()
+            due = self.rate * (now - last) + carry
+            last = now
+            count = int(due)
+            carry = due - count
+
+            timestamp = int(time.time() * 1000)
+            for _ in range(count):
+                symbol = self.random.choice(self.symbols)
+                await self.publish(f"{symbol.lower()}@trade", self.synthetic_frame(symbol, timestamp))
+
+    async def replay_loop(self):
+        await self.client_connected.wait()
+        loop = asyncio.get_running_loop()
+
+        while self.running:
+            start_wall = loop.time()
+            first_ts = None
+            offset = 0
+
+            with open(self.replay_path, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+
+                    frame = json.loads(line)
+                    data = frame.get('data')
+                    if not data or 'T' not in data:
+                        continue
+
+                    if first_ts is None:
+                        first_ts = data['T']
+                        offset = int(time.time() * 1000) - first_ts
+
+                    if self.replay_speed > 0:
+                        due = start_wall + (data['T'] - first_ts) / 1000.0 / self.replay_speed
+                        delay = due - loop.time()
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+
+                    # Rebase exchange timestamps so downstream bars and analytics see "now"
+                    data['T'] += offset
+                    if 'E' in data:
+                        data['E'] += offset
+
+                    await self.publish(frame['stream'], json.dumps(frame, separators=(',', ':')))
+
+            if not self.loop_replay:
+                logger.info("Simulator replay finished")
+                break
+
+    def get_stats(self) -> dict:
+        return {
+            'published': self.published_count,
+            'sent': self.sent_count,
+            'clients': len({ws for subs in self.subscribers.values() for ws in subs}),
+            'is_running': self.running
+        }
+
+async def run_simulator(args):
+    symbols = make_symbols(args.num_symbols, args.symbols)
+    simulator = BinanceSimulator(
+        symbols=symbols,
+        host=args.host,
+        port=args.port,
+        rate=args.rate,
+        replay_path=args.replay,
+        replay_speed=args.speed,
+        seed=args.seed
+    )
+    await simulator.start()
+
+    try:
+        while True:
+            await asyncio.sleep(5)
+            logger.info(f"Simulator stats: {simulator.get_stats()}")
+    finally:
+        await simulator.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Binance trade-stream simulator")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rate', type=float, default=1000.0, help="Synthetic trades per second")
+    parser.add_argument('--num-symbols', type=int, default=2)
+    parser.add_argument('--symbols', nargs='*', default=['BTCUSDT', 'ETHUSDT'])
+    parser.add_argument('--replay', default=None, help="Recorded session to replay instead of synthetic trades")
+    parser.add_argument('--speed', type=float, default=1.0, help="Replay speed multiplier, 0 = as fast as possible")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    try:
+        asyncio.run(run_simulator(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
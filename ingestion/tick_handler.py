@@ -1,60 +1,109 @@
 import asyncio
 import logging
-from storage.database import SessionLocal
-from storage.repository import TickRepository
-from typing import List
-from collections import defaultdict
+from storage.writer import StorageWriter
+from analytics.rolling import RollingBuffer
+from ingestion.decoder import Trade
+from typing import Dict, List
+from collections import Counter
+from itertools import repeat
 
 logger = logging.getLogger(__name__)
 
+# Hands ticks from the shared RollingBuffer to the storage writer; the buffer
+# is the only in-memory copy. Each symbol's cursor is the sequence of the last
+# tick the writer accepted. A tick is never evicted from its ring before it is
+# flushed: when appending would push unflushed ticks out, handle_ticks stops
+# returning until the writer takes them, which pushes the backpressure back to
+# the ingest queue instead of dropping anything.
 class TickHandler:
-    def __init__(self, batch_size: int = 100, flush_interval: float = 1.0):
+    def __init__(self, store: RollingBuffer, writer: StorageWriter, batch_size: int = 100,
+                 flush_interval: float = 1.0, retry_delay: float = 0.05):
+        self.store = store
+        self.writer = writer
         self.batch_size = batch_size
         self.flush_interval = flush_interval
-        self.buffer = defaultdict(list)
+        self.retry_delay = retry_delay
+        self.cursors = {}
         self.lock = asyncio.Lock()
         self.running = False
-        
+        self.backpressure_waits = 0
+    
     async def start(self):
         self.running = True
         asyncio.create_task(self.periodic_flush())
-        
-    async def handle_tick(self, tick: dict):
+    
+    async def handle_tick(self, tick: Trade):
+        await self.handle_ticks([tick])
+    
+    async def handle_ticks(self, ticks: List[Trade]):
+        # Stores the ticks, then flushes the symbols with a full batch pending
+        capacity = self.store.maxlen
         async with self.lock:
-            symbol = tick['symbol']
-            self.buffer[symbol].append(tick)
-            
-            if len(self.buffer[symbol]) >= self.batch_size:
-                await self.flush_symbol(symbol)
-    
-    async def flush_symbol(self, symbol: str):
-        if not self.buffer[symbol]:
-            return
-            
-        ticks_to_insert = self.buffer[symbol].copy()
-        self.buffer[symbol].clear()
+            for start in range(0, len(ticks), capacity):
+                chunk = ticks[start:start + capacity]
+                counts = Counter(tick.symbol for tick in chunk)
+                
+                if not self._has_room(counts):
+                    self.backpressure_waits += 1
+                    logger.warning("Storage writer is behind, pausing ingestion until it takes the buffered ticks")
+                    while not self.flush_all():
+                        await asyncio.sleep(self.retry_delay)
+                
+                self.store.add_ticks(chunk)
+                for symbol in counts:
+                    if self.pending_count(symbol) >= self.batch_size:
+                        self.flush_symbol(symbol)
+    
+    def _has_room(self, counts: Dict[str, int]) -> bool:
+        return all(self.pending_count(symbol) + count <= self.store.maxlen for symbol, count in counts.items())
+    
+    def pending_count(self, symbol: str) -> int:
+        return self.store.get_sequence(symbol) - self.cursors.get(symbol, 0)
+    
+    def flush_symbol(self, symbol: str) -> bool:
+        cursor = self.cursors.get(symbol, 0)
+        columns, sequence = self.store.get_since(symbol, cursor)
+        if len(columns.timestamp) == 0:
+            return True
         
-        try:
-            db = SessionLocal()
-            TickRepository.bulk_insert_ticks(db, ticks_to_insert)
-            db.close()
-            logger.info(f"Flushed {len(ticks_to_insert)} ticks for {symbol}")
-        except Exception as e:
-            logger.error(f"Error flushing ticks: {e}")
-            async with self.lock:
-                self.buffer[symbol].extend(ticks_to_insert)
+        ticks_to_insert = list(zip(
+            columns.timestamp.tolist(), repeat(symbol), columns.price.tolist(), columns.quantity.tolist()
+        ))
+        
+        # The write itself happens on the storage writer thread; if its backlog
+        # is full the cursor stays put and the same ticks are offered next time
+        if not self.writer.submit_ticks(ticks_to_insert):
+            return False
+        
+        self.cursors[symbol] = sequence
+        return True
+    
+    def flush_all(self) -> bool:
+        flushed = True
+        for symbol in list(self.store.buffers.keys()):
+            flushed = self.flush_symbol(symbol) and flushed
+        return flushed
     
     async def periodic_flush(self):
         while self.running:
             await asyncio.sleep(self.flush_interval)
             async with self.lock:
-                symbols = list(self.buffer.keys())
-            
-            for symbol in symbols:
-                await self.flush_symbol(symbol)
+                self.flush_all()
+    
+    def get_stats(self) -> dict:
+        return {
+            'pending': {symbol: self.pending_count(symbol) for symbol in self.store.buffers},
+            'backpressure_waits': self.backpressure_waits
+        }
     
-    async def stop(self):
+    async def stop(self, timeout: float = 10.0):
         self.running = False
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        
         async with self.lock:
-            for symbol in list(self.buffer.keys()):
-                await self.flush_symbol(symbol)
\ No newline at end of file
+            while not self.flush_all() and loop.time() < deadline:
+                await asyncio.sleep(0.05)
+            unflushed = sum(self.pending_count(symbol) for symbol in self.store.buffers)
+            if unflushed:
+                logger.error(f"{unflushed} ticks were not handed to the storage writer before shutdown")
\ No newline at end of file
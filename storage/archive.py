@@ -0,0 +1,303 @@
+import calendar
+import json
+import logging
+import os
+import time
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+from sqlalchemy import column, inspect, select, delete, table
+from sqlalchemy.orm import Session
+from storage import partitions
+from storage.columnar import fetch_columns
+from storage.models import ResampledData
+from analytics.bar_sampler import is_bar_key
+from config.settings import ARCHIVE_PATH, ARCHIVE_COMPRESSION, ARCHIVE_HOT_DAYS, BAR_TTL_DAYS, BAR_SAMPLER_TTL_DAYS
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+DAY_MS = partitions.DAY_MS
+
+TICK_FIELDS = ('timestamp', 'price', 'quantity')
+BAR_FIELDS = ('start_time', 'open', 'high', 'low', 'close', 'volume')
+
+# Partitions being sealed are renamed to this prefix first, so late ticks for
+# the same day start a fresh partition instead of mixing into the one on disk
+SEALING_PREFIX = 'archiving_'
+
+def _empty(fields) -> Dict[str, np.ndarray]:
+    return {field: np.empty(0, dtype=np.int64 if field in ('timestamp', 'start_time') else np.float64)
+            for field in fields}
+
+def _concat(parts: List[Dict[str, np.ndarray]], fields) -> Dict[str, np.ndarray]:
+    parts = [part for part in parts if len(part[fields[0]])]
+    if not parts:
+        return _empty(fields)
+    if len(parts) == 1:
+        return parts[0]
+    return {field: np.concatenate([part[field] for part in parts]) for field in fields}
+
+# Cold tier: one Arrow IPC file per symbol and UTC day, under
+#   <root>/ticks/<SYMBOL>/<YYYYMMDD>.arrow
+#   <root>/bars/<SYMBOL>/<timeframe>/<YYYYMMDD>.arrow
+# Files hold a single record batch and are memory-mapped on read, so columns
+# come back as NumPy views of the (decompressed, with zstd/lz4) Arrow buffers.
+class TickArchive:
+    def __init__(self, root: str = ARCHIVE_PATH, compression: str = ARCHIVE_COMPRESSION):
+        if pa is None:
+            raise ValueError("Archive requested but pyarrow is not installed")
+        if compression not in ('zstd', 'lz4', 'none'):
+            raise ValueError(f"Invalid archive compression: {compression}")
+        
+        self.root = root
+        self.compression = None if compression == 'none' else compression
+    
+    def tick_path(self, symbol: str, day: int) -> str:
+        return os.path.join(self.root, 'ticks', symbol.upper(),
+                            f"{time.strftime('%Y%m%d', time.gmtime(day * 86400))}.arrow")
+    
+    def bar_path(self, symbol: str, timeframe: str, day: int) -> str:
+        return os.path.join(self.root, 'bars', symbol.upper(), timeframe,
+                            f"{time.strftime('%Y%m%d', time.gmtime(day * 86400))}.arrow")
+    
+    def _write(self, path: str, columns: Dict[str, np.ndarray], sources: List[str]):
+        arrow_table = pa.table(columns).replace_schema_metadata({'sources': json.dumps(sources)})
+        options = pa.ipc.IpcWriteOptions(compression=self.compression)
+        
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.tmp'
+        with pa.OSFile(tmp, 'wb') as sink:
+            with pa.ipc.new_file(sink, arrow_table.schema, options=options) as writer:
+                writer.write_table(arrow_table, max_chunksize=max(len(arrow_table), 1))
+        os.replace(tmp, path)
+    
+    def _read(self, path: str, fields) -> Optional[tuple]:
+        # (columns, sources); the arrays keep the memory map alive
+        if not os.path.exists(path):
+            return None
+        
+        arrow_table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+        columns = {}
+        for field in fields:
+            chunked = arrow_table.column(field)
+            chunked = chunked.chunk(0) if chunked.num_chunks == 1 else chunked.combine_chunks()
+            columns[field] = chunked.to_numpy()
+        metadata = arrow_table.schema.metadata or {}
+        return columns, json.loads(metadata.get(b'sources', b'[]'))
+    
+    def _days(self, start_time: int, end_time: int) -> range:
+        return range(start_time // DAY_MS, end_time // DAY_MS + 1)
+    
+    def read_ticks(self, symbol: str, start_time: int, end_time: int) -> Dict[str, np.ndarray]:
+        parts = []
+        for day in self._days(start_time, end_time):
+            stored = self._read(self.tick_path(symbol, day), TICK_FIELDS)
+            if stored is None:
+                continue
+            columns = stored[0]
+            lo = np.searchsorted(columns['timestamp'], start_time, side='left')
+            hi = np.searchsorted(columns['timestamp'], end_time, side='right')
+            parts.append({field: columns[field][lo:hi] for field in TICK_FIELDS})
+        return _concat(parts, TICK_FIELDS)
+    
+    def read_bars(self, symbol: str, timeframe: str, start_time: int, end_time: int) -> Dict[str, np.ndarray]:
+        parts = []
+        for day in self._days(start_time, end_time):
+            stored = self._read(self.bar_path(symbol, timeframe, day), BAR_FIELDS)
+            if stored is None:
+                continue
+            columns = stored[0]
+            lo = np.searchsorted(columns['start_time'], start_time, side='left')
+            hi = np.searchsorted(columns['start_time'], end_time, side='right')
+            parts.append({field: columns[field][lo:hi] for field in BAR_FIELDS})
+        return _concat(parts, BAR_FIELDS)
+    
+    def seal_ticks(self, db: Session, hot_days: int = ARCHIVE_HOT_DAYS, now_ms: Optional[int] = None,
+                   read_db: Optional[Session] = None) -> int:
+        # Moves every tick partition older than the last `hot_days` UTC days
+        # into the archive. Each partition is renamed, written out and then
+        # dropped; the file records which renamed tables it already holds, so a
+        # run interrupted between write and drop never archives rows twice.
+        # With read_db, listing and scanning go through a reader connection and
+        # the writer connection is only held for the rename and drop statements.
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        cutoff_day = now_ms // DAY_MS - hot_days + 1
+        conn = db.connection()
+        
+        for day, _, name in partitions.list_partitions(conn):
+            if day < cutoff_day:
+                partitions.detach_partition(conn, name, f"{SEALING_PREFIX}{name}_{now_ms}")
+        db.commit()
+        
+        reader = read_db or db
+        names = [name for name in inspect(reader.connection()).get_table_names() if name.startswith(SEALING_PREFIX)]
+        reader.rollback()
+        
+        sealed = 0
+        for name in names:
+            sealed += self._seal_table(reader.connection(), name)
+            reader.rollback()
+            db.connection().exec_driver_sql(f"DROP TABLE {name}")
+            db.commit()
+        
+        if sealed:
+            logger.info(f"Archived {sealed} ticks to {self.root}")
+        return sealed
+    
+    def _seal_table(self, conn, name: str) -> int:
+        day, _ = partitions.parse_partition(name[len(SEALING_PREFIX):].rsplit('_', 1)[0])
+        sealing = table(name, column('symbol'), *(column(field) for field in TICK_FIELDS))
+        symbols = conn.execute(select(sealing.c.symbol).distinct().order_by(sealing.c.symbol)).scalars().all()
+        
+        written = 0
+        for symbol in symbols:
+            path = self.tick_path(symbol, day)
+            stored = self._read(path, TICK_FIELDS)
+            if stored is not None and name in stored[1]:
+                continue
+            
+            data = fetch_columns(conn, select(*(sealing.c[field] for field in TICK_FIELDS))
+                                 .where(sealing.c.symbol == symbol)
+                                 .order_by(sealing.c.timestamp), TICK_FIELDS)
+            new = {field: data[field] for field in TICK_FIELDS}
+            sources = []
+            if stored is not None:
+                new = _concat([stored[0], new], TICK_FIELDS)
+                sources = stored[1]
+                order = np.argsort(new['timestamp'], kind='stable')
+                new = {field: new[field][order] for field in TICK_FIELDS}
+            self._write(path, new, sources + [name])
+            written += len(data)
+        
+        return written
+    
+    def seal_bars(self, db: Session, hot_days: int = ARCHIVE_HOT_DAYS, now_ms: Optional[int] = None,
+                  read_db: Optional[Session] = None) -> int:
+        # Bars are keyed by start_time, so merging is idempotent: rows are
+        # written out (replacing archived bars with the same start) and only
+        # then deleted from SQLite. Archived bars keep their tier's retention
+        # (see expire_bars), and ResampledRepository reads them back when
+        # given the archive.
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        cutoff = (now_ms // DAY_MS - hot_days + 1) * DAY_MS
+        bars = ResampledData.__table__
+        columns = bars.c
+        reader = read_db or db
+        
+        series = reader.execute(
+            select(columns.symbol, columns.timeframe).where(columns.start_time < cutoff).distinct()
+        ).all()
+        
+        sealed = 0
+        for symbol, timeframe in series:
+            data = fetch_columns(reader.connection(), select(*(columns[field] for field in BAR_FIELDS)).where(
+                columns.symbol == symbol,
+                columns.timeframe == timeframe,
+                columns.start_time < cutoff
+            ).order_by(columns.start_time), BAR_FIELDS)
+            reader.rollback()
+            
+            days = data['start_time'] // DAY_MS
+            bounds = np.concatenate(([0], np.flatnonzero(days[1:] != days[:-1]) + 1, [len(data)]))
+            for start, end in zip(bounds[:-1], bounds[1:]):
+                path = self.bar_path(symbol, timeframe, int(days[start]))
+                new = {field: data[field][start:end] for field in BAR_FIELDS}
+                stored = self._read(path, BAR_FIELDS)
+                if stored is not None:
+                    merged = _concat([stored[0], new], BAR_FIELDS)
+                    order = np.argsort(merged['start_time'], kind='stable')
+                    merged = {field: merged[field][order] for field in BAR_FIELDS}
+                    # Keep the last of equal start_times, i.e. the SQLite copy
+                    keep = np.append(merged['start_time'][1:] != merged['start_time'][:-1], True)
+                    new = {field: merged[field][keep] for field in BAR_FIELDS}
+                self._write(path, new, [])
+            
+            db.execute(delete(bars).where(
+                columns.symbol == symbol,
+                columns.timeframe == timeframe,
+                columns.start_time < cutoff
+            ))
+            db.commit()
+            sealed += len(data)
+        
+        if read_db is not None:
+            read_db.rollback()
+        if sealed:
+            logger.info(f"Archived {sealed} bars to {self.root}")
+        return sealed
+    
+    def expire_bars(self, now_ms: Optional[int] = None) -> int:
+        # Deletes archived bar days that lie wholly outside their tier's
+        # retention, the same BAR_TTL_DAYS the SQLite rows are expired with
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        root = os.path.join(self.root, 'bars')
+        if not os.path.isdir(root):
+            return 0
+        
+        removed = 0
+        for symbol in os.listdir(root):
+            for timeframe in os.listdir(os.path.join(root, symbol)):
+                ttl_days = BAR_TTL_DAYS.get(timeframe, BAR_SAMPLER_TTL_DAYS if is_bar_key(timeframe) else 0)
+                if ttl_days <= 0:
+                    continue
+                
+                directory = os.path.join(root, symbol, timeframe)
+                for filename in os.listdir(directory):
+                    if not filename.endswith('.arrow'):
+                        continue
+                    day = calendar.timegm(time.strptime(filename[:-len('.arrow')], '%Y%m%d')) // 86400
+                    if (day + 1) * DAY_MS <= now_ms - ttl_days * DAY_MS:
+                        os.remove(os.path.join(directory, filename))
+                        removed += 1
+        
+        if removed:
+            logger.info(f"Expired {removed} archived bar files")
+        return removed
+    
+    def seal(self, db: Session, hot_days: int = ARCHIVE_HOT_DAYS, read_db: Optional[Session] = None) -> dict:
+        return {
+            'ticks': self.seal_ticks(db, hot_days, read_db=read_db),
+            'bars': self.seal_bars(db, hot_days, read_db=read_db),
+            'expired_bar_files': self.expire_bars()
+        }
+
+def load_ticks(db: Session, symbol: str, start_time: int, end_time: int,
+               archive: Optional[TickArchive] = None) -> pd.DataFrame:
+    # Archived days plus the ticks still in SQLite, as one timestamp-ordered frame
+    parts = [archive.read_ticks(symbol, start_time, end_time)] if archive is not None else []
+    
+    conn = db.connection()
+    data = fetch_columns(conn, partitions.range_select(conn, symbol, start_time, end_time, TICK_FIELDS), TICK_FIELDS)
+    parts.append({field: data[field] for field in TICK_FIELDS})
+    
+    columns = _concat(parts, TICK_FIELDS)
+    if len(parts) > 1:
+        order = np.argsort(columns['timestamp'], kind='stable')
+        columns = {field: columns[field][order] for field in TICK_FIELDS}
+    return pd.DataFrame(columns, copy=False)
+
+def load_bars(db: Session, symbol: str, timeframe: str, start_time: int, end_time: int,
+              archive: Optional[TickArchive] = None) -> pd.DataFrame:
+    parts = [archive.read_bars(symbol, timeframe, start_time, end_time)] if archive is not None else []
+    
+    columns = ResampledData.__table__.c
+    stmt = select(*(columns[field] for field in BAR_FIELDS)).where(
+        columns.symbol == symbol,
+        columns.timeframe == timeframe,
+        columns.start_time >= start_time,
+        columns.start_time <= end_time
+    ).order_by(columns.start_time)
+    data = fetch_columns(db.connection(), stmt, BAR_FIELDS)
+    parts.append({field: data[field] for field in BAR_FIELDS})
+    
+    columns = _concat(parts, BAR_FIELDS)
+    if len(parts) > 1:
+        order = np.argsort(columns['start_time'], kind='stable')
+        columns = {field: columns[field][order] for field in BAR_FIELDS}
+    return pd.DataFrame(columns, copy=False)
\ No newline at end of file
@@ -0,0 +1,46 @@
+import asyncio
+from typing import Callable
+from storage.repository import TickRepository, ResampledRepository, AnalyticsRepository, AlertRepository
+
+try:
+    from sqlalchemy.ext.asyncio import AsyncSession
+except ImportError:
+    AsyncSession = None
+
+# Awaitable versions of the repository methods. Each call runs the existing
+# sync implementation once on the session's connection: through
+# AsyncSession.run_sync (aiosqlite) or, with a plain Session, on a worker thread.
+
+async def run_sync(db, method: Callable, *args, **kwargs):
+    if AsyncSession is not None and isinstance(db, AsyncSession):
+        return await db.run_sync(method, *args, **kwargs)
+    return await asyncio.to_thread(method, db, *args, **kwargs)
+
+def _awaitable(method: Callable):
+    async def call(db, *args, **kwargs):
+        return await run_sync(db, method, *args, **kwargs)
+    call.__name__ = method.__name__
+    return staticmethod(call)
+
+class AsyncTickRepository:
+    get_ticks = _awaitable(TickRepository.get_ticks)
+    get_recent_ticks = _awaitable(TickRepository.get_recent_ticks)
+    get_ticks_frame = _awaitable(TickRepository.get_ticks_frame)
+    get_recent_ticks_frame = _awaitable(TickRepository.get_recent_ticks_frame)
+
+class AsyncResampledRepository:
+    get_bars = _awaitable(ResampledRepository.get_bars)
+    get_recent_bars = _awaitable(ResampledRepository.get_recent_bars)
+    get_bars_frame = _awaitable(ResampledRepository.get_bars_frame)
+    get_recent_bars_frame = _awaitable(ResampledRepository.get_recent_bars_frame)
+    get_bars_at_resolution = _awaitable(ResampledRepository.get_bars_at_resolution)
+
+class AsyncAnalyticsRepository:
+    get_analytics = _awaitable(AnalyticsRepository.get_analytics)
+    get_recent_analytics = _awaitable(AnalyticsRepository.get_recent_analytics)
+    get_analytics_frame = _awaitable(AnalyticsRepository.get_analytics_frame)
+    get_recent_analytics_frame = _awaitable(AnalyticsRepository.get_recent_analytics_frame)
+    get_analytics_at_resolution = _awaitable(AnalyticsRepository.get_analytics_at_resolution)
+
+class AsyncAlertRepository:
+    get_active_alerts = _awaitable(AlertRepository.get_active_alerts)
\ No newline at end of file
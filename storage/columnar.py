@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+from typing import Sequence
+from sqlalchemy.engine import Connection
+
+# Column-projected reads straight off the DB-API cursor: rows are streamed into
+# a NumPy structured array, with no Row or ORM object built per row. NULLs in
+# float columns come back as NaN.
+
+INT_COLUMNS = ('timestamp', 'start_time', 'computed_at')
+
+def column_dtype(columns: Sequence[str]) -> np.dtype:
+    return np.dtype([(name, np.int64 if name in INT_COLUMNS else np.float64) for name in columns])
+
+def fetch_columns(conn: Connection, stmt, columns: Sequence[str]) -> np.ndarray:
+    # stmt must select exactly `columns`, in order. Executing through the
+    # connection keeps SQLAlchemy's compiled-statement cache; the rows are then
+    # read from the underlying DB-API cursor, bypassing Row construction.
+    result = conn.execute(stmt)
+    try:
+        return np.fromiter(result.cursor, dtype=column_dtype(columns))
+    finally:
+        result.close()
+
+def to_frame(data: np.ndarray, **constants) -> pd.DataFrame:
+    # One column per field; constants (e.g. symbol=...) are broadcast
+    return pd.DataFrame({**{name: data[name] for name in data.dtype.names}, **constants},
+                        index=pd.RangeIndex(len(data)))
\ No newline at end of file
@@ -1,26 +1,193 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker, scoped_session
-from storage.models import Base
+from storage.models import Base, ResampledData
+from config.settings import (
+    DATABASE_URL, SQLITE_JOURNAL_MODE, SQLITE_SYNCHRONOUS, SQLITE_CACHE_SIZE,
+    SQLITE_MMAP_SIZE, SQLITE_BUSY_TIMEOUT_MS, DB_READ_POOL_SIZE,
+    DB_ASYNC_ENABLED, DB_ASYNC_READ_POOL_SIZE, API_DB_CONCURRENCY
+)
+from typing import Dict, Optional, Tuple
+import asyncio
+import logging
 import os
 
-DATABASE_URL = "sqlite:///data/market_data.db"
+try:
+    import aiosqlite
+    import greenlet
+    from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+except ImportError:
+    create_async_engine = None
 
-os.makedirs("data", exist_ok=True)
+logger = logging.getLogger(__name__)
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    echo=False
-)
+SQLITE_PRAGMAS = {
+    'journal_mode': SQLITE_JOURNAL_MODE,
+    'synchronous': SQLITE_SYNCHRONOUS,
+    'cache_size': SQLITE_CACHE_SIZE,
+    'mmap_size': SQLITE_MMAP_SIZE,
+    'busy_timeout': SQLITE_BUSY_TIMEOUT_MS
+}
+
+def _set_pragmas(engine: Engine, pragmas: Dict, read_only: bool = False):
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            # The journal mode is a property of the database file, owned by the writer
+            if read_only and name == 'journal_mode':
+                continue
+            cursor.execute(f"PRAGMA {name}={value}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+def create_engines(database_url: str = DATABASE_URL, pragmas: Optional[Dict] = None,
+                   read_pool_size: int = DB_READ_POOL_SIZE, separate_reader: bool = True) -> Tuple[Engine, Engine]:
+    url = make_url(database_url)
+    
+    if url.get_backend_name() != 'sqlite':
+        engine = create_engine(database_url, echo=False)
+        read_engine = create_engine(database_url, pool_size=read_pool_size, echo=False) if separate_reader else engine
+        return engine, read_engine
+    
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+    in_memory = url.database in (None, '', ':memory:')
+    if not in_memory:
+        os.makedirs(os.path.dirname(url.database) or '.', exist_ok=True)
+    
+    # SQLite allows one writer at a time, so all writes share one connection
+    # instead of queueing on the file lock
+    engine = create_engine(
+        database_url,
+        connect_args={"check_same_thread": False},
+        pool_size=1,
+        max_overflow=0,
+        echo=False
+    )
+    _set_pragmas(engine, pragmas)
+    
+    if not separate_reader or in_memory:
+        return engine, engine
+    
+    read_url = url.set(
+        database=f"file:{url.database}",
+        query={**url.query, 'mode': 'ro', 'uri': 'true'}
+    )
+    read_engine = create_engine(
+        read_url,
+        connect_args={"check_same_thread": False},
+        pool_size=read_pool_size,
+        max_overflow=read_pool_size,
+        echo=False
+    )
+    _set_pragmas(read_engine, pragmas, read_only=True)
+    
+    return engine, read_engine
+
+def create_async_read_engine(database_url: str = DATABASE_URL, pragmas: Optional[Dict] = None,
+                             read_pool_size: int = DB_ASYNC_READ_POOL_SIZE) -> 'AsyncEngine':
+    # The read-only pool of create_engines over aiosqlite, so async routes
+    # await queries instead of holding a thread. There is no async writer:
+    # writes go through the storage writer thread's connection.
+    if create_async_engine is None:
+        raise ValueError("Async database access requested but aiosqlite is not installed")
+    
+    url = make_url(database_url)
+    if url.get_backend_name() != 'sqlite':
+        raise ValueError(f"Async database access is only supported for sqlite, not {url.get_backend_name()}")
+    if url.database in (None, '', ':memory:'):
+        raise ValueError("Async database access needs a database file to open read-only")
+    
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+    read_url = url.set(
+        drivername='sqlite+aiosqlite',
+        database=f"file:{url.database}",
+        query={**url.query, 'mode': 'ro', 'uri': 'true'}
+    )
+    read_engine = create_async_engine(read_url, pool_size=read_pool_size, max_overflow=read_pool_size, echo=False)
+    _set_pragmas(read_engine.sync_engine, pragmas, read_only=True)
+    
+    return read_engine
+
+engine, read_engine = create_engines()
 
 SessionLocal = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
 
+ReadSessionLocal = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=read_engine))
+
+AsyncReadSessionLocal = None
+if DB_ASYNC_ENABLED:
+    try:
+        async_read_engine = create_async_read_engine()
+        AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+    except ValueError as e:
+        logger.warning(f"Async database access disabled, routes use sync sessions: {e}")
+
+# Bounds how many API requests use the database at once
+db_slots = asyncio.Semaphore(API_DB_CONCURRENCY)
+
+# Single-column indexes created by earlier schema versions, superseded by the
+# composite indexes declared on the models
+LEGACY_INDEXES = (
+    'ix_ticks_timestamp', 'ix_ticks_symbol',
+    'ix_resampled_data_symbol', 'ix_resampled_data_timeframe', 'ix_resampled_data_start_time',
+    'ix_analytics_symbol_x', 'ix_analytics_symbol_y', 'ix_analytics_timeframe', 'ix_analytics_computed_at'
+)
+
+def migrate_indexes(bind: Engine = None):
+    bind = bind or engine
+    existing = {index['name'] for index in inspect(bind).get_indexes(ResampledData.__tablename__)}
+    
+    with bind.begin() as conn:
+        if 'ux_resampled_symbol_timeframe_start' not in existing:
+            # Older databases re-inserted the same bars on every resampling pass;
+            # keep the latest copy of each so the unique index can be built
+            conn.execute(text(
+                "DELETE FROM resampled_data WHERE id NOT IN "
+                "(SELECT MAX(id) FROM resampled_data GROUP BY symbol, timeframe, start_time)"
+            ))
+        for name in LEGACY_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
 def init_db():
     Base.metadata.create_all(bind=engine)
+    migrate_indexes()
 
+# FastAPI may enter, use and close a sync dependency on different worker
+# threads, so requests get their own Session rather than the thread-scoped one
 def get_db():
-    db = SessionLocal()
+    db = SessionLocal.session_factory()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_read_db():
+    db = ReadSessionLocal.session_factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def _async_session(factory, fallback):
+    # An AsyncSession when aiosqlite is available, otherwise a plain (not
+    # thread-scoped) Session that the async repositories use from a worker thread
+    async with db_slots:
+        if factory is not None:
+            async with factory() as db:
+                yield db
+        else:
+            db = fallback()
+            try:
+                yield db
+            finally:
+                db.close()
+
+async def get_async_read_db():
+    async for db in _async_session(AsyncReadSessionLocal, ReadSessionLocal.session_factory):
+        yield db
\ No newline at end of file
@@ -0,0 +1,320 @@
+import asyncio
+import logging
+import os
+import re
+import struct
+import threading
+import time
+import numpy as np
+from typing import List, Optional, Sequence, Tuple
+from ingestion.decoder import Trade
+from config.settings import JOURNAL_PATH, JOURNAL_SEGMENT_BYTES, JOURNAL_FSYNC, JOURNAL_FSYNC_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# timestamp, symbol (ASCII, NUL-padded), price, quantity
+RECORD = struct.Struct('<q16sdd')
+RECORD_DTYPE = np.dtype([('timestamp', '<i8'), ('symbol', 'S16'), ('price', '<f8'), ('quantity', '<f8')])
+SYMBOL_BYTES = RECORD_DTYPE['symbol'].itemsize
+
+FSYNC_MODES = ('always', 'interval', 'none')
+
+SEGMENT_PATTERN = re.compile(r'^(\d{20})\.journal$')
+
+# A position is (segment id, record index within the segment)
+Position = Tuple[int, int]
+
+# Append-only tick journal: fixed 40-byte records in segment files named by a
+# strictly increasing id, so segments sort in write order across restarts.
+# The event loop appends whole batches with one write() call; a reader (the
+# storage writer thread) follows from a position and only ever sees complete
+# records, so a torn tail left by a crash is ignored. A new segment is started
+# on open and when the current one reaches segment_bytes; segments wholly
+# before a checkpoint can be deleted.
+# append() never waits for the disk. Every fsync runs on the journal-sync
+# thread: the current segment every fsync_interval ('interval') or as soon as
+# records are pending ('always', one fsync covering every batch appended
+# meanwhile), and full segments plus the directory entry of the next one on
+# rotation. append() returns the record count after the batch; in 'always'
+# mode callers await synced_to() with it before treating the batch as durable.
+class TickJournal:
+    def __init__(self, path: str = JOURNAL_PATH, segment_bytes: int = JOURNAL_SEGMENT_BYTES,
+                 fsync: str = JOURNAL_FSYNC, fsync_interval: float = JOURNAL_FSYNC_INTERVAL):
+        if fsync not in FSYNC_MODES:
+            raise ValueError(f"Invalid journal fsync mode: {fsync}")
+        
+        self.path = path
+        self.segment_bytes = max(segment_bytes - segment_bytes % RECORD.size, RECORD.size)
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.lock = threading.Lock()
+        self.synced_condition = threading.Condition(self.lock)
+        self.fd = None
+        self.segment = None
+        self.segment_size = 0
+        self.last_fsync = time.monotonic()
+        self.appended = 0
+        self.appended_event = threading.Event()
+        self.fsync_count = 0
+        
+        # State shared with the sync thread, under self.lock
+        self.synced = 0
+        self.requested = 0
+        self.rotated = []
+        self.directory_dirty = False
+        self.waiters = []
+        self.closing = False
+        self.sync_thread = None
+        
+        os.makedirs(path, exist_ok=True)
+        self._open_segment()
+        self.directory_dirty = True
+    
+    def segment_path(self, segment: int) -> str:
+        return os.path.join(self.path, f"{segment:020d}.journal")
+    
+    def segments(self) -> List[int]:
+        segments = []
+        for name in os.listdir(self.path):
+            match = SEGMENT_PATTERN.match(name)
+            if match is not None:
+                segments.append(int(match.group(1)))
+        return sorted(segments)
+    
+    def _open_segment(self):
+        existing = self.segments()
+        segment = max(time.time_ns() // 1000, existing[-1] + 1 if existing else 0)
+        if self.segment is not None:
+            segment = max(segment, self.segment + 1)
+        
+        fd = os.open(self.segment_path(segment), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self.fd, self.segment, self.segment_size = fd, segment, 0
+    
+    def append(self, ticks: Sequence[Trade]) -> int:
+        if not ticks:
+            return self.appended
+        
+        symbols = {}
+        for symbol in {tick.symbol for tick in ticks}:
+            symbols[symbol] = encode_symbol(symbol)
+        
+        pack = RECORD.pack
+        data = b''.join([pack(tick.timestamp, symbols[tick.symbol], tick.price, tick.quantity) for tick in ticks])
+        
+        with self.lock:
+            if self.fd is None or self.closing:
+                raise RuntimeError("Journal is closed")
+            self._start_sync_thread()
+            
+            os.write(self.fd, data)
+            self.segment_size += len(data)
+            self.appended += len(ticks)
+            appended = self.appended
+            
+            if self.fsync == 'always':
+                self.requested = appended
+                self.synced_condition.notify_all()
+            
+            if self.segment_size >= self.segment_bytes:
+                # The sync thread fsyncs and closes the full segment and makes
+                # the new one's directory entry durable
+                self.rotated.append(self.fd)
+                self._open_segment()
+                self.directory_dirty = True
+                self.synced_condition.notify_all()
+        
+        self.appended_event.set()
+        return appended
+    
+    def _start_sync_thread(self):
+        # Called with the lock held
+        if self.sync_thread is None:
+            self.sync_thread = threading.Thread(target=self._sync_loop, name="journal-sync", daemon=True)
+            self.sync_thread.start()
+    
+    def _has_work(self) -> bool:
+        return self.closing or bool(self.rotated) or self.requested > self.synced
+    
+    def _sync_loop(self):
+        timeout = self.fsync_interval if self.fsync == 'interval' else None
+        while True:
+            with self.lock:
+                if not self._has_work():
+                    self.synced_condition.wait(timeout)
+                if self.fsync == 'interval' and time.monotonic() - self.last_fsync >= self.fsync_interval:
+                    self.requested = self.appended
+                if self.closing and not self.rotated:
+                    break
+                if not self._has_work():
+                    continue
+                
+                rotated, self.rotated = self.rotated, []
+                directory_dirty, self.directory_dirty = self.directory_dirty, False
+                fd, target = self.fd, self.requested
+            
+            try:
+                self._sync_files(rotated, directory_dirty, fd if target > self.synced else None, target)
+            except OSError as e:
+                logger.error(f"Journal fsync failed: {e}")
+                time.sleep(1.0)
+    
+    def _sync_directory(self):
+        dir_fd = os.open(self.path, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    
+    def _sync_files(self, rotated: List[int], directory_dirty: bool, fd: Optional[int], target: int):
+        # Runs without the lock; rotated fds are only closed here and the
+        # current fd only after the sync thread has stopped
+        for old_fd in rotated:
+            os.fsync(old_fd)
+            os.close(old_fd)
+        if directory_dirty:
+            self._sync_directory()
+        if fd is not None:
+            os.fsync(fd)
+        
+        with self.lock:
+            self.fsync_count += len(rotated) + (fd is not None)
+            if fd is not None:
+                self.last_fsync = time.monotonic()
+                self.synced = max(self.synced, target)
+            self._notify_waiters()
+    
+    def _notify_waiters(self):
+        # Called with the lock held
+        self.synced_condition.notify_all()
+        ready = [waiter for waiter in self.waiters if waiter[0] <= self.synced or self.fd is None]
+        if ready:
+            self.waiters = [waiter for waiter in self.waiters if waiter not in ready]
+            for _, loop, future in ready:
+                loop.call_soon_threadsafe(_resolve, future)
+    
+    async def synced_to(self, count: int):
+        # Returns once the first `count` appended records have been fsynced
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            if count <= self.synced or self.fd is None:
+                return
+            future = loop.create_future()
+            self.waiters.append((count, loop, future))
+        await future
+    
+    def sync(self):
+        # Blocks until everything appended so far is fsynced; not for the event loop
+        with self.lock:
+            if self.fd is None or self.closing:
+                return
+            self._start_sync_thread()
+            target = self.requested = self.appended
+            self.synced_condition.notify_all()
+            while self.synced < target and self.fd is not None:
+                self.synced_condition.wait()
+    
+    def close(self):
+        with self.lock:
+            if self.fd is None:
+                return
+            self.closing = True
+            self.synced_condition.notify_all()
+            thread = self.sync_thread
+        if thread is not None:
+            thread.join()
+        
+        with self.lock:
+            if self.directory_dirty:
+                self._sync_directory()
+            if self.fsync != 'none':
+                os.fsync(self.fd)
+                self.fsync_count += 1
+                self.synced = self.appended
+            os.close(self.fd)
+            self.fd = None
+            self._notify_waiters()
+        self.appended_event.set()
+    
+    def read(self, position: Position, max_records: int) -> Tuple[np.ndarray, Position]:
+        # Up to max_records complete records from position, and the position
+        # after them. A segment is left behind only once a later one exists,
+        # i.e. when nothing more can be appended to it.
+        segment, record = position
+        for candidate in self.segments():
+            if candidate < segment:
+                continue
+            if candidate > segment:
+                segment, record = candidate, 0
+            
+            try:
+                with open(self.segment_path(segment), 'rb') as f:
+                    f.seek(record * RECORD.size)
+                    data = f.read(max_records * RECORD.size)
+            except FileNotFoundError:
+                continue
+            
+            count = len(data) // RECORD.size
+            if count:
+                records = np.frombuffer(data, dtype=RECORD_DTYPE, count=count)
+                return records, (segment, record + count)
+        
+        return np.empty(0, dtype=RECORD_DTYPE), (segment, record)
+    
+    def backlog(self, position: Position) -> int:
+        # Complete records at or after position
+        total = 0
+        for segment in self.segments():
+            if segment < position[0]:
+                continue
+            try:
+                count = os.path.getsize(self.segment_path(segment)) // RECORD.size
+            except FileNotFoundError:
+                continue
+            total += count - position[1] if segment == position[0] else count
+        return max(total, 0)
+    
+    def truncate(self, position: Position) -> int:
+        # Deletes the segments that lie wholly before position
+        removed = 0
+        for segment in self.segments():
+            if segment >= position[0] or segment == self.segment:
+                break
+            os.remove(self.segment_path(segment))
+            removed += 1
+        return removed
+    
+    def get_stats(self) -> dict:
+        return {
+            'segment': self.segment,
+            'segment_bytes': self.segment_size,
+            'appended': self.appended,
+            'synced': self.synced,
+            'fsyncs': self.fsync_count,
+            'fsync_mode': self.fsync
+        }
+
+def encode_symbol(symbol: str) -> bytes:
+    # The symbol field holds up to 16 ASCII bytes; anything else would be
+    # truncated on write or fail to decode on replay
+    try:
+        encoded = symbol.encode('ascii')
+    except UnicodeEncodeError:
+        raise ValueError(f"Journal symbols must be ASCII, got {symbol!r}")
+    if len(encoded) > SYMBOL_BYTES:
+        raise ValueError(f"Journal symbols are limited to {SYMBOL_BYTES} bytes, got {symbol!r}")
+    return encoded
+
+def ascii_records(records: np.ndarray) -> np.ndarray:
+    # Mask of the records whose symbol decodes as ASCII
+    symbols = np.ascontiguousarray(records['symbol']).view(np.uint8).reshape(len(records), SYMBOL_BYTES)
+    return (symbols < 128).all(axis=1)
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+def to_rows(records: np.ndarray) -> List[tuple]:
+    # (timestamp, symbol, price, quantity) rows for TickRepository.insert_tick_rows
+    symbols = np.char.decode(records['symbol'], 'ascii')
+    return list(zip(records['timestamp'].tolist(), symbols.tolist(),
+                    records['price'].tolist(), records['quantity'].tolist()))
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, String, BigInteger, Boolean, DateTime
+from sqlalchemy import Column, Integer, Float, String, BigInteger, Boolean, DateTime, Index
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -6,20 +6,27 @@ Base = declarative_base()
 
 class Tick(Base):
     __tablename__ = 'ticks'
+    __table_args__ = (
+        Index('ix_ticks_symbol_timestamp', 'symbol', 'timestamp'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    timestamp = Column(BigInteger, nullable=False, index=True)
-    symbol = Column(String(20), nullable=False, index=True)
+    timestamp = Column(BigInteger, nullable=False)
+    symbol = Column(String(20), nullable=False)
     price = Column(Float, nullable=False)
     quantity = Column(Float, nullable=False)
 
 class ResampledData(Base):
     __tablename__ = 'resampled_data'
+    __table_args__ = (
+        # One row per bar; also serves every (symbol, timeframe) range/recent query
+        Index('ux_resampled_symbol_timeframe_start', 'symbol', 'timeframe', 'start_time', unique=True),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    symbol = Column(String(20), nullable=False, index=True)
-    timeframe = Column(String(10), nullable=False, index=True)
-    start_time = Column(BigInteger, nullable=False, index=True)
+    symbol = Column(String(20), nullable=False)
+    timeframe = Column(String(32), nullable=False)
+    start_time = Column(BigInteger, nullable=False)
     open = Column(Float, nullable=False)
     high = Column(Float, nullable=False)
     low = Column(Float, nullable=False)
@@ -28,18 +35,29 @@ class ResampledData(Base):
 
 class Analytics(Base):
     __tablename__ = 'analytics'
+    __table_args__ = (
+        Index('ix_analytics_pair_timeframe_computed', 'symbol_x', 'symbol_y', 'timeframe', 'computed_at'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    symbol_x = Column(String(20), nullable=False, index=True)
-    symbol_y = Column(String(20), nullable=False, index=True)
-    timeframe = Column(String(10), nullable=False, index=True)
+    symbol_x = Column(String(20), nullable=False)
+    symbol_y = Column(String(20), nullable=False)
+    timeframe = Column(String(10), nullable=False)
     hedge_ratio = Column(Float, nullable=True)
     spread = Column(Float, nullable=True)
     z_score = Column(Float, nullable=True)
     rolling_corr = Column(Float, nullable=True)
     adf_stat = Column(Float, nullable=True)
     p_value = Column(Float, nullable=True)
-    computed_at = Column(BigInteger, nullable=False, index=True)
+    computed_at = Column(BigInteger, nullable=False)
+
+class JournalCheckpoint(Base):
+    __tablename__ = 'journal_checkpoint'
+    
+    # Next unread record of the tick journal, committed with the ticks it covers
+    name = Column(String(20), primary_key=True)
+    segment = Column(BigInteger, nullable=False)
+    record = Column(BigInteger, nullable=False)
 
 class Alert(Base):
     __tablename__ = 'alerts'
@@ -0,0 +1,217 @@
+import calendar
+import logging
+import re
+import threading
+import time
+import numpy as np
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import (
+    BigInteger, Column, Float, Index, Integer, MetaData, String, Table, event, inspect, select, union_all
+)
+from sqlalchemy.engine import Connection, Engine
+from storage.columnar import fetch_columns
+from storage.models import Tick
+from config.settings import TICK_PARTITIONING
+
+logger = logging.getLogger(__name__)
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+PARTITION_MODES = ('none', 'day', 'day_symbol')
+
+TICK_FIELDS = ('timestamp', 'symbol', 'price', 'quantity')
+
+# ticks_YYYYMMDD, or ticks_YYYYMMDD_<symbol> when also split by symbol
+PARTITION_PATTERN = re.compile(r'^ticks_(\d{8})(?:_([a-z0-9]+))?$')
+
+_metadata = MetaData()
+_metadata_lock = threading.Lock()
+
+# (database URL, partition name) already created, so inserts skip the catalog
+# query of CREATE TABLE checkfirst for known days
+_created = set()
+
+def partition_name(day: int, symbol: Optional[str] = None) -> str:
+    name = f"ticks_{time.strftime('%Y%m%d', time.gmtime(day * 86400))}"
+    if symbol is not None:
+        name += '_' + re.sub(r'[^a-z0-9]', '', symbol.lower())
+    return name
+
+def parse_partition(name: str) -> Optional[Tuple[int, Optional[str]]]:
+    # (day number since the epoch, lower-cased symbol or None)
+    match = PARTITION_PATTERN.match(name)
+    if match is None:
+        return None
+    day = calendar.timegm(time.strptime(match.group(1), '%Y%m%d')) // 86400
+    return day, match.group(2)
+
+def partition_table(name: str) -> Table:
+    table = _metadata.tables.get(name)
+    if table is not None:
+        return table
+    
+    with _metadata_lock:
+        table = _metadata.tables.get(name)
+        if table is not None:
+            return table
+        # Same columns as the unpartitioned Tick table; index names are
+        # database-wide in SQLite, so each carries its table name
+        return Table(
+            name, _metadata,
+            Column('id', Integer, primary_key=True, autoincrement=True),
+            Column('timestamp', BigInteger, nullable=False),
+            Column('symbol', String(20), nullable=False),
+            Column('price', Float, nullable=False),
+            Column('quantity', Float, nullable=False),
+            Index(f'ix_{name}_symbol_timestamp', 'symbol', 'timestamp')
+        )
+
+def group_rows(rows: Sequence[tuple], mode: str = TICK_PARTITIONING) -> Dict[str, List[tuple]]:
+    # rows are (timestamp, symbol, price, quantity)
+    if mode not in PARTITION_MODES:
+        raise ValueError(f"Invalid tick partitioning: {mode}")
+    
+    groups = defaultdict(list)
+    if mode == 'day':
+        for row in rows:
+            groups[row[0] // DAY_MS].append(row)
+        return {partition_name(day): group for day, group in groups.items()}
+    
+    for row in rows:
+        groups[(row[0] // DAY_MS, row[1])].append(row)
+    return {partition_name(day, symbol): group for (day, symbol), group in groups.items()}
+
+def ensure_partition(conn: Connection, name: str) -> Table:
+    table = partition_table(name)
+    key = (str(conn.engine.url), name)
+    if key not in _created:
+        table.create(bind=conn, checkfirst=True)
+        with _metadata_lock:
+            _created.add(key)
+    return table
+
+def _forget_created(name: Optional[str] = None, url: Optional[str] = None):
+    with _metadata_lock:
+        _created.difference_update([key for key in _created
+                                    if (name is None or key[1] == name) and (url is None or key[0] == url)])
+
+@event.listens_for(Engine, 'rollback')
+def _on_rollback(conn: Connection):
+    # DDL is transactional in SQLite, so a rolled-back transaction may have
+    # taken a CREATE TABLE with it
+    if _created:
+        _forget_created(url=str(conn.engine.url))
+
+def list_partitions(conn: Connection) -> List[Tuple[int, Optional[str], str]]:
+    # (day, symbol, table name) sorted oldest first
+    partitions = []
+    for name in inspect(conn).get_table_names():
+        parsed = parse_partition(name)
+        if parsed is not None:
+            partitions.append((parsed[0], parsed[1], name))
+    return sorted(partitions)
+
+def select_partitions(conn: Connection, symbol: str, start_time: Optional[int] = None,
+                      end_time: Optional[int] = None) -> List[Table]:
+    # Only the partitions whose day overlaps [start_time, end_time] and, when
+    # split by symbol, that hold this symbol
+    first_day = start_time // DAY_MS if start_time is not None else None
+    last_day = end_time // DAY_MS if end_time is not None else None
+    key = re.sub(r'[^a-z0-9]', '', symbol.lower())
+    
+    return [partition_table(name) for day, part_symbol, name in list_partitions(conn)
+            if (first_day is None or day >= first_day) and (last_day is None or day <= last_day)
+            and (part_symbol is None or part_symbol == key)]
+
+def _tick_select(table: Table, symbol: str, start_time: Optional[int], end_time: Optional[int],
+                 fields: Sequence[str] = TICK_FIELDS):
+    columns = table.c
+    stmt = select(*(columns[field] for field in fields)).where(columns.symbol == symbol)
+    if start_time is not None:
+        stmt = stmt.where(columns.timestamp >= start_time)
+    if end_time is not None:
+        stmt = stmt.where(columns.timestamp <= end_time)
+    return stmt
+
+def range_select(conn: Connection, symbol: str, start_time: Optional[int], end_time: Optional[int],
+                 fields: Sequence[str] = TICK_FIELDS):
+    # The unpartitioned table stays in every read, so rows written before
+    # partitioning was enabled (or with it off) are still returned
+    tables = [Tick.__table__] + select_partitions(conn, symbol, start_time, end_time)
+    selects = [_tick_select(table, symbol, start_time, end_time, fields) for table in tables]
+    stmt = union_all(*selects) if len(selects) > 1 else selects[0]
+    return stmt.order_by('timestamp')
+
+def read_range(conn: Connection, symbol: str, start_time: int, end_time: int) -> List:
+    return conn.execute(range_select(conn, symbol, start_time, end_time)).all()
+
+def read_recent(conn: Connection, symbol: str, limit: int) -> List:
+    # Newest partition first, stopping once `limit` rows are found; the
+    # unpartitioned table is always merged in
+    rows = []
+    for table in reversed(select_partitions(conn, symbol)):
+        rows.extend(conn.execute(
+            _tick_select(table, symbol, None, None).order_by(table.c.timestamp.desc()).limit(limit - len(rows))
+        ).all())
+        if len(rows) >= limit:
+            break
+    
+    legacy = Tick.__table__
+    rows.extend(conn.execute(
+        _tick_select(legacy, symbol, None, None).order_by(legacy.c.timestamp.desc()).limit(limit)
+    ).all())
+    rows.sort(key=lambda row: row.timestamp, reverse=True)
+    return rows[:limit]
+
+def read_recent_columns(conn: Connection, symbol: str, limit: int, fields: Sequence[str]) -> np.ndarray:
+    # read_recent into a structured array (see storage.columnar), newest
+    # first; fields must include timestamp
+    parts = []
+    found = 0
+    for table in reversed(select_partitions(conn, symbol)):
+        part = fetch_columns(conn, _tick_select(table, symbol, None, None, fields)
+                             .order_by(table.c.timestamp.desc()).limit(limit - found), fields)
+        parts.append(part)
+        found += len(part)
+        if found >= limit:
+            break
+    
+    legacy = Tick.__table__
+    parts.append(fetch_columns(conn, _tick_select(legacy, symbol, None, None, fields)
+                               .order_by(legacy.c.timestamp.desc()).limit(limit), fields))
+    data = np.concatenate(parts)
+    data = data[np.argsort(-data['timestamp'], kind='stable')]
+    return data[:max(limit, 0)]
+
+def detach_partition(conn: Connection, name: str, new_name: str):
+    # Renames a partition out of the read/write path. Its index goes too, since
+    # the name would clash when the writer recreates the partition.
+    conn.exec_driver_sql(f"DROP INDEX IF EXISTS ix_{name}_symbol_timestamp")
+    conn.exec_driver_sql(f"ALTER TABLE {name} RENAME TO {new_name}")
+    with _metadata_lock:
+        if name in _metadata.tables:
+            _metadata.remove(_metadata.tables[name])
+    _forget_created(name)
+
+def drop_expired(conn: Connection, retention_days: int, now_ms: Optional[int] = None) -> List[str]:
+    # Keeps the last `retention_days` UTC days, today included, by dropping
+    # whole day tables; no row-level DELETE
+    if retention_days <= 0:
+        return []
+    
+    now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+    cutoff_day = now_ms // DAY_MS - retention_days + 1
+    dropped = []
+    for day, _, name in list_partitions(conn):
+        if day < cutoff_day:
+            table = partition_table(name)
+            table.drop(bind=conn, checkfirst=True)
+            with _metadata_lock:
+                _metadata.remove(table)
+            _forget_created(name)
+            dropped.append(name)
+    
+    if dropped:
+        logger.info(f"Dropped {len(dropped)} expired tick partitions: {', '.join(dropped)}")
+    return dropped
\ No newline at end of file
@@ -0,0 +1,154 @@
+import logging
+import pandas as pd
+from typing import Optional
+from sqlalchemy.orm import Session
+from storage.archive import TickArchive, load_ticks, load_bars
+from storage.repository import AnalyticsRepository
+from config.settings import QUERY_ENGINE_THREADS, QUERY_ENGINE_MEMORY_LIMIT, QUERY_MAX_RANGE_DAYS
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+logger = logging.getLogger(__name__)
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+OHLCV_QUERY = """
+SELECT timestamp // $bucket_ms * $bucket_ms AS start_time,
+       arg_min(price, timestamp) AS open,
+       max(price) AS high,
+       min(price) AS low,
+       arg_max(price, timestamp) AS close,
+       sum(quantity) AS volume,
+       sum(price * quantity) / nullif(sum(quantity), 0) AS vwap,
+       count(*) AS trades
+FROM ticks
+GROUP BY 1
+ORDER BY 1
+"""
+
+VOLUME_PROFILE_QUERY = """
+SELECT floor(price / $price_step) * $price_step AS price,
+       sum(quantity) AS volume,
+       sum(price * quantity) AS notional,
+       count(*) AS trades
+FROM ticks
+GROUP BY 1
+ORDER BY 1
+"""
+
+VOLATILITY_QUERY = """
+WITH returns AS (
+    SELECT start_time, ln(close / lag(close) OVER (ORDER BY start_time)) AS log_return
+    FROM bars
+)
+SELECT start_time // $bucket_ms * $bucket_ms AS start_time,
+       count(log_return) AS returns,
+       stddev_samp(log_return) AS volatility,
+       sqrt(sum(log_return * log_return)) AS realized_volatility,
+       sum(log_return) AS log_return
+FROM returns
+WHERE log_return IS NOT NULL
+GROUP BY 1
+ORDER BY 1
+"""
+
+ZSCORE_QUERY = """
+SELECT computed_at // $bucket_ms * $bucket_ms AS start_time,
+       count(*) AS samples,
+       avg(z_score) AS mean,
+       stddev_samp(z_score) AS std,
+       min(z_score) AS min,
+       quantile_cont(z_score, 0.05) AS p05,
+       quantile_cont(z_score, 0.25) AS p25,
+       quantile_cont(z_score, 0.5) AS median,
+       quantile_cont(z_score, 0.75) AS p75,
+       quantile_cont(z_score, 0.95) AS p95,
+       max(z_score) AS max,
+       avg(CASE WHEN abs(z_score) > $threshold THEN 1.0 ELSE 0.0 END) AS beyond_threshold
+FROM analytics
+WHERE z_score IS NOT NULL AND NOT isnan(z_score)
+GROUP BY 1
+ORDER BY 1
+"""
+
+# Aggregations over stored market data, run by an embedded in-memory DuckDB.
+# Rows are loaded column-wise (SQLite through the read session, archived days
+# from the Arrow files) and handed to DuckDB as a frame, which it scans without
+# copying; the SQL is fixed and every caller-supplied value is a bound
+# parameter. Loading takes a sync session and the aggregation runs on a
+# per-call cursor, so the API runs both on a worker thread and requests can
+# overlap.
+class QueryEngine:
+    def __init__(self, archive: Optional[TickArchive] = None, threads: int = QUERY_ENGINE_THREADS,
+                 memory_limit: str = QUERY_ENGINE_MEMORY_LIMIT, max_range_days: float = QUERY_MAX_RANGE_DAYS):
+        if duckdb is None:
+            raise ValueError("Query engine requested but duckdb is not installed")
+        
+        self.archive = archive
+        self.max_range_ms = int(max_range_days * DAY_MS)
+        self.connection = duckdb.connect(':memory:', config={'threads': threads, 'memory_limit': memory_limit})
+        self.queries = 0
+    
+    def _check_range(self, start_time: int, end_time: int):
+        if end_time < start_time:
+            raise ValueError("end_time is before start_time")
+        if self.max_range_ms and end_time - start_time > self.max_range_ms:
+            raise ValueError(f"Query range exceeds {self.max_range_ms // DAY_MS} days")
+    
+    def _check_positive(self, name: str, value: float):
+        if not value > 0:
+            raise ValueError(f"{name} must be positive")
+    
+    def load_ticks(self, db: Session, symbol: str, start_time: int, end_time: int) -> pd.DataFrame:
+        self._check_range(start_time, end_time)
+        return load_ticks(db, symbol, start_time, end_time, self.archive)
+    
+    def load_bars(self, db: Session, symbol: str, timeframe: str, start_time: int, end_time: int) -> pd.DataFrame:
+        self._check_range(start_time, end_time)
+        return load_bars(db, symbol, timeframe, start_time, end_time, self.archive)
+    
+    def load_analytics(self, db: Session, symbol_x: str, symbol_y: str, timeframe: str,
+                       start_time: int, end_time: int) -> pd.DataFrame:
+        self._check_range(start_time, end_time)
+        return AnalyticsRepository.get_analytics_frame(db, symbol_x, symbol_y, timeframe, start_time, end_time)
+    
+    def execute(self, query: str, params: dict, **tables: pd.DataFrame) -> pd.DataFrame:
+        # A cursor is a separate connection to the same database, so each
+        # call registers its own tables and can run on any thread
+        cursor = self.connection.cursor()
+        try:
+            for name, frame in tables.items():
+                cursor.register(name, frame)
+            result = cursor.execute(query, params).df()
+        finally:
+            cursor.close()
+        self.queries += 1
+        return result
+    
+    def ohlcv(self, ticks: pd.DataFrame, bucket_ms: int) -> pd.DataFrame:
+        self._check_positive('bucket_ms', bucket_ms)
+        return self.execute(OHLCV_QUERY, {'bucket_ms': bucket_ms}, ticks=ticks)
+    
+    def volume_profile(self, ticks: pd.DataFrame, price_step: float) -> pd.DataFrame:
+        self._check_positive('price_step', price_step)
+        return self.execute(VOLUME_PROFILE_QUERY, {'price_step': price_step}, ticks=ticks)
+    
+    def volatility(self, bars: pd.DataFrame, bucket_ms: int) -> pd.DataFrame:
+        self._check_positive('bucket_ms', bucket_ms)
+        return self.execute(VOLATILITY_QUERY, {'bucket_ms': bucket_ms}, bars=bars)
+    
+    def zscore_distribution(self, analytics: pd.DataFrame, bucket_ms: int, threshold: float = 2.0) -> pd.DataFrame:
+        self._check_positive('bucket_ms', bucket_ms)
+        return self.execute(ZSCORE_QUERY, {'bucket_ms': bucket_ms, 'threshold': threshold}, analytics=analytics)
+    
+    def get_stats(self) -> dict:
+        return {
+            'queries': self.queries,
+            'archive': self.archive is not None
+        }
+    
+    def close(self):
+        self.connection.close()
\ No newline at end of file
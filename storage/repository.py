@@ -1,7 +1,103 @@
+from sqlalchemy import Table, select
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
-from storage.models import Tick, ResampledData, Analytics, Alert
-from typing import List, Optional
+from storage.models import Tick, ResampledData, Analytics, Alert, JournalCheckpoint
+from storage import partitions
+from storage.columnar import fetch_columns, to_frame
+from storage.archive import load_bars
+from config.settings import (
+    TICK_PARTITIONING, TIMEFRAME_MS, BAR_TTL_DAYS, ANALYTICS_TTL_DAYS, ANALYTICS_INTERVAL
+)
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from itertools import repeat
+from collections import OrderedDict
 import pandas as pd
+import threading
+import time
+
+TICK_COLUMNS = ('timestamp', 'symbol', 'price', 'quantity')
+BAR_COLUMNS = ('symbol', 'timeframe', 'start_time', 'open', 'high', 'low', 'close', 'volume')
+
+BAR_KEY_COLUMNS = ('symbol', 'timeframe', 'start_time')
+ANALYTICS_COLUMNS = ('symbol_x', 'symbol_y', 'timeframe', 'hedge_ratio', 'spread', 'z_score',
+                     'rolling_corr', 'adf_stat', 'p_value', 'computed_at')
+
+# Numeric projections read by the *_frame methods; the key columns are constants
+TICK_FRAME_FIELDS = ('timestamp', 'price', 'quantity')
+BAR_FRAME_FIELDS = ('start_time', 'open', 'high', 'low', 'close', 'volume')
+ANALYTICS_FRAME_FIELDS = ('computed_at', 'hedge_ratio', 'spread', 'z_score', 'rolling_corr', 'adf_stat', 'p_value')
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+# Bucket size of each analytics tier; 'tick' snapshots are written every ANALYTICS_INTERVAL
+ANALYTICS_TIER_MS = {'tick': int(ANALYTICS_INTERVAL * 1000), '1m': 60 * 1000, '1h': 60 * 60 * 1000}
+
+# Compiled INSERT/upsert SQL per (kind, table, columns, dialect), least
+# recently used first; bounded because every daily partition is a new table
+_compiled_inserts = OrderedDict()
+_compiled_lock = threading.Lock()
+COMPILED_INSERT_CACHE_SIZE = 64
+
+def _execute_rows(db: Session, key: tuple, build: Callable, columns: Sequence[str], rows: Sequence[tuple]):
+    # Core executemany without per-row ORM objects; positional drivers such as
+    # sqlite3 take the row tuples as they are
+    if not rows:
+        return
+    
+    conn = db.connection()
+    if conn.dialect.positional:
+        key = key + (tuple(columns), conn.dialect.name)
+        with _compiled_lock:
+            sql = _compiled_inserts.get(key)
+            if sql is not None:
+                _compiled_inserts.move_to_end(key)
+        if sql is None:
+            sql = str(build(conn.dialect).compile(dialect=conn.dialect, column_keys=list(columns)))
+            with _compiled_lock:
+                _compiled_inserts[key] = sql
+                if len(_compiled_inserts) > COMPILED_INSERT_CACHE_SIZE:
+                    _compiled_inserts.popitem(last=False)
+        conn.exec_driver_sql(sql, rows if isinstance(rows, list) else list(rows))
+    else:
+        conn.execute(build(conn.dialect), [dict(zip(columns, row)) for row in rows])
+
+def insert_rows(db: Session, table: Table, columns: Sequence[str], rows: Sequence[tuple]):
+    _execute_rows(db, ('insert', table.name), lambda dialect: table.insert(), columns, rows)
+
+def upsert_rows(db: Session, table: Table, columns: Sequence[str], rows: Sequence[tuple],
+                key_columns: Sequence[str]):
+    # INSERT ... ON CONFLICT (key) DO UPDATE, so rewriting a row is idempotent
+    def build(dialect):
+        if dialect.name == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        elif dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            raise ValueError(f"Upsert is not supported for dialect: {dialect.name}")
+        
+        stmt = insert(table)
+        return stmt.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={column: stmt.excluded[column] for column in columns if column not in key_columns}
+        )
+    
+    _execute_rows(db, ('upsert', table.name), build, columns, rows)
+
+def select_tier(tier_ms: Dict[str, int], ttl_days: Dict[str, float], start_time: int, resolution_ms: int,
+                now_ms: Optional[int] = None) -> str:
+    # The coarsest tier no coarser than resolution_ms whose retention still
+    # covers start_time; if none is fine enough, the finest that covers it
+    now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+    ordered = sorted(tier_ms, key=tier_ms.get)
+    covering = [tier for tier in ordered
+                if ttl_days.get(tier, 0) <= 0 or start_time >= now_ms - ttl_days[tier] * DAY_MS]
+    fine_enough = [tier for tier in covering if tier_ms[tier] <= resolution_ms]
+    
+    if fine_enough:
+        return fine_enough[-1]
+    if covering:
+        return covering[0]
+    return ordered[-1]
 
 class TickRepository:
     @staticmethod
@@ -12,48 +108,64 @@ class TickRepository:
         return tick
     
     @staticmethod
-    def bulk_insert_ticks(db: Session, ticks: List[dict]):
+    def bulk_insert_ticks(db: Session, ticks: List[dict], commit: bool = True):
         tick_objs = [Tick(**tick) for tick in ticks]
         db.bulk_save_objects(tick_objs)
-        db.commit()
+        if commit:
+            db.commit()
     
     @staticmethod
-    def get_ticks(db: Session, symbol: str, start_time: int, end_time: int) -> List[Tick]:
-        return db.query(Tick).filter(
-            Tick.symbol == symbol,
-            Tick.timestamp >= start_time,
-            Tick.timestamp <= end_time
-        ).order_by(Tick.timestamp).all()
+    def insert_tick_rows(db: Session, rows: Sequence[tuple], commit: bool = True):
+        # rows are (timestamp, symbol, price, quantity)
+        if TICK_PARTITIONING == 'none':
+            insert_rows(db, Tick.__table__, TICK_COLUMNS, rows)
+        else:
+            conn = db.connection()
+            for name, group in partitions.group_rows(rows, TICK_PARTITIONING).items():
+                insert_rows(db, partitions.ensure_partition(conn, name), TICK_COLUMNS, group)
+        if commit:
+            db.commit()
     
     @staticmethod
-    def get_recent_ticks(db: Session, symbol: str, limit: int = 1000) -> List[Tick]:
-        return db.query(Tick).filter(
-            Tick.symbol == symbol
-        ).order_by(Tick.timestamp.desc()).limit(limit).all()
-
-class ResampledRepository:
+    def insert_tick_columns(db: Session, symbol: str, timestamps, prices, quantities, commit: bool = True):
+        rows = list(zip(timestamps.tolist(), repeat(symbol), prices.tolist(), quantities.tolist()))
+        TickRepository.insert_tick_rows(db, rows, commit)
+    
     @staticmethod
-    def insert_bar(db: Session, symbol: str, timeframe: str, start_time: int, 
-                   open_price: float, high: float, low: float, close: float, volume: float):
-        bar = ResampledData(
-            symbol=symbol,
-            timeframe=timeframe,
-            start_time=start_time,
-            open=open_price,
-            high=high,
-            low=low,
-            close=close,
-            volume=volume
-        )
-        db.add(bar)
-        db.commit()
-        return bar
+    def get_ticks(db: Session, symbol: str, start_time: int, end_time: int) -> List[Row]:
+        # Rows with timestamp/symbol/price/quantity, read only from the day
+        # partitions that overlap the range
+        return partitions.read_range(db.connection(), symbol, start_time, end_time)
+    
+    @staticmethod
+    def get_recent_ticks(db: Session, symbol: str, limit: int = 1000) -> List[Row]:
+        return partitions.read_recent(db.connection(), symbol, limit)
+    
+    @staticmethod
+    def get_ticks_frame(db: Session, symbol: str, start_time: int, end_time: int) -> pd.DataFrame:
+        conn = db.connection()
+        stmt = partitions.range_select(conn, symbol, start_time, end_time, TICK_FRAME_FIELDS)
+        return to_frame(fetch_columns(conn, stmt, TICK_FRAME_FIELDS), symbol=symbol)
+    
+    @staticmethod
+    def get_recent_ticks_frame(db: Session, symbol: str, limit: int = 1000) -> pd.DataFrame:
+        data = partitions.read_recent_columns(db.connection(), symbol, limit, TICK_FRAME_FIELDS)
+        return to_frame(data, symbol=symbol)
     
     @staticmethod
-    def bulk_insert_bars(db: Session, bars: List[dict]):
-        bar_objs = [ResampledData(**bar) for bar in bars]
-        db.bulk_save_objects(bar_objs)
+    def drop_expired_partitions(db: Session, retention_days: int) -> List[str]:
+        dropped = partitions.drop_expired(db.connection(), retention_days)
         db.commit()
+        return dropped
+
+class ResampledRepository:
+    @staticmethod
+    def upsert_bars(db: Session, rows: Sequence[tuple], commit: bool = True):
+        # rows are (symbol, timeframe, start_time, open, high, low, close, volume);
+        # a bar already stored for the same start_time is overwritten
+        upsert_rows(db, ResampledData.__table__, BAR_COLUMNS, rows, BAR_KEY_COLUMNS)
+        if commit:
+            db.commit()
     
     @staticmethod
     def get_bars(db: Session, symbol: str, timeframe: str, start_time: int, end_time: int) -> List[ResampledData]:
@@ -70,13 +182,45 @@ class ResampledRepository:
             ResampledData.symbol == symbol,
             ResampledData.timeframe == timeframe
         ).order_by(ResampledData.start_time.desc()).limit(limit).all()
+    
+    @staticmethod
+    def get_bars_frame(db: Session, symbol: str, timeframe: str, start_time: int, end_time: int) -> pd.DataFrame:
+        columns = ResampledData.__table__.c
+        stmt = select(*(columns[field] for field in BAR_FRAME_FIELDS)).where(
+            columns.symbol == symbol,
+            columns.timeframe == timeframe,
+            columns.start_time >= start_time,
+            columns.start_time <= end_time
+        ).order_by(columns.start_time)
+        return to_frame(fetch_columns(db.connection(), stmt, BAR_FRAME_FIELDS), symbol=symbol, timeframe=timeframe)
+    
+    @staticmethod
+    def get_recent_bars_frame(db: Session, symbol: str, timeframe: str, limit: int = 500) -> pd.DataFrame:
+        # Newest first, like get_recent_bars
+        columns = ResampledData.__table__.c
+        stmt = select(*(columns[field] for field in BAR_FRAME_FIELDS)).where(
+            columns.symbol == symbol,
+            columns.timeframe == timeframe
+        ).order_by(columns.start_time.desc()).limit(limit)
+        return to_frame(fetch_columns(db.connection(), stmt, BAR_FRAME_FIELDS), symbol=symbol, timeframe=timeframe)
+    
+    @staticmethod
+    def get_bars_at_resolution(db: Session, symbol: str, start_time: int, end_time: int,
+                               resolution_ms: int, archive=None) -> Tuple[str, pd.DataFrame]:
+        # With a TickArchive, bars already sealed out of SQLite are merged back in
+        timeframe = select_tier(TIMEFRAME_MS, BAR_TTL_DAYS, start_time, resolution_ms)
+        if archive is None:
+            return timeframe, ResampledRepository.get_bars_frame(db, symbol, timeframe, start_time, end_time)
+        
+        bars = load_bars(db, symbol, timeframe, start_time, end_time, archive)
+        return timeframe, bars.assign(symbol=symbol, timeframe=timeframe)
 
 class AnalyticsRepository:
     @staticmethod
     def insert_analytics(db: Session, symbol_x: str, symbol_y: str, timeframe: str,
-                        hedge_ratio: Optional[float], spread: Optional[float], 
+                        hedge_ratio: Optional[float], spread: Optional[float],
                         z_score: Optional[float], rolling_corr: Optional[float],
-                        adf_stat: Optional[float], p_value: Optional[float], 
+                        adf_stat: Optional[float], p_value: Optional[float],
                         computed_at: int):
         analytics = Analytics(
             symbol_x=symbol_x,
@@ -95,7 +239,14 @@ class AnalyticsRepository:
         return analytics
     
     @staticmethod
-    def get_analytics(db: Session, symbol_x: str, symbol_y: str, timeframe: str, 
+    def insert_analytics_rows(db: Session, rows: Sequence[tuple], commit: bool = True):
+        # rows are in ANALYTICS_COLUMNS order
+        insert_rows(db, Analytics.__table__, ANALYTICS_COLUMNS, rows)
+        if commit:
+            db.commit()
+    
+    @staticmethod
+    def get_analytics(db: Session, symbol_x: str, symbol_y: str, timeframe: str,
                      start_time: int, end_time: int) -> List[Analytics]:
         return db.query(Analytics).filter(
             Analytics.symbol_x == symbol_x,
@@ -106,13 +257,62 @@ class AnalyticsRepository:
         ).order_by(Analytics.computed_at).all()
     
     @staticmethod
-    def get_recent_analytics(db: Session, symbol_x: str, symbol_y: str, 
+    def get_recent_analytics(db: Session, symbol_x: str, symbol_y: str,
                            timeframe: str, limit: int = 100) -> List[Analytics]:
         return db.query(Analytics).filter(
             Analytics.symbol_x == symbol_x,
             Analytics.symbol_y == symbol_y,
             Analytics.timeframe == timeframe
         ).order_by(Analytics.computed_at.desc()).limit(limit).all()
+    
+    @staticmethod
+    def get_analytics_frame(db: Session, symbol_x: str, symbol_y: str, timeframe: str,
+                            start_time: int, end_time: int) -> pd.DataFrame:
+        columns = Analytics.__table__.c
+        stmt = select(*(columns[field] for field in ANALYTICS_FRAME_FIELDS)).where(
+            columns.symbol_x == symbol_x,
+            columns.symbol_y == symbol_y,
+            columns.timeframe == timeframe,
+            columns.computed_at >= start_time,
+            columns.computed_at <= end_time
+        ).order_by(columns.computed_at)
+        return to_frame(fetch_columns(db.connection(), stmt, ANALYTICS_FRAME_FIELDS),
+                        symbol_x=symbol_x, symbol_y=symbol_y, timeframe=timeframe)
+    
+    @staticmethod
+    def get_recent_analytics_frame(db: Session, symbol_x: str, symbol_y: str,
+                                   timeframe: str, limit: int = 100) -> pd.DataFrame:
+        # Newest first, like get_recent_analytics
+        columns = Analytics.__table__.c
+        stmt = select(*(columns[field] for field in ANALYTICS_FRAME_FIELDS)).where(
+            columns.symbol_x == symbol_x,
+            columns.symbol_y == symbol_y,
+            columns.timeframe == timeframe
+        ).order_by(columns.computed_at.desc()).limit(limit)
+        return to_frame(fetch_columns(db.connection(), stmt, ANALYTICS_FRAME_FIELDS),
+                        symbol_x=symbol_x, symbol_y=symbol_y, timeframe=timeframe)
+    
+    @staticmethod
+    def get_analytics_at_resolution(db: Session, symbol_x: str, symbol_y: str, start_time: int, end_time: int,
+                                    resolution_ms: int) -> Tuple[str, pd.DataFrame]:
+        timeframe = select_tier(ANALYTICS_TIER_MS, ANALYTICS_TTL_DAYS, start_time, resolution_ms)
+        return timeframe, AnalyticsRepository.get_analytics_frame(db, symbol_x, symbol_y, timeframe,
+                                                                  start_time, end_time)
+
+class JournalRepository:
+    @staticmethod
+    def get_checkpoint(db: Session, name: str = 'ticks') -> Tuple[int, int]:
+        # (segment, record) of the next journal record to apply; (0, 0) reads from the start
+        checkpoint = db.get(JournalCheckpoint, name)
+        if checkpoint is None:
+            return 0, 0
+        return checkpoint.segment, checkpoint.record
+    
+    @staticmethod
+    def set_checkpoint(db: Session, position: Tuple[int, int], name: str = 'ticks'):
+        # Not committed here, so it lands in the same transaction as the ticks
+        upsert_rows(db, JournalCheckpoint.__table__, ('name', 'segment', 'record'),
+                    [(name, position[0], position[1])], ('name',))
 
 class AlertRepository:
     @staticmethod
@@ -120,6 +320,8 @@ class AlertRepository:
         alert = Alert(metric=metric, condition=condition, threshold=threshold, is_active=True)
         db.add(alert)
         db.commit()
+        # Loaded now, so the alert stays readable once the session is closed
+        db.refresh(alert)
         return alert
     
     @staticmethod
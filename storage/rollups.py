@@ -0,0 +1,142 @@
+import logging
+import time
+import numpy as np
+from typing import Dict, Optional
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+from analytics.bar_sampler import is_bar_key
+from analytics.resampler import BarColumns, Resampler
+from storage.models import ResampledData, Analytics
+from storage.repository import (
+    ResampledRepository, AnalyticsRepository, ANALYTICS_COLUMNS, ANALYTICS_TIER_MS, BAR_FRAME_FIELDS, DAY_MS,
+    insert_rows
+)
+from config.settings import (
+    TIMEFRAMES, TIMEFRAME_MS, BAR_ROLLUPS, ANALYTICS_ROLLUPS, ROLLUP_DELAY_MS,
+    BAR_TTL_DAYS, BAR_SAMPLER_TTL_DAYS, ANALYTICS_TTL_DAYS
+)
+
+logger = logging.getLogger(__name__)
+
+# Scheduled downsampling. Each run rebuilds, per symbol (or pair), the target
+# buckets from the last one already stored up to the last completed bucket,
+# ROLLUP_DELAY_MS behind now so the source tier has been flushed. Reads can go
+# through read_db; writes and TTL deletes use the writer session.
+
+def rollup_bars(db: Session, source: str, target: str, now_ms: Optional[int] = None,
+                read_db: Optional[Session] = None) -> int:
+    if target in TIMEFRAMES:
+        raise ValueError(f"Bar tier {target} is built live and cannot be a rollup target")
+    
+    now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+    duration = TIMEFRAME_MS[target]
+    cutoff = (now_ms - ROLLUP_DELAY_MS) // duration * duration
+    reader = read_db or db
+    columns = ResampledData.__table__.c
+    
+    symbols = reader.execute(select(columns.symbol).where(columns.timeframe == source).distinct()).scalars().all()
+    written = 0
+    for symbol in symbols:
+        since = reader.execute(select(func.max(columns.start_time)).where(
+            columns.symbol == symbol, columns.timeframe == target
+        )).scalar() or 0
+        
+        frame = ResampledRepository.get_bars_frame(reader, symbol, source, since, cutoff - 1)
+        if frame.empty:
+            continue
+        
+        bars = BarColumns(*(frame[field].to_numpy() for field in BAR_FRAME_FIELDS))
+        rolled = Resampler.rollup_bars(bars, target).to_rows(symbol, target)
+        ResampledRepository.upsert_bars(db, rolled)
+        written += len(rolled)
+    
+    if read_db is not None:
+        read_db.rollback()
+    return written
+
+def rollup_analytics(db: Session, source: str, target: str, now_ms: Optional[int] = None,
+                     read_db: Optional[Session] = None) -> int:
+    # A downsampled snapshot is the last source snapshot in its bucket, stamped
+    # with the bucket start. The rebuilt range is deleted first, since
+    # analytics rows have no unique key to upsert on.
+    now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+    duration = ANALYTICS_TIER_MS[target]
+    cutoff = (now_ms - ROLLUP_DELAY_MS) // duration * duration
+    reader = read_db or db
+    table = Analytics.__table__
+    columns = table.c
+    
+    pairs = reader.execute(
+        select(columns.symbol_x, columns.symbol_y).where(columns.timeframe == source).distinct()
+    ).all()
+    written = 0
+    for symbol_x, symbol_y in pairs:
+        pair = (columns.symbol_x == symbol_x, columns.symbol_y == symbol_y)
+        since = reader.execute(select(func.max(columns.computed_at)).where(
+            *pair, columns.timeframe == target
+        )).scalar() or 0
+        
+        frame = AnalyticsRepository.get_analytics_frame(reader, symbol_x, symbol_y, source, since, cutoff - 1)
+        if frame.empty:
+            continue
+        
+        buckets = frame['computed_at'].to_numpy() // duration * duration
+        last = np.append(np.flatnonzero(buckets[1:] != buckets[:-1]), len(buckets) - 1)
+        snapshots = frame.iloc[last].assign(timeframe=target, computed_at=buckets[last])[list(ANALYTICS_COLUMNS)]
+        # NaN back to NULL, numpy scalars to Python ones for the driver
+        snapshots = list(snapshots.astype(object).where(snapshots.notna(), None).itertuples(index=False, name=None))
+        
+        db.execute(delete(table).where(*pair, columns.timeframe == target,
+                                       columns.computed_at >= since, columns.computed_at < cutoff))
+        insert_rows(db, table, ANALYTICS_COLUMNS, snapshots)
+        db.commit()
+        written += len(snapshots)
+    
+    if read_db is not None:
+        read_db.rollback()
+    return written
+
+def expire_tiers(db: Session, now_ms: Optional[int] = None) -> Dict[str, int]:
+    # Per-symbol deletes, so each one is a range scan of the
+    # (symbol, timeframe, start_time) index
+    now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+    bars = ResampledData.__table__.c
+    analytics = Analytics.__table__.c
+    deleted = {}
+    
+    tiers = db.execute(select(bars.symbol, bars.timeframe).distinct()).all()
+    for symbol, timeframe in tiers:
+        ttl = BAR_TTL_DAYS.get(timeframe, BAR_SAMPLER_TTL_DAYS if is_bar_key(timeframe) else 0)
+        if ttl <= 0:
+            continue
+        result = db.execute(delete(ResampledData.__table__).where(
+            bars.symbol == symbol, bars.timeframe == timeframe, bars.start_time < now_ms - ttl * DAY_MS
+        ))
+        deleted[timeframe] = deleted.get(timeframe, 0) + result.rowcount
+    
+    tiers = db.execute(select(analytics.symbol_x, analytics.symbol_y, analytics.timeframe).distinct()).all()
+    for symbol_x, symbol_y, timeframe in tiers:
+        ttl = ANALYTICS_TTL_DAYS.get(timeframe, 0)
+        if ttl <= 0:
+            continue
+        result = db.execute(delete(Analytics.__table__).where(
+            analytics.symbol_x == symbol_x, analytics.symbol_y == symbol_y, analytics.timeframe == timeframe,
+            analytics.computed_at < now_ms - ttl * DAY_MS
+        ))
+        deleted[f"analytics_{timeframe}"] = deleted.get(f"analytics_{timeframe}", 0) + result.rowcount
+    
+    db.commit()
+    return {tier: count for tier, count in deleted.items() if count}
+
+def run_rollups(db: Session, read_db: Optional[Session] = None, now_ms: Optional[int] = None) -> dict:
+    # Finer tiers first, so each rollup sees the bars the previous one wrote
+    now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+    stats = {}
+    for source, target in BAR_ROLLUPS:
+        stats[f"{source}->{target}"] = rollup_bars(db, source, target, now_ms, read_db)
+    for source, target in ANALYTICS_ROLLUPS:
+        stats[f"analytics {source}->{target}"] = rollup_analytics(db, source, target, now_ms, read_db)
+    stats['expired'] = expire_tiers(db, now_ms)
+    
+    logger.debug(f"Rollups: {stats}")
+    return stats
\ No newline at end of file
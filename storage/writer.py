@@ -0,0 +1,361 @@
+import concurrent.futures
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from storage.database import SessionLocal
+from storage.journal import TickJournal, to_rows, ascii_records
+from storage.repository import TickRepository, ResampledRepository, AnalyticsRepository, JournalRepository
+from config.settings import (
+    WRITER_MAX_PENDING_ROWS, WRITER_MAX_GROUP_ROWS, WRITER_MAX_RETRIES, WRITER_RETRY_MAX_DELAY, WRITER_DEAD_LETTER_PATH
+)
+
+logger = logging.getLogger(__name__)
+
+# Single thread that owns every write from the ingest path, so the event loop
+# never waits on the writer connection. Ticks come either from submit_ticks()
+# or, with a journal, straight from the journal files: the writer follows them
+# from the checkpoint stored in SQLite and commits the new checkpoint in the
+# same transaction as the rows, so on restart it replays exactly what was
+# journaled but never committed. Closed bars (submit_bars) and analytics
+# snapshots (submit_analytics) are queued the same way and committed with the
+# next group of ticks; any other write (e.g. from an API route) is queued as
+# a call with submit_call and runs on this thread's connection after that
+# group. A group that keeps failing (a constraint violation, a
+# bad row, a schema mismatch) is retried max_retries times with doubling
+# delays, then appended to the dead-letter file and skipped, with the journal
+# checkpoint moved past it, so one bad batch cannot wedge the writer.
+class StorageWriter:
+    def __init__(self, max_pending_rows: int = WRITER_MAX_PENDING_ROWS, max_group_rows: int = WRITER_MAX_GROUP_ROWS,
+                 retry_delay: float = 1.0, journal: Optional[TickJournal] = None,
+                 max_retries: int = WRITER_MAX_RETRIES, max_retry_delay: float = WRITER_RETRY_MAX_DELAY,
+                 dead_letter_path: str = WRITER_DEAD_LETTER_PATH):
+        self.max_pending_rows = max_pending_rows
+        self.max_group_rows = max_group_rows
+        self.retry_delay = retry_delay
+        self.max_retries = max_retries
+        self.max_retry_delay = max_retry_delay
+        self.dead_letter_path = dead_letter_path
+        self.journal = journal
+        self.position = None
+        self.replayed_rows = 0
+        self.skipped_records = 0
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.running = False
+        
+        self.pending_rows = 0
+        self.rows_written = 0
+        self.bars_written = 0
+        self.analytics_written = 0
+        self.commit_count = 0
+        self.failed_commits = 0
+        self.dead_letter_batches = 0
+        self.dead_letter_rows = 0
+        self.last_error = None
+        self.rejected_batches = 0
+        self.last_commit_ms = 0.0
+        self.max_commit_ms = 0.0
+        self.total_commit_ms = 0.0
+        self.last_lag_ms = 0.0
+    
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="storage-writer", daemon=True)
+        self.thread.start()
+        logger.info("Storage writer started")
+    
+    def stop(self, timeout: float = 30.0):
+        self.running = False
+        self.queue.put(None)
+        if self.journal:
+            self.journal.appended_event.set()
+        if self.thread:
+            self.thread.join(timeout)
+            if self.thread.is_alive():
+                logger.error(f"Storage writer did not drain within {timeout}s, "
+                             f"{self.pending_rows} rows not written")
+        logger.info("Storage writer stopped")
+    
+    def submit_ticks(self, rows: List[tuple]) -> bool:
+        # Never blocks the caller: a full backlog is reported back so the
+        # rows stay where they are and are offered again on the next flush
+        with self.lock:
+            if self.pending_rows and self.pending_rows + len(rows) > self.max_pending_rows:
+                self.rejected_batches += 1
+                return False
+            self.pending_rows += len(rows)
+        
+        self._enqueue('ticks', rows)
+        return True
+    
+    def submit_bars(self, rows: List[tuple]):
+        # (symbol, timeframe, start_time, open, high, low, close, volume) rows, upserted
+        if rows:
+            self._enqueue('bars', rows)
+    
+    def submit_analytics(self, rows: List[tuple]):
+        # Rows in ANALYTICS_COLUMNS order
+        if rows:
+            self._enqueue('analytics', rows)
+    
+    def submit_call(self, method: Callable, *args) -> concurrent.futures.Future:
+        # Runs method(db, *args) on the writer thread in its own session; the
+        # future gets its return value or exception
+        if not self.running:
+            raise RuntimeError("Storage writer is not running")
+        future = concurrent.futures.Future()
+        self._enqueue('calls', [(future, method, args)])
+        return future
+    
+    def _enqueue(self, kind: str, rows: List[tuple]):
+        self.queue.put((time.perf_counter(), kind, rows))
+        if self.journal:
+            # The journal follower waits on this event rather than the queue
+            self.journal.appended_event.set()
+    
+    def _next_group(self) -> Optional[list]:
+        first = self.queue.get()
+        if first is None:
+            return None
+        
+        group = [first]
+        rows = len(first[2])
+        while rows < self.max_group_rows:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Finish this group, then stop
+                self.queue.put(None)
+                break
+            group.append(item)
+            rows += len(item[2])
+        
+        return group
+    
+    def _drain(self) -> list:
+        # Queued bars and analytics, without waiting; used while following the journal
+        items = []
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                return items
+            if item is not None:
+                items.append(item)
+    
+    def run(self):
+        if self.journal:
+            self._follow_journal()
+            return
+        
+        while True:
+            group = self._next_group()
+            if group is None:
+                break
+            
+            writes = _group_writes(group)
+            calls = writes.pop('calls')
+            self._write(writes, group[0][0])
+            self._run_calls(calls)
+            
+            with self.lock:
+                self.pending_rows -= len(writes['ticks'])
+            logger.debug(f"Committed {len(writes['ticks'])} ticks from {len(group)} batches")
+    
+    def _follow_journal(self):
+        db = SessionLocal()
+        try:
+            self.position = JournalRepository.get_checkpoint(db)
+        finally:
+            db.close()
+        
+        backlog = self.journal.backlog(self.position)
+        if backlog:
+            logger.info(f"Replaying {backlog} journaled ticks into the database")
+        
+        event = self.journal.appended_event
+        while True:
+            event.clear()
+            records, position = self.journal.read(self.position, self.max_group_rows)
+            queued = self._drain()
+            if len(records) == 0 and not queued:
+                if not self.running:
+                    break
+                event.wait(0.1)
+                continue
+            
+            read_at = time.perf_counter()
+            writes = _group_writes(queued)
+            calls = writes.pop('calls')
+            rows = writes['ticks'] = self._decode(records)
+            self._write(writes, read_at, position)
+            self._run_calls(calls)
+            
+            if backlog:
+                self.replayed_rows += min(backlog, len(rows))
+                backlog -= min(backlog, len(rows))
+            if position[0] != self.position[0]:
+                self.journal.truncate(position)
+            self.position = position
+    
+    def _decode(self, records) -> List[tuple]:
+        # A record that cannot be decoded is skipped and counted rather than
+        # stopping the thread, which would leave the journal growing
+        try:
+            return to_rows(records)
+        except Exception as e:
+            valid = ascii_records(records)
+            skipped = len(records) - int(valid.sum())
+            self.skipped_records += skipped
+            logger.error(f"Skipping {skipped} undecodable journal records: {e}")
+            try:
+                return to_rows(records[valid])
+            except Exception as e:
+                self.skipped_records += int(valid.sum())
+                logger.error(f"Skipping {int(valid.sum())} more journal records: {e}")
+                return []
+    
+    def _run_calls(self, calls: list):
+        for future, method, args in calls:
+            if not future.set_running_or_notify_cancel():
+                continue
+            db = SessionLocal()
+            try:
+                future.set_result(method(db, *args))
+            except Exception as e:
+                db.rollback()
+                future.set_exception(e)
+            finally:
+                db.close()
+    
+    def _write(self, writes: Dict[str, List[tuple]], received: float, checkpoint: Optional[tuple] = None):
+        attempt = 0
+        while not self._commit(writes, received, checkpoint):
+            if attempt >= self.max_retries:
+                self._dead_letter(writes, checkpoint)
+                if checkpoint is not None:
+                    # Move the checkpoint past the dead-lettered records
+                    self._write({kind: [] for kind in writes}, received, checkpoint)
+                return
+            time.sleep(min(self.retry_delay * 2 ** attempt, self.max_retry_delay))
+            attempt += 1
+    
+    def _dead_letter(self, writes: Dict[str, List[tuple]], checkpoint: Optional[tuple]):
+        rows = sum(map(len, writes.values()))
+        with self.lock:
+            self.dead_letter_batches += 1
+            self.dead_letter_rows += rows
+        
+        entry = {'failed_at': int(time.time() * 1000), 'error': self.last_error, 'checkpoint': checkpoint, **writes}
+        try:
+            directory = os.path.dirname(self.dead_letter_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.dead_letter_path, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"Could not write {rows} rows to the dead-letter file, they are lost: {e}")
+            return
+        logger.error(f"Gave up on {rows} rows after {self.max_retries} retries, "
+                     f"moved them to {self.dead_letter_path}: {self.last_error}")
+    
+    def _commit(self, writes: Dict[str, List[tuple]], received: float, checkpoint: Optional[tuple] = None) -> bool:
+        started = time.perf_counter()
+        rows = writes['ticks']
+        db = SessionLocal()
+        
+        try:
+            # All symbols' batches, bars and analytics go into a single transaction
+            TickRepository.insert_tick_rows(db, rows, commit=False)
+            ResampledRepository.upsert_bars(db, writes['bars'], commit=False)
+            AnalyticsRepository.insert_analytics_rows(db, writes['analytics'], commit=False)
+            if checkpoint is not None:
+                JournalRepository.set_checkpoint(db, checkpoint)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            self.failed_commits += 1
+            self.last_error = str(e)
+            logger.error(f"Storage writer commit failed for {sum(map(len, writes.values()))} rows: {e}")
+            return False
+        finally:
+            db.close()
+        
+        finished = time.perf_counter()
+        commit_ms = (finished - started) * 1000
+        
+        with self.lock:
+            self.rows_written += len(rows)
+            self.bars_written += len(writes['bars'])
+            self.analytics_written += len(writes['analytics'])
+            self.commit_count += 1
+            self.last_commit_ms = commit_ms
+            self.max_commit_ms = max(self.max_commit_ms, commit_ms)
+            self.total_commit_ms += commit_ms
+            self.last_lag_ms = (finished - received) * 1000
+        return True
+    
+    def get_errors(self) -> dict:
+        with self.lock:
+            return {
+                'failed_commits': self.failed_commits,
+                'dead_letter_batches': self.dead_letter_batches,
+                'dead_letter_rows': self.dead_letter_rows,
+                'last_error': self.last_error
+            }
+    
+    def get_stats(self) -> dict:
+        if self.journal:
+            position = self.position
+            return {
+                'journal': self.journal.get_stats(),
+                'pending_rows': self.journal.backlog(position) if position else 0,
+                'replayed_rows': self.replayed_rows,
+                'skipped_records': self.skipped_records,
+                'rows_written': self.rows_written,
+                'bars_written': self.bars_written,
+                'analytics_written': self.analytics_written,
+                'commits': self.commit_count,
+                'failed_commits': self.failed_commits,
+                'dead_letter_batches': self.dead_letter_batches,
+                'dead_letter_rows': self.dead_letter_rows,
+                'last_commit_ms': round(self.last_commit_ms, 2),
+                'avg_commit_ms': round(self.total_commit_ms / self.commit_count, 2) if self.commit_count else 0.0,
+                'max_commit_ms': round(self.max_commit_ms, 2),
+                'last_lag_ms': round(self.last_lag_ms, 2),
+                'is_running': self.running
+            }
+        
+        with self.lock:
+            return {
+                'queued_batches': self.queue.qsize(),
+                'pending_rows': self.pending_rows,
+                'max_pending_rows': self.max_pending_rows,
+                'rows_written': self.rows_written,
+                'bars_written': self.bars_written,
+                'analytics_written': self.analytics_written,
+                'commits': self.commit_count,
+                'failed_commits': self.failed_commits,
+                'dead_letter_batches': self.dead_letter_batches,
+                'dead_letter_rows': self.dead_letter_rows,
+                'rejected_batches': self.rejected_batches,
+                'last_commit_ms': round(self.last_commit_ms, 2),
+                'avg_commit_ms': round(self.total_commit_ms / self.commit_count, 2) if self.commit_count else 0.0,
+                'max_commit_ms': round(self.max_commit_ms, 2),
+                'last_lag_ms': round(self.last_lag_ms, 2),
+                'is_running': self.running
+            }
+
+def _group_writes(items: list) -> Dict[str, List[tuple]]:
+    # Concatenates queued (received, kind, rows) items per kind
+    writes = {'ticks': [], 'bars': [], 'analytics': [], 'calls': []}
+    for _, kind, rows in items:
+        writes[kind].extend(rows)
+    return writes
\ No newline at end of file